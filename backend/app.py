@@ -1,86 +1,250 @@
+import os
+import hmac
+import math
+import logging
+import threading
 import dash
-from dash import dcc, html
+from flask import request, jsonify
+from dash import dcc, html, Patch
 import plotly.graph_objects as go
-from graph import G, dijkstra_shortest_path, bfs_shortest_path, kruskal_mst_path, kruskal_full_mst
+from csr_graph import as_csr
+from graph import G, graph_version, route_cache, distance_matrix, dijkstra_shortest_path, bidirectional_dijkstra_shortest_path, astar_shortest_path, alt_shortest_path, ALT_LANDMARKS, ch_shortest_path, bfs_shortest_path, kruskal_mst_path, kruskal_full_mst, publish_route_update, sync_route_updates, coordinate_route, nearest_airports, search_airports, pareto_routes, k_shortest_paths
 
-# plotar grafo geográfico com cores diferentes para diferentes algoritmos
-def plot_geo_graph(G, path=[], algorithm="dijkstra", mst_graph=None):
-    # arestas do grafo original
-    edge_traces = []
-    for u, v in G.edges():
-        x = [G.nodes[u]['lon'], G.nodes[v]['lon']]
-        y = [G.nodes[u]['lat'], G.nodes[v]['lat']]
-        edge_traces.append(go.Scattergeo(
-            lon=x,
-            lat=y,
+# Cores diferentes para cada algoritmo
+path_colors = {
+    'bfs': 'green',
+    'dijkstra': 'red', 
+    'bidijkstra': 'darkred',
+    'astar': 'purple',
+    'alt': 'darkviolet',
+    'pareto': 'darkgreen',
+    'yen': 'red',
+    'ch': 'crimson',
+    'kruskal': 'orange',
+    'coordinates': 'teal'
+}
+
+# Posição de cada trace na figura base: as arestas e os nós são desenhados uma
+# vez; a MST e o caminho são sobreposições atualizadas a cada interação. A
+# grade de clique é invisível e só existe para o mapa emitir clickData fora
+# dos aeroportos. As rotas alternativas (Yen, Pareto) ocupam um número fixo de
+# traces no fim, para o Patch sempre atualizar (ou esvaziar) os mesmos índices
+EDGES_TRACE, MST_TRACE, NODES_TRACE, PATH_TRACE, CLICK_TRACE = range(5)
+ALTERNATIVE_SLOTS = 4
+ALTERNATIVE_TRACES = tuple(range(5, 5 + ALTERNATIVE_SLOTS))
+alternative_colors = ['darkorange', 'deepskyblue', 'magenta', 'goldenrod']
+# Quantos caminhos o Yen mostra por padrão (o principal + alternativas)
+K_PATHS = 3
+
+# Número aproximado de pontos da grade de clique
+CLICK_GRID_POINTS = 3000
+
+# figuras base e coordenadas já montadas, por versão do grafo. Os callbacks
+# rodam em várias threads do Flask, então o dicionário só é lido e alterado
+# com o lock (como no RouteCache)
+_figure_cache = {}
+_figure_lock = threading.Lock()
+
+def _cached(key, version, build):
+    """
+    Busca `key` no cache da versão atual do grafo, montando com build() se
+    necessário. Entradas de versões antigas são descartadas. A montagem roda
+    fora do lock; se duas threads montarem a mesma entrada, fica a primeira.
+    """
+    with _figure_lock:
+        if _figure_cache.get('version') != version:
+            _figure_cache.clear()
+            _figure_cache['version'] = version
+        value = _figure_cache.get(key)
+    if value is None:
+        value = build()
+        with _figure_lock:
+            if _figure_cache.get('version') == version:
+                value = _figure_cache.setdefault(key, value)
+    return value
+
+def _edge_coords(graph):
+    """
+    Coordenadas de todas as arestas em uma única linha, separadas por None
+    (cada None interrompe o traço entre uma aresta e a próxima).
+    """
+    lon, lat = [], []
+    nodes = graph.nodes
+    for u, v in graph.edges():
+        lon += [nodes[u]['lon'], nodes[v]['lon'], None]
+        lat += [nodes[u]['lat'], nodes[v]['lat'], None]
+    return lon, lat
+
+def _csr_edge_coords(csr):
+    """
+    Como _edge_coords, mas lendo as arestas dos vetores de um CSRGraph: o CSR
+    não muda depois de criado, então pode ser lido enquanto outra requisição
+    altera as rotas do grafo (o que troca o CSR inteiro).
+    """
+    lon, lat = [], []
+    lons, lats = csr.lon.tolist(), csr.lat.tolist()
+    for u, v in zip(csr.edge_u.tolist(), csr.edge_v.tolist()):
+        lon += [lons[u], lons[v], None]
+        lat += [lats[u], lats[v], None]
+    return lon, lat
+
+def _click_grid(graph, margin=2.0):
+    """
+    Pontos de uma grade regular cobrindo a região dos aeroportos (com
+    `margin` graus de folga), com passo escolhido para dar cerca de
+    CLICK_GRID_POINTS pontos.
+    """
+    lats = [graph.nodes[n]['lat'] for n in graph.nodes]
+    lons = [graph.nodes[n]['lon'] for n in graph.nodes]
+    if not lats:
+        return [], []
+    lat_lo, lat_hi = max(min(lats) - margin, -90), min(max(lats) + margin, 90)
+    lon_lo, lon_hi = max(min(lons) - margin, -180), min(max(lons) + margin, 180)
+    step = max(math.sqrt((lat_hi - lat_lo) * (lon_hi - lon_lo) / CLICK_GRID_POINTS), 0.1)
+    grid_lat = [lat_lo + i * step for i in range(int((lat_hi - lat_lo) / step) + 1)]
+    grid_lon = [lon_lo + j * step for j in range(int((lon_hi - lon_lo) / step) + 1)]
+    return ([lon for _ in grid_lat for lon in grid_lon],
+            [lat for lat in grid_lat for _ in grid_lon])
+
+def base_figure(G):
+    """
+    Figura com as arestas do grafo (um único trace), a camada da MST (vazia),
+    os nós e a camada do caminho (vazia). Montada uma vez por versão do grafo.
+    """
+    # Uma única leitura do CSR: arestas e versão vêm do mesmo grafo
+    csr = as_csr(G)
+    def build():
+        edges_lon, edges_lat = _csr_edge_coords(csr)
+        edge_trace = go.Scattergeo(
+            lon=edges_lon,
+            lat=edges_lat,
             mode='lines',
             line=dict(width=0.5, color='grey'),
-            hoverinfo='none'
-        ))
-    
-    # Se for Kruskal e tiver MST, desenhar arestas da MST
-    if algorithm == "kruskal" and mst_graph:
-        mst_traces = []
-        for u, v in mst_graph.edges():
-            x = [mst_graph.nodes[u]['lon'], mst_graph.nodes[v]['lon']]
-            y = [mst_graph.nodes[u]['lat'], mst_graph.nodes[v]['lat']]
-            mst_traces.append(go.Scattergeo(
-                lon=x,
-                lat=y,
-                mode='lines',
-                line=dict(width=2, color='orange'),
-                hoverinfo='none',
-                name="MST"
-            ))
-        edge_traces = mst_traces  # Substitui arestas cinzas pelas da MST
-    
-    # nós
-    node_trace = go.Scattergeo(
-        lon=[G.nodes[n]['lon'] for n in G.nodes()],
-        lat=[G.nodes[n]['lat'] for n in G.nodes()],
-        text=[G.nodes[n]['name'] for n in G.nodes()],
-        mode='markers',
-        marker=dict(size=6, color='blue'),
-        hoverinfo='text'
-    )
-    
-    # Cores diferentes para cada algoritmo
-    path_colors = {
-        'bfs': 'green',
-        'dijkstra': 'red', 
-        'kruskal': 'orange'
-    }
-    
-    # caminho encontrado (apenas para BFS e Dijkstra)
-    path_trace = None
-    if path and algorithm != "kruskal":
+            hoverinfo='none',
+            showlegend=False
+        )
+        mst_trace = go.Scattergeo(
+            lon=[],
+            lat=[],
+            mode='lines',
+            line=dict(width=2, color=path_colors['kruskal']),
+            hoverinfo='none',
+            name="MST"
+        )
+        # nós
+        node_trace = go.Scattergeo(
+            lon=[G.nodes[n]['lon'] for n in G.nodes()],
+            lat=[G.nodes[n]['lat'] for n in G.nodes()],
+            text=[G.nodes[n]['name'] for n in G.nodes()],
+            mode='markers',
+            marker=dict(size=6, color='blue'),
+            hoverinfo='text',
+            showlegend=False
+        )
         path_trace = go.Scattergeo(
-            lon=[G.nodes[n]['lon'] for n in path],
-            lat=[G.nodes[n]['lat'] for n in path],
+            lon=[],
+            lat=[],
             mode='lines+markers',
-            line=dict(width=4, color=path_colors.get(algorithm, 'red')),
-            marker=dict(size=10, color=path_colors.get(algorithm, 'red')),
+            line=dict(width=4),
+            marker=dict(size=10),
+            hoverinfo='none'
+        )
+        grid_lon, grid_lat = _click_grid(G)
+        click_trace = go.Scattergeo(
+            lon=grid_lon,
+            lat=grid_lat,
+            mode='markers',
+            marker=dict(size=14, opacity=0),
             hoverinfo='none',
-            name=f"Caminho {algorithm.upper()}"
+            showlegend=False
         )
-    
-    data = edge_traces + [node_trace]
-    if path_trace:
-        data.append(path_trace)
-    
-    fig = go.Figure(data=data)
-    fig.update_layout(
-        geo=dict(
-            projection_type='natural earth',
-            showland=True, landcolor='rgb(243,243,243)',
-            showocean=True, oceancolor='rgb(230,245,255)',
-            showcountries=True, countrycolor='rgb(204,204,204)'
-        ),
-        margin=dict(l=0,r=0,t=0,b=0),
-        showlegend=True if (path or mst_graph) else False
-    )
+        alternative_traces = [
+            go.Scattergeo(
+                lon=[],
+                lat=[],
+                mode='lines+markers',
+                line=dict(width=3, dash='dash', color=color),
+                marker=dict(size=7, color=color),
+                hoverinfo='none',
+                showlegend=False
+            )
+            for color in alternative_colors
+        ]
+        fig = go.Figure(data=[edge_trace, mst_trace, node_trace, path_trace, click_trace,
+                              *alternative_traces])
+        fig.update_layout(
+            geo=dict(
+                projection_type='natural earth',
+                showland=True, landcolor='rgb(243,243,243)',
+                showocean=True, oceancolor='rgb(230,245,255)',
+                showcountries=True, countrycolor='rgb(204,204,204)'
+            ),
+            margin=dict(l=0,r=0,t=0,b=0),
+            showlegend=False
+        )
+        return fig
+    return _cached('base', csr.fingerprint(), build)
+
+def overlay_updates(G, path=[], algorithm="dijkstra", mst_graph=None, alternatives=()):
+    """
+    Propriedades que mudam por interação: {índice do trace: {propriedade: valor}}
+    e o showlegend do layout. Servem tanto para montar a figura completa quanto
+    para o Patch parcial enviado pelos callbacks. `alternatives` é uma lista
+    de (caminho, nome) desenhados nas camadas de rotas alternativas (as que
+    passarem de ALTERNATIVE_SLOTS ficam de fora).
+    """
+    show_mst = algorithm == "kruskal" and mst_graph is not None
+    if show_mst:
+        mst_lon, mst_lat = _cached('mst', graph_version(G), lambda: _edge_coords(mst_graph))
+    else:
+        mst_lon, mst_lat = [], []
+
+    # caminho encontrado (todos os algoritmos exceto Kruskal)
+    show_path = bool(path) and algorithm != "kruskal"
+    color = path_colors.get(algorithm, 'red')
+    traces = {
+        # Se for Kruskal e tiver MST, a MST substitui as arestas cinzas
+        EDGES_TRACE: {'visible': not show_mst},
+        MST_TRACE: {'lon': mst_lon, 'lat': mst_lat},
+        PATH_TRACE: {
+            'lon': [G.nodes[n]['lon'] for n in path] if show_path else [],
+            'lat': [G.nodes[n]['lat'] for n in path] if show_path else [],
+            'line': {'width': 4, 'color': color},
+            'marker': {'size': 10, 'color': color},
+            'name': f"Caminho {algorithm.upper()}",
+        },
+    }
+    alternatives = list(alternatives)[:ALTERNATIVE_SLOTS] if show_path else []
+    for slot, index in enumerate(ALTERNATIVE_TRACES):
+        alt_path, name = alternatives[slot] if slot < len(alternatives) else ([], "")
+        traces[index] = {
+            'lon': [G.nodes[n]['lon'] for n in alt_path],
+            'lat': [G.nodes[n]['lat'] for n in alt_path],
+            'name': name,
+            'showlegend': bool(alt_path),
+        }
+    return traces, show_mst or show_path
+
+# plotar grafo geográfico com cores diferentes para diferentes algoritmos
+def plot_geo_graph(G, path=[], algorithm="dijkstra", mst_graph=None, alternatives=()):
+    # cópia da figura base em cache, com as sobreposições aplicadas
+    fig = go.Figure(base_figure(G))
+    traces, showlegend = overlay_updates(G, path, algorithm, mst_graph, alternatives)
+    for index, props in traces.items():
+        fig.data[index].update(props)
+    fig.update_layout(showlegend=showlegend)
     return fig
 
+# atualização parcial da figura: só as sobreposições vão para o navegador
+def patch_geo_graph(G, path=[], algorithm="dijkstra", mst_graph=None, alternatives=()):
+    patched = Patch()
+    traces, showlegend = overlay_updates(G, path, algorithm, mst_graph, alternatives)
+    for index, props in traces.items():
+        for key, value in props.items():
+            patched['data'][index][key] = value
+    patched['layout']['showlegend'] = showlegend
+    return patched
+
 # cria app Dash
 app = dash.Dash(__name__)
 
@@ -95,6 +259,12 @@ app.layout = html.Div([
             options=[
                 {"label": "BFS (Breadth-First Search)", "value": "bfs"},
                 {"label": "Dijkstra (Caminho Mínimo)", "value": "dijkstra"},
+                {"label": "Dijkstra Bidirecional (Caminho Mínimo)", "value": "bidijkstra"},
+                {"label": "A* (Caminho Mínimo com Heurística Haversine)", "value": "astar"},
+                {"label": "ALT (A* com Marcos e Desigualdade Triangular)", "value": "alt"},
+                {"label": "Contraction Hierarchies (Caminho Mínimo Pré-processado)", "value": "ch"},
+                {"label": "Pareto (Conexões × Distância)", "value": "pareto"},
+                {"label": "K Caminhos Mais Curtos (Yen)", "value": "yen"},
                 {"label": "Kruskal (Árvore Geradora Mínima)", "value": "kruskal"}
             ],
             value="dijkstra",
@@ -104,6 +274,41 @@ app.layout = html.Div([
             style={"margin-bottom": "20px"}
         ),
     ], style={"width": "100%", "margin-bottom": "20px"}),
+
+    # Número de marcos do ALT (só aparece com o ALT selecionado)
+    html.Div([
+        html.Label("Número de marcos (ALT):"),
+        dcc.Slider(
+            id="alt-landmarks",
+            min=1,
+            max=32,
+            step=1,
+            value=ALT_LANDMARKS,
+            marks={k: str(k) for k in (1, 4, 8, 16, 24, 32)},
+        ),
+    ], id="alt-landmarks-div", style={"display": "none"}),
+
+    # Número de caminhos do Yen (só aparece com o Yen selecionado)
+    html.Div([
+        html.Label("Número de caminhos (Yen):"),
+        dcc.Slider(
+            id="k-paths",
+            min=2,
+            max=ALTERNATIVE_SLOTS + 1,
+            step=1,
+            value=K_PATHS,
+        ),
+    ], id="k-paths-div", style={"display": "none"}),
+
+    # Comparação com buscas de referência (Dijkstra e A*): desligada por
+    # padrão, porque roda essas buscas além da escolhida
+    html.Div([
+        dcc.Checklist(
+            id="compare",
+            options=[{"label": " Comparar nós visitados com o Dijkstra (mais lento)", "value": "compare"}],
+            value=[],
+        ),
+    ], id="compare-div", style={"display": "none"}),
     
     # Seleção de aeroportos
     html.Div([
@@ -111,7 +316,7 @@ app.layout = html.Div([
             html.Label("Origem:"),
             dcc.Dropdown(
                 id="source",
-                options=[{"label": G.nodes[n]['name'], "value": n} for n in G.nodes],
+                options=[],
                 placeholder="Selecione aeroporto de origem",
                 searchable=True,
                 clearable=True
@@ -121,7 +326,7 @@ app.layout = html.Div([
             html.Label("Destino:"),
             dcc.Dropdown(
                 id="target",
-                options=[{"label": G.nodes[n]['name'], "value": n} for n in G.nodes],
+                options=[],
                 placeholder="Selecione aeroporto de destino",
                 searchable=True,
                 clearable=True
@@ -129,7 +334,11 @@ app.layout = html.Div([
         ], id="target-div", style={"width": "48%", "display": "inline-block", "margin-left": "4%"}),
     ]),
     
-    dcc.Graph(id="graph"),
+    dcc.Graph(id="graph", figure=plot_geo_graph(G)),
+    # coordenadas clicadas no mapa (origem e destino da rota por coordenadas)
+    dcc.Store(id="click-points", data=[]),
+    # versão do grafo cuja figura base o navegador já tem
+    dcc.Store(id="figure-version", data=graph_version(G)),
     html.Div(id="path_output", style={
         "margin-top": "20px", 
         "font-size": "16px",
@@ -140,10 +349,17 @@ app.layout = html.Div([
     })
 ])
 
-# callback para controlar visibilidade dos dropdowns de aeroportos
+# Buscas dirigidas que podem ser comparadas com o Dijkstra (opção "compare")
+COMPARABLE_ALGORITHMS = ("bidijkstra", "astar", "alt")
+
+# callback para controlar visibilidade dos dropdowns de aeroportos, do
+# número de marcos do ALT e da comparação com o Dijkstra
 @app.callback(
     [dash.Output("source-div", "style"),
-     dash.Output("target-div", "style")],
+     dash.Output("target-div", "style"),
+     dash.Output("alt-landmarks-div", "style"),
+     dash.Output("k-paths-div", "style"),
+     dash.Output("compare-div", "style")],
     [dash.Input("algorithm", "value")]
 )
 def toggle_airport_dropdowns(algorithm):
@@ -152,68 +368,248 @@ def toggle_airport_dropdowns(algorithm):
         source_style = {"display": "none"}
         target_style = {"display": "none"}
     else:
-        # Mostra ambos os dropdowns para BFS e Dijkstra
+        # Mostra ambos os dropdowns para os algoritmos de caminho
         source_style = {"width": "48%", "display": "inline-block"}
         target_style = {"width": "48%", "display": "inline-block", "margin-left": "4%"}
+    landmarks_style = {"margin-bottom": "20px"} if algorithm == "alt" else {"display": "none"}
+    k_paths_style = {"margin-bottom": "20px"} if algorithm == "yen" else {"display": "none"}
+    compare_style = {"margin-bottom": "20px"} if algorithm in COMPARABLE_ALGORITHMS else {"display": "none"}
     
-    return source_style, target_style
+    return source_style, target_style, landmarks_style, k_paths_style, compare_style
+
+# Quantos aeroportos a busca dos dropdowns devolve
+SEARCH_OPTIONS = 20
+
+# Opções dos dropdowns de aeroportos: a busca roda no servidor (índice por
+# nome e IATA/ICAO), então a página não carrega a lista inteira
+def airport_options(search_value, value):
+    ids = search_airports(G, search_value, SEARCH_OPTIONS) if search_value else []
+    if value is not None and value not in ids and value in G:
+        # mantém a opção selecionada para o dropdown continuar mostrando o nome
+        ids = [value] + ids
+    # `search` inclui o texto digitado para o filtro do navegador não esconder
+    # resultados que só batem sem acento ou pelo código
+    return [{"label": G.nodes[n]['name'], "value": n,
+             "search": f"{search_value or ''} {G.nodes[n]['name']}"} for n in ids]
+
+@app.callback(
+    dash.Output("source", "options"),
+    dash.Input("source", "search_value"),
+    dash.State("source", "value")
+)
+def search_source(search_value, value):
+    return airport_options(search_value, value)
+
+@app.callback(
+    dash.Output("target", "options"),
+    dash.Input("target", "search_value"),
+    dash.State("target", "value")
+)
+def search_target(search_value, value):
+    return airport_options(search_value, value)
+
+# Algoritmos de caminho: nome exibido, nome curto e função de busca
+route_algorithms = {
+    "bfs": ("BFS (Breadth-First Search)", "BFS", bfs_shortest_path),
+    "dijkstra": ("Dijkstra (Caminho Mínimo)", "Dijkstra", dijkstra_shortest_path),
+    "bidijkstra": ("Dijkstra Bidirecional", "Dijkstra Bidirecional", bidirectional_dijkstra_shortest_path),
+    "astar": ("A* (Heurística Haversine)", "A*", astar_shortest_path),
+    "alt": ("ALT (A* com Marcos)", "ALT", alt_shortest_path),
+    "ch": ("Contraction Hierarchies", "Contraction Hierarchies", ch_shortest_path),
+}
+
+# Texto exibido para um RouteResult (os algoritmos não formatam nada)
+def format_route(title, result):
+    return (
+        f"Algoritmo: {title}\n"
+        f"Caminho: {' → '.join(G.nodes[n]['name'] for n in result.path)}\n"
+        f"Número de conexões: {result.connections}\n"
+        f"Custo total: {result.total:.2f} km"
+    )
+
+# Respostas lidas de estruturas pré-calculadas, sem busca no grafo
+precomputed_labels = {
+    'apsp': "Respondido pela tabela pré-calculada de todos os pares (sem busca)",
+    'spt': "Respondido pela árvore de caminhos mínimos em cache (sem busca)",
+}
+
+# Quanto trabalho a busca fez: nós visitados ou a estrutura que respondeu
+def format_search_stats(result):
+    if 'precomputed' in result.stats:
+        return precomputed_labels[result.stats['precomputed']]
+    return f"Nós visitados: {result.stats['settled']} de {len(G.nodes())}"
+
+# Ganho da busca dirigida: quantas vezes menos nós ela visitou que cada busca
+# de referência (resultados de buscas de verdade, com stats['settled'])
+def format_speedup(result, baselines):
+    settled = max(result.stats['settled'], 1)
+    return "Redução de nós visitados: " + ", ".join(
+        f"{baseline.stats['settled'] / settled:.1f}x vs {name}" for name, baseline in baselines)
+
+# Nós visitados pela busca dirigida e pelas buscas de referência (só com a
+# opção "compare"): o Dijkstra de verdade, sem tabela nem árvore
+# pré-calculada, e, para o ALT, o A* com a linha reta, a heurística que ele
+# substitui. As referências passam pelo cache de rotas, então cada par
+# (origem, destino) só é buscado uma vez por versão do grafo
+def format_comparison(algorithm, short_name, result, source, target):
+    baselines = [("Dijkstra", dijkstra_shortest_path(G, source, target, precomputed=False))]
+    if algorithm == "alt":
+        baselines.append(("A* haversine", astar_shortest_path(G, source, target)))
+    visited = " e ".join(f"{baseline.stats['settled']} ({name})" for name, baseline in baselines)
+    return (
+        f"Nós visitados: {result.stats['settled']} ({short_name}) vs {visited} de {len(G.nodes())}\n"
+        + format_speedup(result, baselines)
+    )
+
+# cliques no mapa: o primeiro marca a origem, o segundo o destino; um terceiro
+# clique começa uma nova rota
+@app.callback(
+    dash.Output("click-points", "data"),
+    dash.Input("graph", "clickData"),
+    dash.State("click-points", "data"),
+    prevent_initial_call=True
+)
+def store_click(click_data, points):
+    if not click_data or not click_data.get("points"):
+        return dash.no_update
+    point = click_data["points"][0]
+    points = points if points and len(points) < 2 else []
+    return points + [[point["lat"], point["lon"]]]
+
+# Texto da rota por coordenadas: a rota entre aeroportos e os trechos por terra
+def format_coordinate_route(points, result):
+    (source_lat, source_lon), (target_lat, target_lon) = points
+    return (
+        format_route("Rota por coordenadas (aeroportos mais próximos)", result) + "\n"
+        f"Origem: ({source_lat:.3f}, {source_lon:.3f}), {result.stats['access_km']:.2f} km até "
+        f"{G.nodes[result.path[0]]['name']}\n"
+        f"Destino: ({target_lat:.3f}, {target_lon:.3f}), {result.stats['egress_km']:.2f} km de "
+        f"{G.nodes[result.path[-1]]['name']}"
+    )
+
+# Texto das rotas Pareto-ótimas: uma linha por rota, de menos conexões para menor distância
+def format_pareto(routes):
+    lines = [f"Algoritmo: Pareto (conexões × distância) - {len(routes)} rotas não dominadas"]
+    for route in routes:
+        lines.append(
+            f"{route.connections} conexões, {route.total:.2f} km: "
+            f"{' → '.join(G.nodes[n]['name'] for n in route.path)}"
+        )
+    return "\n".join(lines)
+
+# Texto dos k caminhos mais curtos: uma linha por caminho, do mais curto ao mais longo
+def format_k_paths(routes):
+    lines = [f"Algoritmo: K Caminhos Mais Curtos (Yen) - {len(routes)} caminhos"]
+    for i, route in enumerate(routes, 1):
+        lines.append(
+            f"{i}. {route.total:.2f} km, {route.connections} conexões: "
+            f"{' → '.join(G.nodes[n]['name'] for n in route.path)}"
+        )
+    stats = routes[-1].stats
+    lines.append(f"Desvios: {stats['spur_searches']} buscas A*, {stats['tree_hits']} pela árvore do destino")
+    return "\n".join(lines)
 
 # callback principal 
 @app.callback(
     [dash.Output("graph", "figure"),
-     dash.Output("path_output", "children")],
+     dash.Output("path_output", "children"),
+     dash.Output("figure-version", "data")],
     [dash.Input("source", "value"),
      dash.Input("target", "value"),
-     dash.Input("algorithm", "value")]
+     dash.Input("algorithm", "value"),
+     dash.Input("click-points", "data"),
+     dash.Input("alt-landmarks", "value"),
+     dash.Input("k-paths", "value"),
+     dash.Input("compare", "value")],
+    [dash.State("figure-version", "data")]
 )
-def update_graph(source, target, algorithm):
+def update_graph(source, target, algorithm, click_points=None, landmarks=None, k_paths=None,
+                 compare=None, figure_version=None):
     mst_graph = None
+    alternatives = []
     
-    if algorithm == "kruskal":
+    # Se o navegador já tem a figura base da versão atual do grafo, envia só
+    # as sobreposições (Patch); senão envia a figura completa
+    version = graph_version(G)
+    render = patch_geo_graph if figure_version == version else plot_geo_graph
+    clicked = dash.ctx.triggered_id == "click-points" and bool(click_points)
+    
+    if clicked and algorithm != "kruskal":
+        # Rota a partir de coordenadas clicadas no mapa (índice espacial)
+        if len(click_points) == 1:
+            lat, lon = click_points[0]
+            nearest = nearest_airports(G, lat, lon, routed=True)
+            path = [nearest[0][0]] if nearest else []
+            path_text = (
+                f"Origem marcada em ({lat:.3f}, {lon:.3f})"
+                + (f", aeroporto mais próximo: {G.nodes[path[0]]['name']} ({nearest[0][1]:.2f} km)" if path else "")
+                + ".\nClique no mapa para marcar o destino."
+            )
+        else:
+            result = coordinate_route(G, *click_points[0], *click_points[1])
+            path = result.path
+            if result:
+                path_text = format_coordinate_route(click_points, result)
+            else:
+                path_text = "Não há rota entre os aeroportos próximos das coordenadas clicadas."
+        fig = render(G, path, "coordinates")
+
+    elif algorithm == "kruskal":
         # Para Kruskal, mostra toda a MST automaticamente
-        mst_graph, mst_weight = kruskal_full_mst(G)
+        mst = kruskal_full_mst(G)
+        mst_graph = mst.graph
         path_text = (
             f"Algoritmo: Kruskal (Árvore Geradora Mínima)\n"
-            f"Peso total da MST: {mst_weight:.2f} km\n"
-            f"Número total de arestas na MST: {len(mst_graph.edges())}\n"
+            f"Peso total da MST: {mst.total:.2f} km\n"
+            f"Número total de arestas na MST: {mst.num_edges}\n"
         )
         path = []
-        fig = plot_geo_graph(G, path, algorithm, mst_graph)
+        fig = render(G, path, algorithm, mst_graph)
         
     elif source and target:
-        # Para BFS e Dijkstra, executa algoritmos normais
-        if algorithm == "bfs":
-            path = bfs_shortest_path(G, source, target)
-            if path:
-                # BFS não calcula distância, vamos calcular manualmente
-                total_distance = 0
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i+1]
-                    total_distance += G[u][v].get('weight', 1)
-                path_text = (
-                    f"Algoritmo: BFS (Breadth-First Search)\n"
-                    f"Caminho: {' → '.join(G.nodes[n]['name'] for n in path)}\n"
-                    f"Número de conexões: {len(path) - 1}\n"
-                    f"Distância total: {total_distance:.2f} km"
-                )
+        # Para os algoritmos de caminho, executa a busca entre origem e destino
+        if algorithm == "pareto":
+            # Todas as rotas não dominadas em uma busca; o mapa mostra a mais curta
+            routes = pareto_routes(G, source, target)
+            path = routes[-1].path if routes else []
+            alternatives = [(route.path, f"{route.connections} conexões ({route.total:.0f} km)")
+                            for route in routes[-2::-1]]
+            if routes:
+                path_text = format_pareto(routes)
             else:
-                path_text = "BFS: Não há caminho entre os aeroportos selecionados."
-                
-        elif algorithm == "dijkstra":
-            path, distance = dijkstra_shortest_path(G, source, target)
-            if path:
-                path_text = (
-                    f"Algoritmo: Dijkstra (Caminho Mínimo)\n"
-                    f"Caminho: {' → '.join(G.nodes[n]['name'] for n in path)}\n"
-                    f"Custo mínimo: {distance:.2f} km"
-                )
+                path_text = "Pareto: Não há caminho entre os aeroportos selecionados."
+        elif algorithm == "yen":
+            # Caminho mais curto no traço principal, alternativas nas camadas fixas
+            routes = k_shortest_paths(G, source, target, k_paths or K_PATHS)
+            path = routes[0].path if routes else []
+            alternatives = [(route.path, f"Alternativa {i} ({route.total:.0f} km)")
+                            for i, route in enumerate(routes[1:], 2)]
+            if routes:
+                path_text = format_k_paths(routes)
             else:
-                path_text = "Dijkstra: Não há caminho entre os aeroportos selecionados."
+                path_text = "Yen: Não há caminho entre os aeroportos selecionados."
+        elif algorithm in route_algorithms:
+            title, short_name, search = route_algorithms[algorithm]
+            options = {"landmarks": landmarks or ALT_LANDMARKS} if algorithm == "alt" else {}
+            result = search(G, source, target, **options)
+            path = result.path
+            if result:
+                path_text = format_route(title, result)
+                if algorithm in ("dijkstra", "ch"):
+                    path_text += "\n" + format_search_stats(result)
+                elif algorithm in COMPARABLE_ALGORITHMS and compare:
+                    path_text += "\n" + format_comparison(algorithm, short_name, result, source, target)
+                elif algorithm in COMPARABLE_ALGORITHMS:
+                    path_text += "\n" + format_search_stats(result)
+                if algorithm == "alt":
+                    path_text += f"\nMarcos: {result.stats['landmarks']}"
+            else:
+                path_text = f"{short_name}: Não há caminho entre os aeroportos selecionados."
         else:
             path = []
             path_text = "Algoritmo não reconhecido."
             
-        fig = plot_geo_graph(G, path, algorithm)
+        fig = render(G, path, algorithm, alternatives=alternatives)
     else:
         path = []
         if algorithm == "kruskal":
@@ -221,10 +617,106 @@ def update_graph(source, target, algorithm):
             path_text = "Kruskal - MST será mostrada automaticamente."
         else:
             path_text = "Selecione dois aeroportos para encontrar o caminho."
-        fig = plot_geo_graph(G, path, algorithm)
+        fig = render(G, path, algorithm)
+    
+    return fig, path_text, version
+
+# A partir de quantas origens a matriz de distâncias usa um pool de processos
+MATRIX_POOL_THRESHOLD = 64
+# Maior matriz (origens x destinos) aceita em uma requisição, configurável por
+# MATRIX_MAX_CELLS: acima disso a resposta é 413
+MATRIX_MAX_CELLS = int(os.environ.get("MATRIX_MAX_CELLS", 250_000))
+
+# endpoint JSON da matriz de distâncias (muitas origens x muitos destinos)
+@app.server.route("/api/distance-matrix", methods=["GET", "POST"])
+def distance_matrix_endpoint():
+    """
+    Recebe `sources` e `targets` (listas de ids de aeroportos) no corpo JSON
+    (POST) ou como listas separadas por vírgula na query string (GET) e
+    devolve a matriz de distâncias em km; null onde não há caminho. Matrizes
+    com mais de MATRIX_MAX_CELLS células são recusadas (413).
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        body = body if isinstance(body, dict) else {}
+        sources, targets = body.get("sources"), body.get("targets")
+    else:
+        sources = [s for s in request.args.get("sources", "").split(",") if s.strip()]
+        targets = [t for t in request.args.get("targets", "").split(",") if t.strip()]
+    try:
+        if not isinstance(sources, list) or not isinstance(targets, list):
+            raise TypeError
+        # bool é subclasse de int, mas true/false não são ids
+        if any(isinstance(x, (bool, float)) for x in sources + targets):
+            raise TypeError
+        sources = [int(s) for s in sources]
+        targets = [int(t) for t in targets]
+    except (TypeError, ValueError):
+        return jsonify({"error": "sources e targets devem ser listas de ids de aeroportos"}), 400
+    if len(sources) * len(targets) > MATRIX_MAX_CELLS:
+        return jsonify({"error": f"matriz maior que o limite de {MATRIX_MAX_CELLS} células"}), 413
     
-    return fig, path_text
+    processes = os.cpu_count() if len(sources) >= MATRIX_POOL_THRESHOLD else None
+    matrix = distance_matrix(G, sources, targets, processes=processes)
+    distances = [[None if math.isinf(d) else round(d, 2) for d in row] for row in matrix.tolist()]
+    return jsonify({"sources": sources, "targets": targets, "distances": distances})
+
+# endpoint JSON com os contadores do cache de rotas (acertos, falhas, tamanho...)
+@app.server.route("/api/route-cache", methods=["GET"])
+def route_cache_endpoint():
+    return jsonify(route_cache.stats())
+
+# Token exigido (Authorization: Bearer <token>) para alterar as rotas pela
+# API; sem ROUTE_UPDATE_TOKEN definido o endpoint fica desativado
+ROUTE_UPDATE_TOKEN = os.environ.get("ROUTE_UPDATE_TOKEN")
+
+# alterações de rotas gravadas por outros processos da aplicação são aplicadas
+# antes de cada requisição
+@app.server.before_request
+def sync_routes():
+    sync_route_updates()
+
+# endpoint JSON para alterar o grafo em uso: abrir, fechar ou mudar o peso de rotas
+@app.server.route("/api/routes", methods=["POST", "PUT", "DELETE"])
+def routes_endpoint():
+    """
+    Corpo JSON com `source`, `target` (ids de aeroportos) e, no POST/PUT,
+    `weight` opcional em km (padrão: distância haversine). POST abre a rota
+    (ou muda o peso, se já existir), PUT muda o peso e DELETE fecha a rota.
+    Exige o cabeçalho Authorization: Bearer <ROUTE_UPDATE_TOKEN>. A
+    alteração vale para todos os processos da aplicação (graph.publish_route_update);
+    a resposta traz a nova versão do grafo e o número de rotas.
+    """
+    if not ROUTE_UPDATE_TOKEN:
+        return jsonify({"error": "alteração de rotas desativada (defina ROUTE_UPDATE_TOKEN)"}), 403
+    expected = f"Bearer {ROUTE_UPDATE_TOKEN}".encode()
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected):
+        return jsonify({"error": "token inválido"}), 401
+
+    body = request.get_json(silent=True) or {}
+    try:
+        source, target = int(body["source"]), int(body["target"])
+        weight = body.get("weight")
+        weight = float(weight) if weight is not None else None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "source e target devem ser ids de aeroportos e weight um número"}), 400
+    if weight is not None and not (weight >= 0 and math.isfinite(weight)):
+        return jsonify({"error": "weight deve ser um número não negativo"}), 400
+    if request.method == "PUT" and weight is None:
+        return jsonify({"error": "PUT precisa de weight"}), 400
+
+    op = {"DELETE": "remove", "PUT": "set"}.get(request.method, "add")
+    try:
+        csr = publish_route_update(op, source, target, None if op == "remove" else weight)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"version": csr.fingerprint(), "routes": csr.num_edges})
 
 # roda app
 if __name__ == "__main__":
+    # LOG_LEVEL=DEBUG mostra o rastreamento detalhado das rotas
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
     app.run(debug=True)
@@ -0,0 +1,127 @@
+import numpy as np
+from binary_file import header_dtype, section_offsets, write_sections, read_header
+
+# Cabeçalho do arquivo da tabela (ver binary_file): número de nós do grafo e
+# número de nós com rotas (dimensão das matrizes)
+APSP_MAGIC = b'APSP'
+APSP_FORMAT_VERSION = 1
+HEADER_DTYPE = header_dtype(('num_nodes', '<u8'), ('size', '<u8'))
+
+
+class AllPairsTable:
+    """
+    Tabela densa de caminhos mínimos entre todos os pares de aeroportos.
+
+    `dist[i, j]` é a distância mínima e `next_hop[i, j]` o próximo nó depois
+    de i no caminho mínimo até j. Só entram nas matrizes os nós com pelo menos
+    uma rota; `slot[v]` dá a linha/coluna do nó v (ou -1 se isolado). Assim
+    uma consulta vira uma sequência de consultas em `next_hop`, O(tamanho do
+    caminho).
+    """
+
+    def __init__(self, slot, dist, next_hop):
+        self.slot = np.asarray(slot, dtype=np.int32)
+        self.dist = dist
+        self.next_hop = next_hop
+        # Slot -> índice do nó no grafo
+        self.nodes = np.flatnonzero(self.slot >= 0)
+
+    @classmethod
+    def build(cls, csr):
+        """
+        Calcula as matrizes com Floyd–Warshall vetorizado em NumPy: um único
+        laço Python sobre o nó intermediário k, e cada passo atualiza a matriz
+        inteira de uma vez.
+        """
+        degree = np.diff(csr.indptr)
+        nodes = np.flatnonzero(degree > 0)
+        m = len(nodes)
+        slot = np.full(len(csr), -1, dtype=np.int32)
+        slot[nodes] = np.arange(m, dtype=np.int32)
+
+        # Matrizes iniciais: arestas diretas (menor peso se houver repetição)
+        dist = np.full((m, m), np.inf)
+        next_hop = np.full((m, m), -1, dtype=np.int32)
+        u, v = slot[csr.edge_u], slot[csr.edge_v]
+        for a, b in ((u, v), (v, u)):
+            np.minimum.at(dist, (a, b), csr.edge_w)
+        reachable = np.isfinite(dist)
+        next_hop[reachable] = np.broadcast_to(np.arange(m, dtype=np.int32), (m, m))[reachable]
+        np.fill_diagonal(dist, 0)
+        np.fill_diagonal(next_hop, np.arange(m, dtype=np.int32))
+
+        # Buffers reaproveitados em todas as iterações
+        candidate = np.empty_like(dist)
+        better = np.empty((m, m), dtype=bool)
+        for k in range(m):
+            np.add(dist[:, k:k + 1], dist[k], out=candidate)
+            np.less(candidate, dist, out=better)
+            np.copyto(dist, candidate, where=better)
+            np.copyto(next_hop, next_hop[:, k:k + 1], where=better)
+
+        return cls(slot, dist, next_hop)
+
+    def save(self, path, fingerprint):
+        """
+        Grava cabeçalho, slot, dist e next_hop em um único arquivo binário,
+        com cada seção alinhada para poder ser mapeada direto em memória.
+        """
+        m = len(self.nodes)
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = APSP_MAGIC
+        header['version'] = APSP_FORMAT_VERSION
+        header['num_nodes'] = len(self.slot)
+        header['size'] = m
+        header['fingerprint'] = fingerprint.encode()
+
+        write_sections(path, header, _section_offsets(len(self.slot), m),
+                       (self.slot, self.dist, self.next_hop))
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Mapeia a tabela de `path` em memória (somente leitura). Retorna None se
+        o arquivo não existir, for de outra versão ou de outro grafo.
+        """
+        header = read_header(path, HEADER_DTYPE, APSP_MAGIC, APSP_FORMAT_VERSION, fingerprint)
+        if header is None:
+            return None
+        n, m = int(header['num_nodes']), int(header['size'])
+        slot_offset, dist_offset, next_offset = _section_offsets(n, m)
+        slot = np.fromfile(path, dtype=np.int32, count=n, offset=slot_offset)
+        dist = np.memmap(path, dtype=np.float64, mode='r', offset=dist_offset, shape=(m, m))
+        next_hop = np.memmap(path, dtype=np.int32, mode='r', offset=next_offset, shape=(m, m))
+        return cls(slot, dist, next_hop)
+
+    def distances(self, sources, targets):
+        """
+        Submatriz de distâncias entre as listas de índices `sources` e
+        `targets` (np.inf para nós isolados ou sem caminho).
+        """
+        a, b = self.slot[sources], self.slot[targets]
+        values = np.full((len(a), len(b)), np.inf)
+        rows, cols = np.flatnonzero(a >= 0), np.flatnonzero(b >= 0)
+        values[np.ix_(rows, cols)] = self.dist[np.ix_(a[rows], b[cols])]
+        # Distância de um nó para ele mesmo é 0, mesmo se isolado
+        values[np.equal.outer(np.asarray(sources), np.asarray(targets))] = 0
+        return values
+
+    def path(self, s, t):
+        """
+        Caminho mínimo (índices internos) entre s e t, ou [] se não houver.
+        """
+        if s == t:
+            return [s]
+        a, b = self.slot[s], self.slot[t]
+        if a < 0 or b < 0 or not np.isfinite(self.dist[a, b]):
+            return []
+        path = [s]
+        while a != b:
+            a = self.next_hop[a, b]
+            path.append(self.nodes[a].item())
+        return path
+
+
+def _section_offsets(num_nodes, size):
+    """Offsets (em bytes) das seções slot, dist e next_hop no arquivo."""
+    return section_offsets(HEADER_DTYPE, (4 * num_nodes, 8 * size * size, 4 * size * size))
@@ -0,0 +1,238 @@
+import atexit
+import heapq
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+from csr_graph import as_csr
+
+
+class SharedCSR:
+    """
+    Copia os vetores CSR (indptr, indices, weights) para blocos de
+    multiprocessing.shared_memory. Os processos do pool recebem só os nomes
+    dos blocos (`spec`) e enxergam os mesmos bytes, sem cada um receber a sua
+    cópia do grafo.
+    """
+
+    def __init__(self, csr):
+        self.num_nodes = len(csr)
+        self.blocks = []
+        self.spec = []
+        for array, fmt in ((csr.indptr, 'q'), (csr.indices, 'q'), (csr.weights, 'd')):
+            array = np.ascontiguousarray(array, dtype=np.int64 if fmt == 'q' else np.float64)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 8))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.spec.append((block.name, fmt, len(array)))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _SharedView:
+    """
+    Visão do CSR dentro de um processo do pool: memoryviews sobre a memória
+    compartilhada. Indexar um memoryview devolve int/float Python tão rápido
+    quanto uma lista, sem copiar nada.
+    """
+
+    def __init__(self, spec, num_nodes):
+        self.blocks = []
+        views = []
+        for name, fmt, length in spec:
+            # Só anexa; quem cria e remove (unlink) os blocos é o processo principal
+            block = shared_memory.SharedMemory(name=name)
+            self.blocks.append(block)
+            views.append(block.buf.cast(fmt)[:length])
+        self._indptr, self._indices, self._weights = views
+        self.num_nodes = num_nodes
+
+    def __len__(self):
+        return self.num_nodes
+
+
+# Visão do grafo no processo do pool (definida pelo initializer)
+_view = None
+
+
+def _init_worker(spec, num_nodes):
+    global _view
+    _view = _SharedView(spec, num_nodes)
+
+
+def _dijkstra(view, s, targets=None):
+    """
+    Dijkstra de uma origem sobre os vetores CSR de `view`. Sem `targets`
+    calcula a árvore inteira; com `targets` (conjunto de índices) para quando
+    todos forem alcançados. Retorna as listas dist e parent.
+    """
+    indptr, indices, weights = view._indptr, view._indices, view._weights
+    inf = float('inf')
+    dist = [inf] * len(view)
+    parent = [-1] * len(view)
+    dist[s] = 0
+    heap = [(0, s)]
+    remaining = len(targets) if targets is not None else -1
+
+    while heap:
+        current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        if remaining > 0 and u in targets:
+            remaining -= 1
+            if remaining == 0:
+                break
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = current_dist + weights[e]
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parent[v] = u
+                heapq.heappush(heap, (new_dist, v))
+    return dist, parent
+
+
+def _tree_task(sources):
+    """Árvores de caminhos mínimos para um bloco de origens (no processo do pool)."""
+    results = []
+    for s in sources:
+        dist, parent = _dijkstra(_view, s)
+        results.append((s, np.array(dist, dtype=np.float64), np.array(parent, dtype=np.int32)))
+    return results
+
+
+def _rows_task(sources, target_idx):
+    """Linhas de distâncias até `target_idx` para um bloco de origens."""
+    targets = set(target_idx)
+    rows = np.empty((len(sources), len(target_idx)))
+    for row, s in enumerate(sources):
+        dist = _dijkstra(_view, s, targets)[0]
+        rows[row] = [dist[t] for t in target_idx]
+    return sources, rows
+
+
+def _chunks(items, chunk_size):
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+class GraphPool:
+    """
+    ProcessPoolExecutor de longa duração com o grafo em memória compartilhada.
+    Os processos anexam os blocos uma única vez (no initializer) e atendem a
+    todas as chamadas seguintes: o pool e os blocos só são recriados quando o
+    grafo (fingerprint) ou o número de processos muda. O envio das tarefas é
+    feito com o lock, então o pool nunca é trocado no meio de um envio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._shared = None
+        self._key = None
+        # Threads que esperam pools antigos terminarem (ver _close)
+        self._retiring = []
+
+    def submit(self, csr, processes, fn, chunks, *args):
+        """Envia fn(chunk, *args) para cada bloco e retorna os futures."""
+        key = (csr.fingerprint(), processes)
+        with self._lock:
+            for attempt in range(2):
+                if key != self._key:
+                    self._close()
+                    self._shared = SharedCSR(csr)
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=processes, initializer=_init_worker,
+                        initargs=(self._shared.spec, self._shared.num_nodes))
+                    self._key = key
+                try:
+                    return [self._pool.submit(fn, chunk, *args) for chunk in chunks]
+                except BrokenProcessPool:
+                    # Algum processo morreu: recria o pool e tenta de novo
+                    if attempt:
+                        raise
+                    self._key = None
+
+    def _close(self):
+        if self._pool is not None:
+            # Os blocos só são removidos (unlink) depois que o pool antigo
+            # termina as tarefas já enviadas: o executor cria processos sob
+            # demanda, e um processo que ainda não rodou _init_worker não
+            # acharia os blocos pelo nome. A espera fica em uma thread, para
+            # não segurar o lock (e as consultas do grafo novo) enquanto isso
+            retiring = threading.Thread(target=_retire, args=(self._pool, self._shared), daemon=True)
+            retiring.start()
+            self._retiring = [t for t in self._retiring if t.is_alive()] + [retiring]
+        self._pool = self._shared = self._key = None
+
+    def close(self):
+        """Fecha o pool atual e espera os antigos terminarem de sair."""
+        with self._lock:
+            self._close()
+            retiring, self._retiring = self._retiring, []
+        for thread in retiring:
+            thread.join()
+
+
+def _retire(pool, shared):
+    """Espera o pool terminar as tarefas enviadas e só então remove os blocos."""
+    pool.shutdown(wait=True)
+    shared.close()
+
+
+# Pool compartilhado por shortest_path_trees e parallel_distance_rows
+_pool = GraphPool()
+atexit.register(_pool.close)
+
+
+def shortest_path_trees(graph, sources, processes=None, chunk_size=8):
+    """
+    Calcula a árvore de caminhos mínimos de cada aeroporto em `sources`
+    distribuindo as origens no pool de processos do módulo (GraphPool), que
+    acessa o grafo por memória compartilhada.
+
+    É um gerador: à medida que cada bloco termina, produz tuplas
+    (id da origem, dist, parent), com dist (float64, km, np.inf se
+    inalcançável) e parent (int32, índice interno do pai, -1 na raiz e nos
+    inalcançáveis) indexados pelo índice interno do nó (csr.ids dá o id).
+    """
+    csr = as_csr(graph)
+    source_idx = [csr.index[source] for source in sources if source in csr]
+    if not source_idx:
+        return
+    processes = processes or os.cpu_count()
+
+    futures = _pool.submit(csr, processes, _tree_task, _chunks(source_idx, chunk_size))
+    for future in as_completed(futures):
+        for s, dist, parent in future.result():
+            yield csr.node_id(s), dist, parent
+
+
+def parallel_distance_rows(csr, source_idx, target_idx, processes, chunk_size=8):
+    """
+    Matriz (len(source_idx) x len(target_idx)) de distâncias calculada no
+    pool de processos do módulo, com o grafo em memória compartilhada.
+    """
+    matrix = np.empty((len(source_idx), len(target_idx)))
+    position = {s: i for i, s in enumerate(source_idx)}
+    futures = _pool.submit(csr, processes, _rows_task,
+                           _chunks(list(dict.fromkeys(source_idx)), chunk_size), target_idx)
+    for future in as_completed(futures):
+        sources, rows = future.result()
+        for s, row in zip(sources, rows):
+            matrix[position[s]] = row
+    # Origens repetidas recebem a mesma linha
+    for i, s in enumerate(source_idx):
+        matrix[i] = matrix[position[s]]
+    return matrix
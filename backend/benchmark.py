@@ -0,0 +1,360 @@
+"""
+Benchmark dos algoritmos de grafos em conjuntos de dados de tamanhos
+diferentes: o subconjunto do Brasil (CSVs processados), o grafo mundial
+completo (airports.dat/routes.dat) e grafos geométricos aleatórios
+sintéticos de 10 mil a 1 milhão de nós.
+
+Para cada algoritmo e conjunto de dados mede a latência (p50/p99), a vazão
+(consultas por segundo) e o pico de memória alocada (tracemalloc), e grava
+tudo em JSON para comparar resultados entre commits. Também compara os
+motores de MST (Kruskal, Prim, Borůvka) e as atualizações dinâmicas do grafo
+(reparo incremental da MST e das árvores de caminhos mínimos) com a
+reconstrução completa.
+
+Uso (a partir da raiz do projeto, depois de processar os dados):
+    python backend/benchmark.py
+    python backend/benchmark.py --datasets brazil,world --queries 500
+    python backend/benchmark.py --datasets synthetic --sizes 10000,100000
+    python backend/benchmark.py --compare data/benchmark_<commit>.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from csr_graph import CSRGraph
+from geo import haversine_km
+from mst import MSTIndex, MST_ENGINES
+from dynamic import ShortestPathTree, apply_update, with_edge
+from graph import (bfs_shortest_path, dijkstra_shortest_path, alt_shortest_path, ch_shortest_path,
+                   kruskal_mst_path, kruskal_full_mst, data_dir, airports_file, routes_file)
+
+# Algoritmos de consulta (origem, destino) medidos em cada conjunto de dados,
+# sem o cache de rotas (senão pares repetidos mediriam só o cache)
+QUERY_ALGORITHMS = {
+    "bfs": bfs_shortest_path.__wrapped__,
+    # Busca de verdade, mesmo se o grafo tiver tabela ou árvore pré-calculada
+    "dijkstra": functools.partial(dijkstra_shortest_path.__wrapped__, precomputed=False),
+    "alt": alt_shortest_path.__wrapped__,
+    "ch": ch_shortest_path.__wrapped__,
+    "kruskal_path": kruskal_mst_path.__wrapped__,
+}
+# A hierarquia CH é construída no aquecimento (fora da medição), mas a
+# construção cresce rápido com o tamanho do grafo: só entra até este número de nós
+CH_MAX_NODES = 20_000
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Grau médio dos grafos sintéticos
+SYNTHETIC_DEGREE = 8
+# Quantas execuções entram na medição de memória (tracemalloc deixa tudo lento)
+MEMORY_RUNS = 5
+# Árvores de caminhos mínimos mantidas durante o benchmark de atualizações
+UPDATE_TREES = 4
+
+
+# Grafo mundial: todos os aeroportos e rotas, sem filtro de região
+def load_world_graph():
+    """
+    Monta o CSRGraph com todos os aeroportos de airports.dat e todas as rotas
+    de routes.dat entre aeroportos conhecidos, usando a ingestão em uma
+    passada do processamento de dados (sem gravar os CSVs).
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(data_dir), "data_processing"))
+    from csv_cleaning_Brazil import ingest
+    return CSRGraph.from_dataframes(*ingest(None, data_dir, write=False))
+
+
+# Grafo geométrico aleatório na esfera
+def random_geometric_graph(n, degree=SYNTHETIC_DEGREE, seed=0):
+    """
+    Sorteia n pontos uniformes na superfície da Terra e liga cada par a menos
+    de um raio escolhido para dar `degree` vizinhos em média; o peso é a
+    distância haversine. Os pares próximos saem de uma grade 3D sobre os
+    vetores unitários (cada ponto só é comparado com as 27 células vizinhas),
+    tudo vetorizado em NumPy.
+    """
+    rng = np.random.default_rng(seed)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    lon = rng.uniform(-180, 180, n)
+    phi, lam = np.radians(lat), np.radians(lon)
+    xyz = np.column_stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+    # Calota com área proporcional ao grau desejado -> corda máxima
+    cos_theta = max(1 - 2 * degree / max(n - 1, 1), -1.0)
+    chord = np.sqrt(2 * (1 - cos_theta))
+
+    # Chave da célula de cada ponto; pontos ordenados por célula
+    cells = np.floor(xyz / chord).astype(np.int64)
+    offset = int(np.ceil(1 / chord)) + 2
+    width = 2 * offset + 1
+    def cell_key(c):
+        return ((c[:, 0] + offset) * width + (c[:, 1] + offset)) * width + (c[:, 2] + offset)
+    keys = cell_key(cells)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    edge_u, edge_v = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                neighbor = cell_key(cells + np.array([dx, dy, dz]))
+                lo = np.searchsorted(sorted_keys, neighbor, side='left')
+                hi = np.searchsorted(sorted_keys, neighbor, side='right')
+                counts = hi - lo
+                u = np.repeat(np.arange(n), counts)
+                starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                v = order[starts + np.arange(len(u))]
+                keep = (u < v) & (np.einsum('ij,ij->i', xyz[u], xyz[v]) >= cos_theta)
+                edge_u.append(u[keep])
+                edge_v.append(v[keep])
+    edge_u, edge_v = np.concatenate(edge_u), np.concatenate(edge_v)
+    edge_w = np.round(haversine_km(lat[edge_u], lon[edge_u], lat[edge_v], lon[edge_v]), 2)
+    names = [f"Synthetic {i}" for i in range(n)]
+    return CSRGraph(np.arange(n), names, lat, lon, edge_u, edge_v, edge_w)
+
+
+def load_datasets(names, sizes, seed):
+    """Gera (nome, CSRGraph) para cada conjunto de dados pedido."""
+    for name in names:
+        if name == "brazil":
+            yield name, CSRGraph.from_dataframes(pd.read_csv(airports_file), pd.read_csv(routes_file))
+        elif name == "world":
+            yield name, load_world_graph()
+        elif name == "synthetic":
+            for n in sizes:
+                yield f"synthetic-{n}", random_geometric_graph(n, seed=seed)
+        else:
+            raise ValueError(f"Conjunto de dados desconhecido: {name}")
+
+
+def query_pairs(csr, count, seed):
+    """Pares (origem, destino) de ids sorteados entre os nós com rotas."""
+    rng = np.random.default_rng(seed)
+    nodes = csr.ids[np.diff(csr.indptr) > 0]
+    if len(nodes) < 2:
+        return []
+    return [tuple(rng.choice(nodes, 2, replace=False).tolist()) for _ in range(count)]
+
+
+def measure(run, calls, max_seconds):
+    """
+    Executa `run(call)` para cada item de `calls` até acabar a lista ou o
+    tempo `max_seconds` (pelo menos uma execução). Retorna as latências em
+    segundos e o pico de memória (MB) de algumas execuções extras com
+    tracemalloc.
+    """
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+    for call in calls:
+        start = time.perf_counter()
+        run(call)
+        latencies.append(time.perf_counter() - start)
+        if start > deadline:
+            break
+
+    tracemalloc.start()
+    for call in calls[:MEMORY_RUNS]:
+        run(call)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, peak / 2**20
+
+
+def summarize(dataset, csr, algorithm, latencies, peak_mb):
+    latencies = np.asarray(latencies)
+    return {
+        "dataset": dataset,
+        "nodes": len(csr),
+        "edges": csr.num_edges,
+        "algorithm": algorithm,
+        "runs": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1e3),
+        "p99_ms": float(np.percentile(latencies, 99) * 1e3),
+        "mean_ms": float(latencies.mean() * 1e3),
+        "throughput_per_s": float(len(latencies) / latencies.sum()) if latencies.sum() > 0 else float('inf'),
+        "peak_memory_mb": round(peak_mb, 3),
+    }
+
+
+def benchmark_graph(dataset, csr, queries, repeat, max_seconds, seed):
+    """Mede todos os algoritmos em um grafo; retorna a lista de resultados."""
+    results = []
+
+    # MST completa: o cache do CSR é limpo antes de cada execução para medir
+    # o Kruskal de verdade, não a leitura do cache
+    def full_mst(_):
+        csr.cache.pop('mst', None)
+        kruskal_full_mst(csr)
+    latencies, peak = measure(full_mst, list(range(repeat)), max_seconds)
+    results.append(summarize(dataset, csr, "kruskal_full", latencies, peak))
+
+    # Só o cálculo das arestas da MST, em cada motor
+    for engine, build in MST_ENGINES.items():
+        latencies, peak = measure(lambda _: build(csr), list(range(repeat)), max_seconds)
+        results.append(summarize(dataset, csr, f"mst_{engine}", latencies, peak))
+
+    pairs = query_pairs(csr, queries, seed)
+    if not pairs:
+        return results
+    for algorithm, search in QUERY_ALGORITHMS.items():
+        if algorithm == "ch" and len(csr) > CH_MAX_NODES:
+            continue
+        # Aquecimento: estruturas pré-calculadas (índice da MST, hierarquia CH) ficam de fora
+        search(csr, *pairs[0])
+        latencies, peak = measure(lambda pair: search(csr, *pair), pairs, max_seconds)
+        results.append(summarize(dataset, csr, algorithm, latencies, peak))
+    return results
+
+
+# Atualizações dinâmicas: reparo incremental vs reconstrução completa
+def random_update(csr, rng):
+    """
+    Sorteia uma alteração (u, v, peso) sobre o grafo atual: fecha uma rota,
+    muda o peso de uma rota (entre metade e o dobro) ou abre uma rota nova
+    com a distância haversine.
+    """
+    op = rng.integers(3)
+    if op < 2 and csr.num_edges:
+        e = int(rng.integers(csr.num_edges))
+        u, v = int(csr.edge_u[e]), int(csr.edge_v[e])
+        return u, v, None if op == 0 else float(csr.edge_w[e] * rng.uniform(0.5, 2.0))
+    u, v = rng.choice(len(csr), 2, replace=False).tolist()
+    return u, v, round(float(haversine_km(csr.lat[u], csr.lon[u], csr.lat[v], csr.lon[v])), 2)
+
+
+def benchmark_updates(dataset, csr, updates, max_seconds, seed):
+    """
+    Aplica a mesma sequência de `updates` alterações de arestas de duas
+    formas, mantendo a MST e UPDATE_TREES árvores de caminhos mínimos: com
+    dynamic.apply_update (reparo incremental) e reconstruindo o CSR, a MST e
+    as árvores do zero a cada alteração.
+    """
+    results = []
+    sources = np.random.default_rng(seed).choice(len(csr), min(UPDATE_TREES, len(csr)), replace=False).tolist()
+
+    def incremental():
+        state = {'csr': CSRGraph(csr.ids, csr.names, csr.lat, csr.lon, csr.edge_u, csr.edge_v, csr.edge_w)}
+        state['csr'].cache['mst'] = MSTIndex.build(state['csr'])
+        state['csr'].cache['spt'] = {s: ShortestPathTree.build(state['csr'], s) for s in sources}
+        def run(rng):
+            state['csr'], _ = apply_update(state['csr'], *random_update(state['csr'], rng))
+        return run
+
+    def rebuild():
+        state = {'csr': csr}
+        def run(rng):
+            new_csr, _ = with_edge(state['csr'], *random_update(state['csr'], rng))
+            MSTIndex.build(new_csr)
+            for s in sources:
+                ShortestPathTree.build(new_csr, s)
+            state['csr'] = new_csr
+        return run
+
+    for name, make in (("update_incremental", incremental), ("update_rebuild", rebuild)):
+        run, rng = make(), np.random.default_rng(seed)
+        latencies, peak = measure(lambda _: run(rng), list(range(updates)), max_seconds)
+        results.append(summarize(dataset, csr, name, latencies, peak))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(data_dir)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results, baseline=None):
+    """Tabela legível; com `baseline`, mostra a razão p50 atual / anterior."""
+    previous = {(r["dataset"], r["algorithm"]): r for r in (baseline or [])}
+    header = f"{'dataset':<18}{'algoritmo':<20}{'nós':>9}{'execuções':>10}{'p50 ms':>11}{'p99 ms':>11}{'por s':>11}{'pico MB':>10}"
+    if baseline is not None:
+        header += f"{'p50 vs base':>13}"
+    print(header)
+    for r in results:
+        line = (f"{r['dataset']:<18}{r['algorithm']:<20}{r['nodes']:>9}{r['runs']:>10}"
+                f"{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['throughput_per_s']:>11.1f}{r['peak_memory_mb']:>10.2f}")
+        old = previous.get((r["dataset"], r["algorithm"]))
+        if old and old["p50_ms"] > 0:
+            line += f"{r['p50_ms'] / old['p50_ms']:>12.2f}x"
+        print(line)
+
+
+def print_mst_winners(results):
+    """Motor de MST mais rápido (menor p50) em cada conjunto de dados."""
+    best = {}
+    for r in results:
+        if r["algorithm"].startswith("mst_"):
+            current = best.get(r["dataset"])
+            if current is None or r["p50_ms"] < current["p50_ms"]:
+                best[r["dataset"]] = r
+    for dataset, r in best.items():
+        print(f"MST mais rápida em {dataset} ({r['nodes']} nós): {r['algorithm'][4:]} ({r['p50_ms']:.3f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos algoritmos de grafos")
+    parser.add_argument("--datasets", default="brazil,world,synthetic",
+                        help="lista separada por vírgula: brazil, world, synthetic")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="números de nós dos grafos sintéticos")
+    parser.add_argument("--queries", type=int, default=200, help="consultas por algoritmo")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções da MST completa")
+    parser.add_argument("--updates", type=int, default=50,
+                        help="alterações de arestas no benchmark de atualizações dinâmicas (0 desliga)")
+    parser.add_argument("--max-seconds", type=float, default=30.0,
+                        help="tempo máximo de medição por algoritmo e conjunto de dados")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="arquivo JSON (padrão: data/benchmark_<commit>.json)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    datasets = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results = []
+    for dataset, csr in load_datasets(datasets, sizes, args.seed):
+        print(f"{dataset}: {len(csr)} nós, {csr.num_edges} arestas", file=sys.stderr)
+        results.extend(benchmark_graph(dataset, csr, args.queries, args.repeat,
+                                       args.max_seconds, args.seed))
+        if args.updates > 0:
+            results.extend(benchmark_updates(dataset, csr, args.updates, args.max_seconds, args.seed))
+
+    report = {
+        "metadata": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "queries": args.queries,
+            "updates": args.updates,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(data_dir, f"benchmark_{commit}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+    print()
+    print_mst_winners(results)
+    print(f"\nResultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+# Seções alinhadas em 64 bytes para o memmap dos vetores
+ALIGNMENT = 64
+
+
+def header_dtype(*fields):
+    """
+    Cabeçalho dos arquivos binários pré-processados: assinatura (4 bytes),
+    versão do formato, os campos próprios de cada formato (`fields`, pares
+    nome/tipo do NumPy) e a impressão digital do grafo (sha1 em hex, 40 bytes).
+    """
+    return np.dtype([
+        ('magic', 'S4'),
+        ('version', '<u4'),
+        *fields,
+        ('fingerprint', 'S40'),
+    ])
+
+
+def align(offset):
+    """Próximo múltiplo de ALIGNMENT a partir de `offset`."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def section_offsets(dtype, sizes):
+    """
+    Offsets (em bytes) das seções que seguem o cabeçalho `dtype`, dados os
+    tamanhos (em bytes) de cada uma, na ordem do arquivo.
+    """
+    offsets = []
+    position = dtype.itemsize
+    for size in sizes:
+        position = align(position)
+        offsets.append(position)
+        position += size
+    return offsets
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Arquivo binário aberto para escrita que só substitui `path` no final, com
+    os.replace: ele é gravado em um temporário no mesmo diretório, e quem lê
+    `path` ao mesmo tempo (outro processo subindo, os estágios do pipeline)
+    vê o arquivo antigo inteiro ou o novo inteiro, nunca um pela metade. Se a
+    escrita falhar, o temporário é apagado e `path` fica como estava.
+    """
+    # Um temporário por processo e thread: escritores simultâneos não se misturam
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_sections(path, header, offsets, arrays):
+    """Grava o cabeçalho e cada vetor de `arrays` no seu offset (ver atomic_write)."""
+    with atomic_write(path) as f:
+        f.write(header.tobytes())
+        for offset, array in zip(offsets, arrays):
+            f.seek(offset)
+            f.write(np.ascontiguousarray(array).tobytes())
+
+
+def read_header(path, dtype, magic, version, fingerprint):
+    """
+    Cabeçalho (registro de `dtype`) do arquivo `path`, ou None se o arquivo
+    não existir ou for de outro formato, de outra versão ou de outro grafo.
+    """
+    if not os.path.exists(path):
+        return None
+    header = np.fromfile(path, dtype=dtype, count=1)
+    if (len(header) == 0 or header['magic'][0] != magic
+            or header['version'][0] != version
+            or header['fingerprint'][0].decode() != fingerprint):
+        return None
+    return header[0]
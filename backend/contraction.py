@@ -0,0 +1,273 @@
+import heapq
+import os
+import numpy as np
+from binary_file import atomic_write
+
+# Versão do formato do arquivo .npz da hierarquia
+CH_FORMAT_VERSION = 1
+
+# Limite de nós visitados em cada busca de testemunha. Se o limite estoura
+# sem achar um caminho alternativo, o atalho é criado (nunca perde correção,
+# no máximo sobra um atalho desnecessário).
+WITNESS_SETTLE_LIMIT = 50
+
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchies (CH) sobre um CSRGraph não-direcionado.
+
+    Pré-processamento: os nós são contraídos um a um, na ordem dada por uma
+    fila de prioridade (diferença de arestas + vizinhos já contraídos). Ao
+    contrair v, para cada par de vizinhos (u, w) ainda não contraídos cria-se
+    o atalho u-w (peso d(u,v) + d(v,w), nó do meio v) se não houver caminho
+    testemunha sem passar por v de custo menor ou igual.
+
+    O resultado é o grafo "para cima": para cada nó, só as arestas (originais
+    ou atalhos) que levam a nós de rank maior, guardadas em vetores CSR
+    (up_indptr, up_indices, up_weights, up_middle). A consulta é um Dijkstra
+    bidirecional que só sobe na hierarquia; os atalhos são desempacotados de
+    volta em arestas reais pelo nó do meio.
+    """
+
+    def __init__(self, rank, up_indptr, up_indices, up_weights, up_middle):
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.up_indptr = np.asarray(up_indptr, dtype=np.int64)
+        self.up_indices = np.asarray(up_indices, dtype=np.int64)
+        self.up_weights = np.asarray(up_weights, dtype=np.float64)
+        self.up_middle = np.asarray(up_middle, dtype=np.int64)
+
+        # Listas Python para o laço da consulta
+        self._indptr = self.up_indptr.tolist()
+        self._indices = self.up_indices.tolist()
+        self._weights = self.up_weights.tolist()
+
+        # (nó de rank menor, nó de rank maior) -> (nó do meio (-1 = aresta
+        # real), peso), para desempacotar o caminho já com o peso de cada trecho
+        middle = self.up_middle.tolist()
+        self._arcs = {}
+        for u in range(len(self.rank)):
+            for e in range(self._indptr[u], self._indptr[u + 1]):
+                self._arcs[(u, self._indices[e])] = (middle[e], self._weights[e])
+
+    @property
+    def num_shortcuts(self):
+        return int((self.up_middle >= 0).sum())
+
+    @classmethod
+    def build(cls, csr):
+        """
+        Contrai todos os nós de `csr` e monta a hierarquia.
+        """
+        n = len(csr)
+        indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+
+        # Grafo restante (ainda não contraído): adj[u][v] = (peso, nó do meio)
+        adj = [dict() for _ in range(n)]
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                v, w = indices[e], weights[e]
+                if v != u and (v not in adj[u] or w < adj[u][v][0]):
+                    adj[u][v] = (w, -1)
+
+        contracted_neighbors = [0] * n
+        rank = [-1] * n
+        up_edges = [None] * n
+
+        def priority(v, shortcuts):
+            return len(shortcuts) - len(adj[v]) + contracted_neighbors[v]
+
+        heap = [(priority(v, _find_shortcuts(adj, v)), v) for v in range(n)]
+        heapq.heapify(heap)
+
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if rank[v] != -1:
+                continue
+
+            # Atualização preguiçosa: se a prioridade piorou, devolve ao heap
+            shortcuts = _find_shortcuts(adj, v)
+            current = priority(v, shortcuts)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            # Contrai v: as arestas restantes vão todas para nós de rank maior
+            rank[v] = order
+            order += 1
+            up_edges[v] = list(adj[v].items())
+            for u, x, weight in shortcuts:
+                if x not in adj[u] or weight < adj[u][x][0]:
+                    adj[u][x] = (weight, v)
+                    adj[x][u] = (weight, v)
+            for u in adj[v]:
+                del adj[u][v]
+                contracted_neighbors[u] += 1
+            adj[v] = {}
+
+        # Vetores CSR do grafo para cima
+        up_indptr = [0]
+        up_indices, up_weights, up_middle = [], [], []
+        for v in range(n):
+            for u, (w, mid) in up_edges[v]:
+                up_indices.append(u)
+                up_weights.append(w)
+                up_middle.append(mid)
+            up_indptr.append(len(up_indices))
+
+        return cls(rank, up_indptr, up_indices, up_weights, up_middle)
+
+    def save(self, path, fingerprint):
+        """
+        Grava a hierarquia em `path` (.npz) junto com a impressão digital do
+        grafo de origem, trocando o arquivo de uma vez (ver atomic_write).
+        """
+        with atomic_write(path) as f:
+            np.savez(
+                f,
+                version=np.array(CH_FORMAT_VERSION),
+                fingerprint=np.array(fingerprint),
+                rank=self.rank,
+                up_indptr=self.up_indptr,
+                up_indices=self.up_indices,
+                up_weights=self.up_weights,
+                up_middle=self.up_middle,
+            )
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Carrega a hierarquia de `path`. Retorna None se o arquivo não existir,
+        for de outra versão do formato ou de outro grafo.
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if data['version'].item() != CH_FORMAT_VERSION or data['fingerprint'].item() != fingerprint:
+                return None
+            return cls(data['rank'], data['up_indptr'], data['up_indices'],
+                       data['up_weights'], data['up_middle'])
+
+    def query(self, s, t):
+        """
+        Consulta entre os índices s e t. Retorna (caminho em índices internos,
+        peso de cada aresta real do caminho, nós visitados); listas vazias se
+        não houver caminho.
+        """
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        inf = float('inf')
+
+        # Busca para frente (0) e para trás (1), ambas só sobem na hierarquia
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: -1}, {t: -1})
+        heaps = ([(0, s)], [(0, t)])
+        mu, meet = inf, -1
+        settled = 0
+
+        while heaps[0] or heaps[1]:
+            # Escolhe o lado com menor topo; cada lado para ao alcançar mu
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0][0] <= heaps[1][0][0]) else 1
+            current_dist, u = heapq.heappop(heaps[side])
+            if current_dist >= mu:
+                heaps[side].clear()
+                continue
+            if current_dist > dist[side][u]:
+                continue
+            settled += 1
+
+            other = dist[1 - side].get(u)
+            if other is not None and current_dist + other < mu:
+                mu = current_dist + other
+                meet = u
+
+            d_side, p_side = dist[side], parent[side]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                new_dist = current_dist + weights[e]
+                if new_dist < d_side.get(v, inf):
+                    d_side[v] = new_dist
+                    p_side[v] = u
+                    heapq.heappush(heaps[side], (new_dist, v))
+
+        if meet == -1:
+            return [], [], settled
+
+        # Caminho na hierarquia: s ... meet ... t
+        up_path = []
+        node = meet
+        while node != -1:
+            up_path.append(node)
+            node = parent[0][node]
+        up_path.reverse()
+        node = parent[1][meet]
+        while node != -1:
+            up_path.append(node)
+            node = parent[1][node]
+
+        # Desempacota os atalhos em arestas reais
+        path, path_weights = [up_path[0]], []
+        for u, v in zip(up_path, up_path[1:]):
+            self._unpack(u, v, path, path_weights)
+        return path, path_weights, settled
+
+    def _unpack(self, u, v, path, path_weights):
+        """
+        Acrescenta em `path` os nós reais da aresta u-v da hierarquia (sem u)
+        e em `path_weights` o peso de cada aresta real.
+        """
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            arc = self._arcs.get((a, b))
+            if arc is None:
+                arc = self._arcs[(b, a)]
+            mid, weight = arc
+            if mid == -1:
+                path.append(b)
+                path_weights.append(weight)
+            else:
+                # Empilha a segunda metade primeiro para sair na ordem certa
+                stack.append((mid, b))
+                stack.append((a, mid))
+
+
+def _find_shortcuts(adj, v):
+    """
+    Lista os atalhos (u, w, peso) necessários ao contrair v no grafo restante
+    `adj`. Para cada vizinho u roda um Dijkstra local que ignora v e é limitado
+    pelo maior custo via v; o atalho u-w só é necessário se esse Dijkstra não
+    achar caminho testemunha com custo <= d(u,v) + d(v,w).
+    """
+    neighbors = list(adj[v].items())
+    inf = float('inf')
+    shortcuts = []
+    for i, (u, (w_uv, _)) in enumerate(neighbors):
+        targets = {w: w_uv + w_vw for w, (w_vw, _) in neighbors[i + 1:]}
+        if not targets:
+            continue
+        limit = max(targets.values())
+
+        dist = {u: 0}
+        heap = [(0, u)]
+        settled = 0
+        remaining = len(targets)
+        while heap and settled < WITNESS_SETTLE_LIMIT:
+            d, x = heapq.heappop(heap)
+            if d > dist[x]:
+                continue
+            settled += 1
+            # Para quando todos os vizinhos alvo já têm distância definitiva
+            if x in targets:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            for y, (w, _) in adj[x].items():
+                nd = d + w
+                if nd <= limit and y != v and nd < dist.get(y, inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+
+        for w, via in targets.items():
+            if dist.get(w, inf) > via:
+                shortcuts.append((u, w, via))
+    return shortcuts
@@ -0,0 +1,246 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import networkx as nx
+from geo import haversine_km
+
+
+class CSRGraph:
+    """
+    Grafo não-direcionado em formato CSR (compressed sparse row).
+
+    Os nós recebem índices inteiros contíguos (0..n-1) e as adjacências ficam
+    em três vetores: `indptr` (início da lista de vizinhos de cada nó),
+    `indices` (vizinhos) e `weights` (peso de cada aresta). Cada aresta
+    não-direcionada aparece duas vezes, uma em cada sentido.
+
+    O mapeamento id do aeroporto <-> índice fica em `ids` e `index`, para que
+    os algoritmos trabalhem só com inteiros e devolvam ids reais ao chamador.
+    """
+
+    def __init__(self, ids, names, lat, lon, edge_u, edge_v, edge_w):
+        self.ids = np.asarray(ids)
+        self.names = list(names)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self._ids = self.ids.tolist()
+        self.index = {node_id: i for i, node_id in enumerate(self._ids)}
+
+        # Arestas não-direcionadas únicas (usadas pelo Kruskal)
+        self.edge_u = np.asarray(edge_u, dtype=np.int64)
+        self.edge_v = np.asarray(edge_v, dtype=np.int64)
+        self.edge_w = np.asarray(edge_w, dtype=np.float64)
+
+        # Monta o CSR com as duas direções de cada aresta
+        n = len(self.ids)
+        loops = self.edge_u == self.edge_v
+        src = np.concatenate([self.edge_u, self.edge_v[~loops]])
+        dst = np.concatenate([self.edge_v, self.edge_u[~loops]])
+        w = np.concatenate([self.edge_w, self.edge_w[~loops]])
+        order = np.argsort(src, kind='stable')
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst[order]
+        self.weights = w[order]
+
+        # Cópias em listas Python: no laço quente, indexar listas é bem mais
+        # barato que indexar arrays NumPy elemento a elemento
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+        self._heuristic_scale = None
+
+        # Estruturas derivadas do grafo (hierarquias, índices, tabelas...).
+        # Vivem junto com o CSR, então somem quando o grafo é reconstruído.
+        self.cache = {}
+
+    def __getstate__(self):
+        # Ao enviar o grafo para outro processo vão só os vetores; as listas
+        # Python e o cache de estruturas derivadas são refeitos/descartados
+        state = self.__dict__.copy()
+        for key in ('_ids', 'index', '_indptr', '_indices', '_weights', 'cache'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._ids = self.ids.tolist()
+        self.index = {node_id: i for i, node_id in enumerate(self._ids)}
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+        self.cache = {}
+
+    @classmethod
+    def from_dataframes(cls, airports_df, routes_df):
+        """
+        Constrói o grafo a partir dos DataFrames de aeroportos (id, name, lat, lon)
+        e rotas (src_id, dst_id[, distance_km]). Rotas para aeroportos
+        desconhecidos são descartadas e rotas repetidas (em qualquer sentido)
+        viram uma única aresta, como no nx.Graph.
+        """
+        ids = airports_df['id'].to_numpy()
+        position = pd.Index(ids)
+
+        src = position.get_indexer(routes_df['src_id'])
+        dst = position.get_indexer(routes_df['dst_id'])
+        if 'distance_km' in routes_df.columns:
+            weight = routes_df['distance_km'].to_numpy(dtype=np.float64)
+        else:
+            weight = np.ones(len(routes_df), dtype=np.float64)
+
+        valid = (src >= 0) & (dst >= 0)
+        edges = pd.DataFrame({
+            'u': np.minimum(src, dst)[valid],
+            'v': np.maximum(src, dst)[valid],
+            'w': weight[valid],
+        })
+        # Mantém o último peso visto, igual a sucessivos G.add_edge
+        edges = edges.drop_duplicates(subset=['u', 'v'], keep='last')
+
+        return cls(
+            ids,
+            airports_df['name'].tolist(),
+            airports_df['lat'].to_numpy(),
+            airports_df['lon'].to_numpy(),
+            edges['u'].to_numpy(),
+            edges['v'].to_numpy(),
+            edges['w'].to_numpy(),
+        )
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """
+        Constrói o grafo a partir de um nx.Graph com atributos name/lat/lon nos nós.
+        """
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        data = graph.nodes
+        edge_u, edge_v, edge_w = [], [], []
+        for u, v, w in graph.edges(data='weight', default=1):
+            edge_u.append(index[u])
+            edge_v.append(index[v])
+            edge_w.append(w)
+        return cls(
+            nodes,
+            [data[n].get('name', str(n)) for n in nodes],
+            [data[n].get('lat', np.nan) for n in nodes],
+            [data[n].get('lon', np.nan) for n in nodes],
+            edge_u, edge_v, edge_w,
+        )
+
+    def to_networkx(self):
+        """
+        Converte de volta para nx.Graph (usado na visualização).
+        """
+        graph = nx.Graph()
+        ids = self._ids
+        graph.add_nodes_from(
+            (node_id, {'name': name, 'lat': lat, 'lon': lon})
+            for node_id, name, lat, lon in zip(ids, self.names, self.lat.tolist(), self.lon.tolist())
+        )
+        graph.add_weighted_edges_from(
+            (ids[u], ids[v], w)
+            for u, v, w in zip(self.edge_u.tolist(), self.edge_v.tolist(), self.edge_w.tolist())
+        )
+        return graph
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    @property
+    def num_edges(self):
+        return len(self.edge_u)
+
+    def fingerprint(self):
+        """
+        Hash (hex) dos ids, das arestas e dos pesos. Identifica a versão do
+        grafo em arquivos pré-processados gravados em disco.
+        """
+        if 'fingerprint' not in self.cache:
+            digest = hashlib.sha1(repr(self._ids).encode())
+            for array in (self.indptr, self.indices, self.weights):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self.cache['fingerprint'] = digest.hexdigest()
+        return self.cache['fingerprint']
+
+    @property
+    def heuristic_scale(self):
+        """
+        Maior fator k tal que k * distância_haversine(u, v) <= peso(u, v) em
+        todas as arestas. Com ele, k * haversine(v, alvo) é uma heurística
+        admissível e consistente para o A*, mesmo com pesos arredondados ou
+        que não sejam distâncias. Vale 0 (A* vira Dijkstra) se faltarem
+        coordenadas.
+        """
+        if self._heuristic_scale is None:
+            gc = haversine_km(self.lat[self.edge_u], self.lon[self.edge_u],
+                              self.lat[self.edge_v], self.lon[self.edge_v])
+            positive = gc > 0
+            if np.isnan(self.lat).any() or np.isnan(self.lon).any() or not positive.any():
+                self._heuristic_scale = 0.0
+            else:
+                ratio = (self.edge_w[positive] / gc[positive]).min()
+                # Pequena folga para erros de ponto flutuante
+                self._heuristic_scale = max(0.0, float(ratio) * (1 - 1e-9))
+        return self._heuristic_scale
+
+    def lower_bounds_to(self, t):
+        """
+        Limite inferior da distância de cada nó até o índice t (lista Python),
+        usado como heurística do A*.
+        """
+        scale = self.heuristic_scale
+        if scale == 0.0:
+            return [0.0] * len(self)
+        gc = haversine_km(self.lat, self.lon, self.lat[t], self.lon[t])
+        return (scale * gc).tolist()
+
+    def node_id(self, i):
+        """Id real do aeroporto para o índice interno i."""
+        return self._ids[i]
+
+    def path_ids(self, path):
+        """Converte uma lista de índices internos em ids de aeroportos."""
+        ids = self._ids
+        return [ids[i] for i in path]
+
+
+def _stamp(graph):
+    """
+    Carimbo barato da versão de um nx.Graph: o próprio objeto (uma cópia feita
+    com graph.copy() leva junto graph.graph, mas não o carimbo), o número de
+    nós e o contador explícito graph.graph['version'].
+    """
+    return (id(graph), len(graph), graph.graph.get('version', 0))
+
+
+def as_csr(graph):
+    """
+    Retorna a representação CSR de `graph`. Aceita um CSRGraph (devolvido como
+    está) ou um nx.Graph; neste caso o CSR é construído uma vez e guardado em
+    graph.graph['csr'] junto com um carimbo de versão, e é refeito quando o
+    carimbo muda. Quem altera arestas ou pesos de um grafo já usado nas buscas
+    incrementa graph.graph['version'] (ou usa add_route/set_route_weight/
+    remove_route, que já fazem isso).
+    """
+    if isinstance(graph, CSRGraph):
+        return graph
+    stamp, csr = graph.graph.get('csr', (None, None))
+    if csr is None or stamp != _stamp(graph):
+        csr = CSRGraph.from_networkx(graph)
+        attach_csr(graph, csr)
+    return csr
+
+
+def attach_csr(graph, csr):
+    """
+    Guarda `csr` como o CSR da versão atual do nx.Graph `graph` (mesmos nós e
+    arestas). Carimbo e CSR ficam em uma única entrada, trocada de uma vez.
+    """
+    graph.graph['csr'] = (_stamp(graph), csr)
+    return graph
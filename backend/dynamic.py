@@ -0,0 +1,245 @@
+import heapq
+from collections import OrderedDict
+import numpy as np
+from csr_graph import CSRGraph
+from mst import MSTIndex
+
+# Quantas árvores de caminhos mínimos ficam no cache do CSR
+SPT_CACHE_SIZE = 64
+
+
+class ShortestPathTree:
+    """
+    Árvore de caminhos mínimos a partir de `source` (índice interno): listas
+    `dist` e `parent` indexadas pelo índice do nó (inf / -1 para nós
+    inalcançáveis). Quando uma aresta muda a árvore é reparada só na parte
+    afetada (update), em vez de rodar o Dijkstra inteiro de novo.
+    """
+
+    def __init__(self, source, dist, parent):
+        self.source = source
+        self.dist = dist
+        self.parent = parent
+
+    @classmethod
+    def build(cls, csr, source):
+        n = len(csr)
+        dist = [float('inf')] * n
+        parent = [-1] * n
+        dist[source] = 0
+        tree = cls(source, dist, parent)
+        tree._settle(csr, [(0, source)])
+        return tree
+
+    def copy(self):
+        """Cópia independente (listas próprias), para reparar sem alterar a original."""
+        return ShortestPathTree(self.source, list(self.dist), list(self.parent))
+
+    def path_to(self, t):
+        """Caminho (índices internos) da origem até t, ou [] se inalcançável."""
+        if self.dist[t] == float('inf'):
+            return []
+        path = []
+        node = t
+        while node != -1:
+            path.append(node)
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def _settle(self, csr, heap):
+        """
+        Laço do Dijkstra a partir das entradas de `heap`: só propaga
+        distâncias que melhoram, então pode partir de uma árvore já pronta.
+        """
+        indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+        dist, parent = self.dist, self.parent
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                new_dist = d + weights[e]
+                if new_dist < dist[v]:
+                    dist[v] = new_dist
+                    parent[v] = u
+                    heapq.heappush(heap, (new_dist, v))
+
+    def update(self, csr, u, v, old_w, new_w):
+        """
+        Repara a árvore depois da aresta u-v mudar de old_w para new_w no
+        grafo `csr` (já atualizado); None = aresta inexistente / removida.
+
+        Inserção ou redução de peso: as extremidades que melhoram entram no
+        heap e só os nós cuja distância diminui são revisitados. Remoção ou
+        aumento de uma aresta da árvore: só a subárvore pendurada nela perde
+        as distâncias; cada nó dela recebe o melhor valor vindo de fora da
+        subárvore e o Dijkstra roda só sobre ela.
+        """
+        dist, parent = self.dist, self.parent
+        if new_w is not None and (old_w is None or new_w < old_w):
+            heap = []
+            for a, b in ((u, v), (v, u)):
+                if dist[a] + new_w < dist[b]:
+                    dist[b] = dist[a] + new_w
+                    parent[b] = a
+                    heap.append((dist[b], b))
+            self._settle(csr, heap)
+            return
+
+        # Aresta fora da árvore: nenhuma distância muda
+        if parent[v] == u:
+            child = v
+        elif parent[u] == v:
+            child = u
+        else:
+            return
+
+        # Subárvore afetada (nós cujo caminho passa pela aresta)
+        children = [[] for _ in range(len(parent))]
+        for node, p in enumerate(parent):
+            if p >= 0:
+                children[p].append(node)
+        affected = [child]
+        for node in affected:
+            affected.extend(children[node])
+        inside = set(affected)
+        inf = float('inf')
+        for node in affected:
+            dist[node] = inf
+            parent[node] = -1
+
+        # Melhor distância de cada nó afetado vinda de nós não afetados
+        indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+        heap = []
+        for node in affected:
+            for e in range(indptr[node], indptr[node + 1]):
+                x = indices[e]
+                if x not in inside and dist[x] + weights[e] < dist[node]:
+                    dist[node] = dist[x] + weights[e]
+                    parent[node] = x
+            if dist[node] < inf:
+                heap.append((dist[node], node))
+        self._settle(csr, heap)
+
+
+def with_edge(csr, u, v, weight):
+    """
+    Novo CSRGraph igual a `csr` com a aresta u-v (índices internos) com peso
+    `weight` (None remove a aresta). Retorna o grafo novo e o peso antigo
+    (None se a aresta não existia).
+    """
+    a, b = min(u, v), max(u, v)
+    same = (np.minimum(csr.edge_u, csr.edge_v) == a) & (np.maximum(csr.edge_u, csr.edge_v) == b)
+    old_w = float(csr.edge_w[same].min()) if same.any() else None
+    keep = ~same
+    edge_u, edge_v, edge_w = csr.edge_u[keep], csr.edge_v[keep], csr.edge_w[keep]
+    if weight is not None:
+        edge_u = np.append(edge_u, a)
+        edge_v = np.append(edge_v, b)
+        edge_w = np.append(edge_w, weight)
+    return CSRGraph(csr.ids, csr.names, csr.lat, csr.lon, edge_u, edge_v, edge_w), old_w
+
+
+def _subtree_mask(index, child):
+    """Máscara dos nós na subárvore de `child` (descendentes na MST enraizada)."""
+    up = np.asarray(index.up)
+    depth = np.asarray(index.depth)
+    component = np.asarray(index.component)
+    diff = depth - depth[child]
+    candidate = (diff >= 0) & (component == component[child])
+    # Sobe cada candidato até a profundidade de child (binary lifting vetorizado)
+    ancestor = np.arange(len(depth))
+    for j in range(len(up)):
+        step = candidate & ((diff >> j) & 1).astype(bool)
+        ancestor[step] = up[j][ancestor[step]]
+    return candidate & (ancestor == child)
+
+
+def repair_mst(index, new_csr, u, v, old_w, new_w):
+    """
+    Repara a MST de `index` (MSTIndex do grafo antigo) depois da aresta u-v
+    mudar de old_w para new_w, sem refazer o Kruskal.
+
+    Inserção ou redução de peso (propriedade do ciclo): se u e v já estão na
+    mesma árvore, a nova aresta entra no lugar da aresta mais pesada do
+    caminho u-v na MST, se for mais leve que ela. Remoção ou aumento de peso
+    de uma aresta da MST: a árvore se divide em dois lados e a aresta de
+    substituição é a mais leve do grafo novo que cruza o corte (busca
+    vetorizada sobre os vetores de arestas). Arestas fora da MST que ficam
+    mais pesadas ou somem não mudam nada.
+    """
+    edges = {(min(a, b), max(a, b)): w for a, b, w in index.mst_edges}
+    key = (min(u, v), max(u, v))
+
+    if new_w is not None and (old_w is None or new_w < old_w):
+        if key in edges or index.component[u] != index.component[v]:
+            edges[key] = new_w
+        else:
+            path, weights = index.path(u, v)
+            heaviest = int(np.argmax(weights))
+            if weights[heaviest] > new_w:
+                a, b = path[heaviest], path[heaviest + 1]
+                del edges[(min(a, b), max(a, b))]
+                edges[key] = new_w
+    elif key in edges:
+        del edges[key]
+        child = v if index.parent[v] == u else u
+        side = _subtree_mask(index, child)
+        component = np.asarray(index.component)
+        eu, ev, ew = new_csr.edge_u, new_csr.edge_v, new_csr.edge_w
+        crossing = ((side[eu] != side[ev]) & (component[eu] == component[child])
+                    & (component[ev] == component[child]))
+        if crossing.any():
+            candidates = np.flatnonzero(crossing)
+            best = candidates[np.argmin(ew[candidates])]
+            a, b = int(eu[best]), int(ev[best])
+            edges[(min(a, b), max(a, b))] = float(ew[best])
+
+    mst_edges = [(a, b, w) for (a, b), w in edges.items()]
+    return MSTIndex(new_csr, mst_edges, sum(w for _, _, w in mst_edges), index.engine)
+
+
+def apply_update(csr, u, v, weight):
+    """
+    Aplica a mudança da aresta u-v (peso `weight`, None remove) e devolve o
+    CSRGraph novo, com a MST, as árvores de caminhos mínimos e o multigrafo
+    dirigido do cache reparados incrementalmente. Estruturas que dependem do
+    grafo inteiro (hierarquia CH, tabela de todos os pares, impressão
+    digital) ficam de fora e são refeitas sob demanda. Também retorna o peso
+    antigo.
+
+    O cache de `csr` não é alterado: consultas que ainda usam o grafo antigo
+    continuam vendo as árvores antigas, e as reparadas são cópias.
+    """
+    new_csr, old_w = with_edge(csr, u, v, weight)
+    if 'base' in csr.cache:
+        new_csr.cache['base'] = csr.cache['base']
+    # Alterações desde o grafo carregado, para montar o multigrafo dirigido
+    # depois (graph.get_route_multigraph); se ele já existe, é atualizado aqui
+    new_csr.cache['route_updates'] = csr.cache.get('route_updates', ()) + ((u, v, weight),)
+    multigraph = csr.cache.get('multigraph')
+    if multigraph is not None:
+        new_csr.cache['multigraph'] = multigraph.with_route(new_csr, u, v, weight)
+    # Cópia do dicionário de árvores (a lista é tirada de uma vez, mesmo com
+    # outras consultas inserindo árvores no cache do grafo antigo)
+    trees = list(csr.cache['spt'].items()) if 'spt' in csr.cache else None
+    if old_w == weight:
+        if 'mst' in csr.cache:
+            new_csr.cache['mst'] = csr.cache['mst']
+        if trees is not None:
+            new_csr.cache['spt'] = OrderedDict(trees)
+        return new_csr, old_w
+
+    index = csr.cache.get('mst')
+    if index is not None:
+        new_csr.cache['mst'] = repair_mst(index, new_csr, u, v, old_w, weight)
+    if trees is not None:
+        repaired = OrderedDict()
+        for s, tree in trees:
+            repaired[s] = tree = tree.copy()
+            tree.update(new_csr, u, v, old_w, weight)
+        new_csr.cache['spt'] = repaired
+    return new_csr, old_w
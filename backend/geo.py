@@ -0,0 +1,18 @@
+import numpy as np
+
+# Raio médio da Terra em quilômetros
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distância haversine em km, vetorizada (aceita escalares ou arrays, em graus).
+
+    É a única implementação da fórmula, usada pelo backend e pelo pipeline de
+    dados (data_processing/haversine_dist_calc.py). Este módulo só depende do
+    NumPy para poder ser importado pelo pipeline sem carregar o resto do
+    backend (main.py e os testes põem backend/ e data_processing/ no path).
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -1,71 +1,151 @@
 import os
-import pandas as pd
+import json
+import uuid
+import logging
+import functools
+import threading
 import networkx as nx
-from collections import deque
+from collections import deque, OrderedDict
 import heapq
+import numpy as np
+import pandas as pd
+from csr_graph import CSRGraph, as_csr, attach_csr
+from geo import haversine_km
+from contraction import ContractionHierarchy
+from hub_labels import HubLabels
+from landmarks import Landmarks
+from apsp import AllPairsTable
+from mst import MSTIndex
+from multigraph import RouteMultiGraph
+from dynamic import ShortestPathTree, SPT_CACHE_SIZE, apply_update
+from spatial import SpatialIndex
+from search import AirportSearch, SEARCH_LIMIT
+from snapshot import load_graph, journal_file, prune_journals
+from batch import parallel_distance_rows
+from results import RouteResult, MSTResult
+from route_cache import RouteCache
+
+# Rastreamento detalhado das rotas (arestas e custos) em nível DEBUG; nas
+# consultas normais nada é escrito no console
+logger = logging.getLogger(__name__)
+
+# Versão do grafo: muda sempre que o grafo (nós, arestas ou pesos) muda
+def graph_version(graph):
+    """
+    Identificador da versão atual do grafo (impressão digital do CSR), usado
+    como chave de caches que dependem do grafo.
+    """
+    return as_csr(graph).fingerprint()
+
+# Cache LRU das rotas já calculadas, compartilhado por todos os algoritmos.
+# Tamanho e validade (segundos) configuráveis por ROUTE_CACHE_SIZE e
+# ROUTE_CACHE_TTL; contadores em route_cache.stats()
+route_cache = RouteCache(maxsize=int(os.environ.get("ROUTE_CACHE_SIZE", 1024)),
+                         ttl=float(os.environ.get("ROUTE_CACHE_TTL", 3600)))
+
+def cached_route(algorithm):
+    """
+    Decorador dos algoritmos de rota: consulta o route_cache com a chave
+    (versão do grafo, algoritmo, origem, destino) antes de buscar. Opções
+    da busca (como o número de marcos do ALT) entram junto com o algoritmo na
+    chave, por isso as funções decoradas as declaram só nomeadas (depois de
+    `*`). Ids fora do grafo (como None de um dropdown vazio) não passam pelo
+    cache: a busca responde direto que não há caminho. A função original
+    continua acessível em `__wrapped__`.
+    """
+    def decorator(search):
+        @functools.wraps(search)
+        def wrapper(graph, source, target, **options):
+            csr = as_csr(graph)
+            if source not in csr or target not in csr:
+                return search(graph, source, target, **options)
+            key = (algorithm, *sorted(options.items())) if options else algorithm
+            return route_cache.lookup(graph_version(graph), key, source, target,
+                                      lambda: search(graph, source, target, **options))
+        return wrapper
+    return decorator
 
 # BFS - algoritmo original (encontra caminho com menor número de arestas)
+@cached_route('bfs')
 def bfs_shortest_path(graph, source, target):
     """
     Breadth-First Search: encontra o caminho com menor número de arestas,
     não necessariamente o de menor custo.
+    Aceita um nx.Graph ou um CSRGraph; os ids dos aeroportos são convertidos
+    para índices inteiros e a busca percorre os vetores CSR.
+    Retorna um RouteResult (caminho, pesos das arestas, custo total e
+    stats['settled'], o número de nós retirados da fila).
     """
-    if source not in graph or target not in graph:
-        return []
-    
-    queue = deque([source])
-    parents = {source: None}
+    csr = as_csr(graph)
+    if source not in csr or target not in csr:
+        return RouteResult('bfs')
+
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    s, t = csr.index[source], csr.index[target]
+
+    queue = deque([s])
+    parents = [-1] * len(csr)
+    parent_edge = [-1] * len(csr)
+    parents[s] = s
+    settled = 0
     
     while queue:
         current = queue.popleft()
-        if current == target:
+        settled += 1
+        if current == t:
             path = []
-            while current is not None:
+            while current != s:
                 path.append(current)
                 current = parents[current]
-            
-            # ---- Impressão das arestas percorridas e seus custos ----
+            path.append(s)
             path.reverse()
-            if len(path) > 1:
-                print("\n=== Caminho BFS ===")
-                total = 0
-                for i in range(len(path) - 1):
-                    u, v = path[i], path[i+1]
-                    w = graph[u][v].get('weight', 1)
-                    total += w
-                    print(f"Aresta: {graph.nodes[u]['name']} -> {graph.nodes[v]['name']} | Custo: {w} km")
-                print(f"Número de conexões: {len(path) - 1}")
-                print(f"Custo total: {total:.2f} km\n")
             
-            return path
+            path_weights = [weights[parent_edge[v]] for v in path[1:]]
+            return _route_result(csr, 'bfs', path, path_weights, {'settled': settled})
             
-        for neighbor in graph[current]:
-            if neighbor not in parents:
+        for e in range(indptr[current], indptr[current + 1]):
+            neighbor = indices[e]
+            if parents[neighbor] == -1:
                 parents[neighbor] = current
+                parent_edge[neighbor] = e
                 queue.append(neighbor)
-    return []
+    logger.debug("bfs: nenhum caminho encontrado")
+    return RouteResult('bfs', stats={'settled': settled})
 
-# Algoritmo de Dijkstra com heapq 
-def dijkstra_shortest_path(graph, source, target):
+# Monta o RouteResult com os ids reais e registra o caminho em nível DEBUG
+def _route_result(csr, algorithm, path, path_weights, stats):
+    total = sum(path_weights)
+    if logger.isEnabledFor(logging.DEBUG):
+        for u, v, w in zip(path, path[1:], path_weights):
+            logger.debug("%s: aresta %s -> %s | custo %s km", algorithm, csr.names[u], csr.names[v], w)
+        logger.debug("%s: %d conexões, custo total %.2f km, %s",
+                     algorithm, len(path) - 1, total, stats)
+    return RouteResult(algorithm, csr.path_ids(path), path_weights, total, stats)
+
+# Núcleo do Dijkstra sobre os vetores CSR (índices inteiros)
+def _dijkstra_csr(csr, s, t=-1, targets=None):
     """
-    Retorna o caminho mais curto e a distância mínima entre source e target
-    em um grafo ponderado (usando weight das arestas).
-    Também imprime as arestas percorridas e o custo de cada uma.
+    Dijkstra com heapq sobre o CSR a partir do índice s. Para assim que t é
+    removido do heap (se t >= 0), ou quando todos os índices do conjunto
+    `targets` tiverem sido removidos (se informado). Retorna as listas dist, parent e parent_edge
+    indexadas pelo índice interno do nó e o número de nós definitivamente
+    visitados (settled).
     """
-
-    # Verifica se os nós de origem e destino existem no grafo
-    if source not in graph or target not in graph:
-        return [], float('inf')
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    inf = float('inf')
 
     # Inicializa todas as distâncias com infinito
-    dist = {node: float('inf') for node in graph}
-    dist[source] = 0  # A distância até o nó de origem é 0
+    dist = [inf] * len(csr)
+    dist[s] = 0  # A distância até o nó de origem é 0
 
-    # Dicionário para reconstruir o caminho
-    parent = {source: None}
+    # Listas para reconstruir o caminho (pai e aresta usada para chegar no nó)
+    parent = [-1] * len(csr)
+    parent_edge = [-1] * len(csr)
 
     # Fila de prioridade (heap) inicializada com o nó de origem e distância 0
-    heap = [(0, source)]
+    heap = [(0, s)]
+    settled = 0
+    remaining = len(targets) if targets is not None else -1
 
     # Loop principal do Dijkstra
     while heap:
@@ -74,220 +154,1121 @@ def dijkstra_shortest_path(graph, source, target):
         # Se já encontramos uma distância menor para u, ignoramos
         if current_dist > dist[u]:
             continue
+        settled += 1
 
         # Se chegamos ao destino, podemos parar (otimização)
-        if u == target:
+        if u == t:
             break
+        if remaining > 0 and u in targets:
+            remaining -= 1
+            if remaining == 0:
+                break
 
-        # Itera sobre todos os vizinhos do nó atual
-        for v in graph[u]:
-            weight = graph[u][v].get('weight', 1)  # Pega o peso da aresta (ou 1 se não existir)
-            new_dist = current_dist + weight       # Calcula distância acumulada até v
+        # Itera sobre todos os vizinhos do nó atual (fatia do CSR)
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = current_dist + weights[e]  # Calcula distância acumulada até v
 
             # Se encontramos um caminho mais curto para v, atualizamos
             if new_dist < dist[v]:
                 dist[v] = new_dist
                 parent[v] = u                  # Armazena o pai para reconstruir o caminho
+                parent_edge[v] = e
                 heapq.heappush(heap, (new_dist, v))  # Adiciona na fila de prioridade
 
-    # Se não existe caminho até o destino, retorna vazio
-    if dist[target] == float('inf'):
-        print("Nenhum caminho encontrado.")
-        return [], float('inf')
+    return dist, parent, parent_edge, settled
+
+# Peso da aresta u-v (índices internos) no CSR
+def _edge_weight(csr, u, v):
+    indices = csr._indices
+    for e in range(csr._indptr[u], csr._indptr[u + 1]):
+        if indices[e] == v:
+            return csr._weights[e]
+    raise KeyError((u, v))
 
-    # Reconstrução do caminho a partir do destino
+# Reconstrói o caminho (índices internos) seguindo os pais a partir de t
+def _walk_parents(parent, t):
     path = []
-    node = target
-    while node is not None:
+    node = t
+    while node != -1:
         path.append(node)
         node = parent[node]
     path.reverse()  # Reverte a lista para ir da origem ao destino
+    return path
 
-    # ---- Impressão das arestas percorridas e seus custos ----
-    print("\n=== Caminho Dijkstra ===")
-    total = 0
-    for i in range(len(path) - 1):
-        u, v = path[i], path[i+1]
-        w = graph[u][v].get('weight', 1)
-        total += w
-        print(f"Aresta: {graph.nodes[u]['name']} -> {graph.nodes[v]['name']} | Custo: {w} km")
-    print(f"Custo total: {total:.2f} km\n")
-    
-    return path, total
+# Algoritmo de Dijkstra com heapq 
+@cached_route('dijkstra')
+def dijkstra_shortest_path(graph, source, target, *, precomputed=True):
+    """
+    Retorna o caminho mais curto e a distância mínima entre source e target
+    em um grafo ponderado (usando weight das arestas), como um RouteResult
+    com o peso de cada aresta e stats['settled'] (nós visitados).
+    Aceita um nx.Graph ou um CSRGraph; a busca roda sobre os vetores CSR.
+    Quando há uma tabela de todos os pares (AllPairsTable) carregada para o
+    grafo, ou uma árvore de caminhos mínimos da origem ou do destino no
+    cache (shortest_path_tree), o caminho é lido dela, sem busca: nesse caso
+    stats traz 'precomputed' ('apsp' ou 'spt') no lugar de 'settled'. Com
+    precomputed=False a busca sempre roda (base de comparação das outras
+    buscas).
+    """
+    csr = as_csr(graph)
+
+    # Verifica se os nós de origem e destino existem no grafo
+    if source not in csr or target not in csr:
+        return RouteResult('dijkstra')
+
+    s, t = csr.index[source], csr.index[target]
+    table = csr.cache.get('apsp') if precomputed else None
+    trees = csr.cache.get('spt', {}) if precomputed else {}
+    if table is not None:
+        # Caminho pré-calculado: nenhum nó precisa ser visitado
+        path = table.path(s, t)
+        stats = {'precomputed': 'apsp'}
+    elif s in trees or t in trees:
+        # Árvore já calculada (e mantida nas atualizações do grafo)
+        path = trees[s].path_to(t) if s in trees else trees[t].path_to(s)[::-1]
+        stats = {'precomputed': 'spt'}
+    else:
+        dist, parent, parent_edge, settled = _dijkstra_csr(csr, s, t)
+        path = _walk_parents(parent, t) if dist[t] != float('inf') else []
+        stats = {'settled': settled}
+
+    # Se não existe caminho até o destino, retorna vazio
+    if not path:
+        logger.debug("dijkstra: nenhum caminho encontrado")
+        return RouteResult('dijkstra', stats=stats)
+
+    path_weights = [_edge_weight(csr, u, v) for u, v in zip(path, path[1:])]
+    return _route_result(csr, 'dijkstra', path, path_weights, stats)
+
+# Árvore de caminhos mínimos de uma origem, guardada no cache do CSR
+def shortest_path_tree(graph, source):
+    """
+    Retorna a ShortestPathTree (dist e parent por índice interno) a partir
+    do aeroporto `source`. As últimas SPT_CACHE_SIZE árvores ficam no cache
+    do CSR: o dijkstra_shortest_path passa a responder consultas dessa origem
+    (ou para esse destino) direto da árvore, e as atualizações dinâmicas do
+    grafo reparam as árvores em vez de descartá-las.
+    """
+    csr = as_csr(graph)
+    trees = csr.cache.setdefault('spt', OrderedDict())
+    s = csr.index[source]
+    tree = trees.get(s)
+    if tree is None:
+        tree = ShortestPathTree.build(csr, s)
+        trees[s] = tree
+        while len(trees) > SPT_CACHE_SIZE:
+            trees.popitem(last=False)
+    else:
+        trees.move_to_end(s)
+    return tree
+
+# Dijkstra bidirecional (origem -> destino e destino -> origem ao mesmo tempo)
+@cached_route('bidijkstra')
+def bidirectional_dijkstra_shortest_path(graph, source, target):
+    """
+    Dijkstra bidirecional: uma busca parte da origem e outra do destino
+    (o grafo é não-direcionado, então a busca reversa usa as mesmas arestas).
+    Guarda em mu o menor custo de caminho já visto passando pelas duas buscas
+    e para quando a soma dos topos dos dois heaps alcança mu — nesse ponto
+    nenhum caminho ainda não examinado pode ser mais curto.
+    Retorna um RouteResult, como o dijkstra_shortest_path; stats['settled']
+    soma os nós visitados pelas duas buscas.
+    """
+    csr = as_csr(graph)
+
+    # Verifica se os nós de origem e destino existem no grafo
+    if source not in csr or target not in csr:
+        return RouteResult('bidijkstra')
+
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    inf = float('inf')
+    n = len(csr)
+    s, t = csr.index[source], csr.index[target]
+
+    # Índice 0: busca para frente (a partir de s); 1: busca reversa (a partir de t)
+    dist = ([inf] * n, [inf] * n)
+    parent = ([-1] * n, [-1] * n)
+    parent_edge = ([-1] * n, [-1] * n)
+    heaps = ([(0, s)], [(0, t)])
+    dist[0][s] = 0
+    dist[1][t] = 0
+
+    mu = inf if s != t else 0   # melhor custo encontrado até agora
+    meet = s if s == t else -1  # nó onde as buscas se encontram no melhor caminho
+    settled = 0
+
+    while heaps[0] and heaps[1]:
+        # Critério de parada: nenhum caminho restante pode melhorar mu
+        if heaps[0][0][0] + heaps[1][0][0] >= mu:
+            break
+
+        # Expande o lado com o menor topo de heap
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        d_side, d_other = dist[side], dist[1 - side]
+        current_dist, u = heapq.heappop(heaps[side])
+        if current_dist > d_side[u]:
+            continue
+        settled += 1
+
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = current_dist + weights[e]
+            if new_dist < d_side[v]:
+                d_side[v] = new_dist
+                parent[side][v] = u
+                parent_edge[side][v] = e
+                heapq.heappush(heaps[side], (new_dist, v))
+            # Caminho candidato s ~> u -> v ~> t passando pela outra busca
+            if d_other[v] < inf and new_dist + d_other[v] < mu:
+                mu = new_dist + d_other[v]
+                meet = v
+
+    stats = {'settled': settled}
+
+    # Se não existe caminho até o destino, retorna vazio
+    if mu == inf:
+        logger.debug("bidijkstra: nenhum caminho encontrado")
+        return RouteResult('bidijkstra', stats=stats)
+
+    # Junta os dois meios caminhos no ponto de encontro; guarda os pesos
+    # porque a metade reversa segue as arestas no sentido contrário
+    path = _walk_parents(parent[0], meet)
+    path_weights = [weights[parent_edge[0][v]] for v in path[1:]]
+    node = meet
+    while node != t:
+        path_weights.append(weights[parent_edge[1][node]])
+        node = parent[1][node]
+        path.append(node)
+
+    return _route_result(csr, 'bidijkstra', path, path_weights, stats)
+
+# Contraction Hierarchies (pré-processamento uma vez, consultas rápidas)
+def get_contraction_hierarchy(graph):
+    """
+    Retorna a ContractionHierarchy do grafo, guardada no cache do CSR.
+    Para o grafo principal (G) a hierarquia é lida de data/ch_hierarchy.npz
+    quando o arquivo corresponde à versão atual do grafo; caso contrário é
+    construída e gravada nesse arquivo.
+    """
+    csr = as_csr(graph)
+    ch = csr.cache.get('ch')
+    if ch is None:
+        persist = csr is CSR
+        if persist:
+            ch = ContractionHierarchy.load(ch_file, csr.fingerprint())
+        if ch is None:
+            ch = ContractionHierarchy.build(csr)
+            if persist:
+                ch.save(ch_file, csr.fingerprint())
+        csr.cache['ch'] = ch
+    return ch
+
+# Rótulos de hubs: oráculo de distâncias (sem caminho) para alto volume de consultas
+def get_hub_labels(graph):
+    """
+    Retorna os HubLabels do grafo, guardados no cache do CSR. Para o grafo
+    principal (G) os rótulos são mapeados de data/hub_labels.bin quando o
+    arquivo corresponde à versão atual do grafo; caso contrário são
+    construídos e gravados nesse arquivo.
+    """
+    csr = as_csr(graph)
+    labels = csr.cache.get('hub')
+    if labels is None:
+        persist = csr is CSR
+        if persist:
+            labels = HubLabels.load(hub_file, csr.fingerprint())
+        if labels is None:
+            labels = HubLabels.build(csr)
+            if persist:
+                labels.save(hub_file, csr.fingerprint())
+        csr.cache['hub'] = labels
+    return labels
+
+def hub_label_distance(graph, source, target):
+    """
+    Distância mínima em km entre os aeroportos source e target pelos rótulos
+    de hubs (interseção de dois vetores ordenados); igual ao custo total do
+    dijkstra_shortest_path a menos de arredondamento (ver HubLabels). inf se
+    não houver caminho ou aeroporto.
+    """
+    csr = as_csr(graph)
+    if source not in csr or target not in csr:
+        return float('inf')
+    return get_hub_labels(csr).distance(csr.index[source], csr.index[target])
+
+@cached_route('ch')
+def ch_shortest_path(graph, source, target):
+    """
+    Caminho mínimo usando Contraction Hierarchies: Dijkstra bidirecional que
+    só sobe na hierarquia, com atalhos desempacotados de volta em aeroportos
+    reais. Mesmo contrato (RouteResult) e mesmo custo do
+    dijkstra_shortest_path; stats['settled'] conta os nós visitados.
+    """
+    csr = as_csr(graph)
+
+    # Verifica se os nós de origem e destino existem no grafo
+    if source not in csr or target not in csr:
+        return RouteResult('ch')
+
+    ch = get_contraction_hierarchy(csr)
+    path, path_weights, settled = ch.query(csr.index[source], csr.index[target])
+    stats = {'settled': settled}
+
+    # Se não existe caminho até o destino, retorna vazio
+    if not path:
+        logger.debug("ch: nenhum caminho encontrado")
+        return RouteResult('ch', stats=stats)
+
+    return _route_result(csr, 'ch', path, path_weights, stats)
+
+# Algoritmo A* com heurística haversine
+@cached_route('astar')
+def astar_shortest_path(graph, source, target):
+    """
+    A*: mesmo contrato do dijkstra_shortest_path (RouteResult), mas
+    guiado pela distância em linha reta (haversine) até o destino. Como os
+    pesos das arestas são distâncias de grande círculo, essa heurística é
+    admissível e consistente (ver CSRGraph.heuristic_scale), então o custo
+    encontrado é o mesmo do Dijkstra, visitando bem menos nós
+    (stats['settled']).
+    """
+    csr = as_csr(graph)
+
+    # Verifica se os nós de origem e destino existem no grafo
+    if source not in csr or target not in csr:
+        return RouteResult('astar')
+
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    inf = float('inf')
+    s, t = csr.index[source], csr.index[target]
+
+    # h[v]: limite inferior da distância de v até o destino
+    h = csr.lower_bounds_to(t)
+
+    dist = [inf] * len(csr)
+    dist[s] = 0
+    parent = [-1] * len(csr)
+    parent_edge = [-1] * len(csr)
+
+    # Heap ordenado por f = g + h; guarda g para descartar entradas antigas
+    heap = [(h[s], 0, s)]
+    settled = 0
+
+    while heap:
+        _, current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        settled += 1
+
+        if u == t:
+            break
+
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = current_dist + weights[e]
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parent[v] = u
+                parent_edge[v] = e
+                heapq.heappush(heap, (new_dist + h[v], new_dist, v))
+
+    stats = {'settled': settled}
+
+    # Se não existe caminho até o destino, retorna vazio
+    if dist[t] == inf:
+        logger.debug("astar: nenhum caminho encontrado")
+        return RouteResult('astar', stats=stats)
+
+    path = _walk_parents(parent, t)
+    path_weights = [weights[parent_edge[v]] for v in path[1:]]
+    return _route_result(csr, 'astar', path, path_weights, stats)
+
+# Número padrão de marcos do ALT, configurável pela variável de ambiente ALT_LANDMARKS
+ALT_LANDMARKS = int(os.environ.get("ALT_LANDMARKS", 8))
+
+# Marcos do ALT (distâncias de cada marco a todos os nós), no cache do CSR
+def get_landmarks(graph, count=None):
+    """
+    Retorna os Landmarks do grafo com pelo menos `count` marcos (padrão
+    ALT_LANDMARKS). A seleção é incremental, então um conjunto maior já em
+    cache serve para contagens menores (são os mesmos primeiros marcos).
+    """
+    csr = as_csr(graph)
+    count = ALT_LANDMARKS if count is None else count
+    landmarks = csr.cache.get('alt')
+    if landmarks is None or (len(landmarks) < count and landmarks.requested < count):
+        landmarks = Landmarks.build(csr, count)
+        csr.cache['alt'] = landmarks
+    return landmarks
+
+# A* com marcos (ALT): heurística pela desigualdade triangular
+@cached_route('alt')
+def alt_shortest_path(graph, source, target, *, landmarks=None):
+    """
+    Busca dirigida ao destino como o A*, mas com a heurística do ALT: o maior
+    |d(L, t) - d(L, v)| entre os `landmarks` marcos (padrão ALT_LANDMARKS),
+    que enxerga os desvios pelos hubs que a linha reta não vê. Mesmo contrato
+    do dijkstra_shortest_path; stats['settled'] traz os nós visitados e
+    stats['landmarks'] o número de marcos usados.
+    """
+    csr = as_csr(graph)
+
+    # Verifica se os nós de origem e destino existem no grafo
+    if source not in csr or target not in csr:
+        return RouteResult('alt')
+
+    count = ALT_LANDMARKS if landmarks is None else landmarks
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    inf = float('inf')
+    s, t = csr.index[source], csr.index[target]
+
+    # h[v]: limite inferior da distância de v até o destino
+    h = get_landmarks(csr, count).lower_bounds_to(t, count)
+
+    dist = [inf] * len(csr)
+    dist[s] = 0
+    parent = [-1] * len(csr)
+    parent_edge = [-1] * len(csr)
+
+    # Heap ordenado por f = g + h; guarda g para descartar entradas antigas
+    heap = [(h[s], 0, s)]
+    settled = 0
+
+    while heap:
+        _, current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        settled += 1
+
+        if u == t:
+            break
+
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = current_dist + weights[e]
+            # h infinito: algum marco mostra que v não alcança o destino
+            if new_dist < dist[v] and h[v] < inf:
+                dist[v] = new_dist
+                parent[v] = u
+                parent_edge[v] = e
+                heapq.heappush(heap, (new_dist + h[v], new_dist, v))
+
+    stats = {'settled': settled, 'landmarks': min(count, len(get_landmarks(csr, count)))}
+
+    # Se não existe caminho até o destino, retorna vazio
+    if dist[t] == inf:
+        logger.debug("alt: nenhum caminho encontrado")
+        return RouteResult('alt', stats=stats)
+
+    path = _walk_parents(parent, t)
+    path_weights = [weights[parent_edge[v]] for v in path[1:]]
+    return _route_result(csr, 'alt', path, path_weights, stats)
+
+# Rotas Pareto-ótimas (conexões x km): Bellman-Ford em camadas por número de trechos
+def pareto_routes(graph, source, target, max_connections=None):
+    """
+    Todas as rotas não dominadas entre source e target no critério (número
+    de conexões, km), em uma única busca: a camada h do Bellman-Ford guarda
+    a menor distância de cada nó usando no máximo h trechos. Cada camada é
+    uma passada vetorizada sobre as arestas que saem dos nós melhorados na
+    camada anterior (np.minimum.at), e a busca para quando nenhuma distância
+    melhora ou ao chegar em `max_connections` trechos.
+
+    Retorna uma lista de RouteResult ('pareto'), da rota com menos conexões
+    para a mais curta: cada uma é a menor distância com até aquele número de
+    conexões, e só entra se for mais curta que a anterior. O último item é
+    o mesmo custo do dijkstra_shortest_path (sem limite de conexões).
+    Lista vazia se não houver caminho.
+    """
+    csr = as_csr(graph)
+    if source not in csr or target not in csr:
+        return []
+    s, t = csr.index[source], csr.index[target]
+    if s == t:
+        return [RouteResult('pareto', [source], [], 0, {'layers': 0})]
+
+    n = len(csr)
+    limit = n - 1 if max_connections is None else min(max_connections, n - 1)
+    src = np.repeat(np.arange(n), np.diff(csr.indptr))
+    dst, w = csr.indices, csr.weights
+
+    dist = np.full(n, np.inf)
+    dist[s] = 0
+    # Para cada camada: nós melhorados (ordenados) e o pai de cada um na camada anterior
+    layers = [(np.array([s]), np.array([-1]))]
+    front = [(0, np.inf)]
+    improved = np.zeros(n, dtype=bool)
+    improved[s] = True
+    hops = 0
+    while hops < limit:
+        active = improved[src]
+        if not active.any():
+            break
+        hops += 1
+        a_src, a_dst = src[active], dst[active]
+        candidate = dist[a_src] + w[active]
+        new_dist = dist.copy()
+        np.minimum.at(new_dist, a_dst, candidate)
+        improved = new_dist < dist
+
+        # Pai de cada nó melhorado: uma aresta que realiza a nova distância
+        best = improved[a_dst] & (candidate == new_dist[a_dst])
+        nodes, first = np.unique(a_dst[best], return_index=True)
+        layers.append((nodes, a_src[best][first]))
+        dist = new_dist
+        if improved[t]:
+            front.append((hops, dist[t]))
+
+    results = []
+    for hops_used, total in front[1:]:
+        path = _walk_layers(layers, s, t, hops_used)
+        path_weights = [_edge_weight(csr, u, v) for u, v in zip(path, path[1:])]
+        results.append(_route_result(csr, 'pareto', path, path_weights, {'layers': len(layers) - 1}))
+    return results
+
+def _walk_layers(layers, s, t, hops):
+    """Caminho (índices internos) até t com no máximo `hops` trechos, pelas camadas do Bellman-Ford."""
+    path = [t]
+    v, h = t, hops
+    while v != s:
+        # Última camada (<= h) em que v melhorou
+        while True:
+            nodes, parents = layers[h]
+            i = np.searchsorted(nodes, v)
+            if i < len(nodes) and nodes[i] == v:
+                break
+            h -= 1
+        v, h = int(parents[i]), h - 1
+        path.append(v)
+    path.reverse()
+    return path
+
+def hop_constrained_shortest_path(graph, source, target, max_connections):
+    """
+    Rota mais curta (km) entre source e target com no máximo
+    `max_connections` conexões (trechos), ou um RouteResult vazio.
+    """
+    routes = pareto_routes(graph, source, target, max_connections)
+    return routes[-1] if routes else RouteResult('pareto')
+
+# K caminhos mais curtos sem ciclos (Yen)
+def k_shortest_paths(graph, source, target, k):
+    """
+    Os k caminhos mais curtos sem ciclos entre source e target (algoritmo de
+    Yen), como uma lista de RouteResult ('yen') em ordem de custo.
+
+    Cada desvio do caminho anterior (nó de desvio i, caminho raiz até ele)
+    proíbe os nós da raiz e as arestas que saem do nó de desvio pelos
+    caminhos já aceitos com a mesma raiz. Em vez de copiar o grafo, os
+    bloqueios são máscaras (nós e posições de arestas do CSR) ligadas e
+    desligadas a cada busca. A árvore de caminhos mínimos com raiz no
+    destino (shortest_path_tree) serve duas vezes: se o caminho da árvore a
+    partir do nó de desvio não toca nada bloqueado ele já é o melhor desvio,
+    sem busca; senão a distância da árvore até o destino é o potencial do
+    A* (admissível, pois bloquear só aumenta distâncias). Desvios anteriores
+    ao ponto em que o caminho anterior saiu do seu pai não são refeitos
+    (prefixo compartilhado, modificação de Lawler).
+
+    stats de cada rota: 'spur_searches' (buscas A* feitas até ela),
+    'tree_hits' (desvios resolvidos pela árvore) e 'settled'.
+    """
+    csr = as_csr(graph)
+    if k <= 0 or source not in csr or target not in csr:
+        return []
+    s, t = csr.index[source], csr.index[target]
+    tree = shortest_path_tree(csr, target)
+    if tree.dist[s] == float('inf'):
+        return []
+
+    weights = csr._weights
+    blocked_node = [False] * len(csr)
+    allowed_edge = [True] * len(csr._indices)
+    counters = {'spur_searches': 0, 'tree_hits': 0, 'settled': 0}
+
+    first = tree.path_to(s)[::-1]
+    accepted = [(first, 0)]  # (caminho, índice do nó de desvio)
+    candidates = []
+    seen = {tuple(first)}
+    results = [_yen_result(csr, first, counters)]
+
+    while len(results) < k:
+        previous, deviation = accepted[-1]
+        prefix_cost = 0.0
+        for i in range(len(previous) - 1):
+            spur = previous[i]
+            root = previous[:i + 1]
+            if i >= deviation:
+                # Bloqueia a raiz e as arestas já usadas a partir dela
+                blocked = [_edge_index(csr, spur, path[i + 1]) for path, _ in accepted
+                           if len(path) > i + 1 and path[:i + 1] == root]
+                for node in root[:-1]:
+                    blocked_node[node] = True
+                for e in blocked:
+                    allowed_edge[e] = False
+
+                spur_path = _spur_path(csr, tree, spur, t, blocked_node, allowed_edge, counters)
+
+                for node in root[:-1]:
+                    blocked_node[node] = False
+                for e in blocked:
+                    allowed_edge[e] = True
+
+                if spur_path:
+                    path = root[:-1] + spur_path
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        cost = prefix_cost + sum(_edge_weight(csr, u, v) for u, v in zip(spur_path, spur_path[1:]))
+                        heapq.heappush(candidates, (cost, path, i))
+            prefix_cost += _edge_weight(csr, spur, previous[i + 1])
+
+        if not candidates:
+            break
+        _, path, deviation = heapq.heappop(candidates)
+        accepted.append((path, deviation))
+        results.append(_yen_result(csr, path, counters))
+    return results
+
+def _yen_result(csr, path, counters):
+    path_weights = [_edge_weight(csr, u, v) for u, v in zip(path, path[1:])]
+    return _route_result(csr, 'yen', path, path_weights, dict(counters))
+
+def _edge_index(csr, u, v):
+    # Posição da aresta u -> v nos vetores do CSR
+    indices = csr._indices
+    for e in range(csr._indptr[u], csr._indptr[u + 1]):
+        if indices[e] == v:
+            return e
+    raise KeyError((u, v))
+
+def _spur_path(csr, tree, spur, t, blocked_node, allowed_edge, counters):
+    """
+    Caminho mais curto de spur até t sem nós bloqueados nem arestas
+    proibidas, ou [] se não houver. Primeiro tenta o caminho da árvore com
+    raiz em t; senão roda A* com a distância da árvore como potencial.
+    """
+    dist_to_t, tree_parent = tree.dist, tree.parent
+    inf = float('inf')
+    if dist_to_t[spur] == inf:
+        return []
+
+    # Caminho da árvore: válido se nenhum nó está bloqueado e a primeira aresta é permitida
+    path = tree.path_to(spur)[::-1]
+    if len(path) > 1 and allowed_edge[_edge_index(csr, spur, path[1])] \
+            and not any(blocked_node[v] for v in path):
+        counters['tree_hits'] += 1
+        return path
+
+    counters['spur_searches'] += 1
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    dist = {spur: 0}
+    parent = {spur: -1}
+    heap = [(dist_to_t[spur], 0, spur)]
+    while heap:
+        _, current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        counters['settled'] += 1
+        if u == t:
+            return _walk_parents(parent, t)
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            if not allowed_edge[e] or blocked_node[v] or dist_to_t[v] == inf:
+                continue
+            new_dist = current_dist + weights[e]
+            if new_dist < dist.get(v, inf):
+                dist[v] = new_dist
+                parent[v] = u
+                heapq.heappush(heap, (new_dist + dist_to_t[v], new_dist, v))
+    return []
+
+# Índice espacial (KD-tree) dos aeroportos, guardado no cache do CSR
+def get_spatial_index(graph, routed=False):
+    """
+    SpatialIndex com as coordenadas dos aeroportos; com `routed`, só os que
+    têm pelo menos uma rota (os únicos úteis como origem ou destino).
+    """
+    csr = as_csr(graph)
+    key = 'spatial_routed' if routed else 'spatial'
+    index = csr.cache.get(key)
+    if index is None:
+        nodes = np.flatnonzero(np.diff(csr.indptr) > 0) if routed else np.arange(len(csr))
+        index = SpatialIndex(csr.lat[nodes], csr.lon[nodes], nodes)
+        csr.cache[key] = index
+    return index
+
+def nearest_airports(graph, lat, lon, k=1, routed=False):
+    """Os k aeroportos mais próximos de (lat, lon): lista de (id, distância em km)."""
+    csr = as_csr(graph)
+    nodes, dist = get_spatial_index(graph, routed).nearest(lat, lon, k)
+    return list(zip(csr.ids[nodes].tolist(), dist.tolist()))
+
+def airports_within(graph, lat, lon, radius_km, routed=False):
+    """Aeroportos a até radius_km de (lat, lon): lista de (id, distância em km)."""
+    csr = as_csr(graph)
+    nodes, dist = get_spatial_index(graph, routed).within(lat, lon, radius_km)
+    return list(zip(csr.ids[nodes].tolist(), dist.tolist()))
+
+# Índice de busca (typeahead) por nome e códigos IATA/ICAO
+def get_search_index(graph):
+    """
+    AirportSearch do grafo, montado uma vez e guardado no cache do grafo
+    carregado (alterações de rotas não mudam nomes nem códigos). Os códigos
+    vêm de airports_min.csv quando o grafo é o carregado do disco; o número
+    de rotas de cada aeroporto desempata os resultados.
+    """
+    csr = as_csr(graph)
+    base = csr.cache.get('base', csr)
+    index = base.cache.get('search')
+    if index is None:
+        iata = icao = None
+        if base is CSR:
+            airports = pd.read_csv(airports_file, keep_default_na=False)
+            if 'iata' in airports.columns and 'icao' in airports.columns:
+                position = pd.Index(airports['id']).get_indexer(base.ids)
+                iata = [airports['iata'].iat[p] if p >= 0 else '' for p in position]
+                icao = [airports['icao'].iat[p] if p >= 0 else '' for p in position]
+        index = AirportSearch(base.names, iata, icao, np.diff(base.indptr).tolist())
+        base.cache['search'] = index
+    return index
+
+def search_airports(graph, query, limit=SEARCH_LIMIT):
+    """Ids dos até `limit` aeroportos que mais combinam com `query` (nome, IATA ou ICAO)."""
+    csr = as_csr(graph)
+    return [csr._ids[i] for i in get_search_index(graph).search(query, limit)]
+
+# Quantos aeroportos próximos de cada coordenada entram na rota por coordenadas
+COORDINATE_CANDIDATES = 3
+
+# Rota entre duas coordenadas quaisquer (cidade, clique no mapa...)
+def coordinate_route(graph, source_lat, source_lon, target_lat, target_lon,
+                     candidates=COORDINATE_CANDIDATES):
+    """
+    Rota de uma coordenada a outra pelos aeroportos mais próximos. Os
+    `candidates` aeroportos com rotas mais próximos da origem entram no heap
+    com o trecho por terra (distância do grande círculo) como distância
+    inicial, e o Dijkstra para quando nenhum caminho pode melhorar o melhor
+    total até um dos aeroportos próximos do destino (mais o trecho final).
+
+    Retorna um RouteResult com os aeroportos do caminho; `total` inclui os
+    trechos por terra, que ficam em stats['access_km'] e stats['egress_km'].
+    """
+    csr = as_csr(graph)
+    index = get_spatial_index(graph, routed=True)
+    if len(index) == 0:
+        return RouteResult('coordinates')
+    origins, access = index.nearest(source_lat, source_lon, candidates)
+    exits, egress = index.nearest(target_lat, target_lon, candidates)
+    egress_of = dict(zip(exits.tolist(), egress.tolist()))
+
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    inf = float('inf')
+    dist = [inf] * len(csr)
+    parent = [-1] * len(csr)
+    heap = []
+    for node, d in zip(origins.tolist(), access.tolist()):
+        if d < dist[node]:
+            dist[node] = d
+            heap.append((d, node))
+    heapq.heapify(heap)
+
+    best, best_exit, settled = inf, -1, 0
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d >= best:
+            break
+        settled += 1
+        if u in egress_of and d + egress_of[u] < best:
+            best, best_exit = d + egress_of[u], u
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            new_dist = d + weights[e]
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parent[v] = u
+                heapq.heappush(heap, (new_dist, v))
+
+    if best_exit < 0:
+        return RouteResult('coordinates', stats={'settled': settled})
+    path = _walk_parents(parent, best_exit)
+    path_weights = [_edge_weight(csr, u, v) for u, v in zip(path, path[1:])]
+    result = _route_result(csr, 'coordinates', path, path_weights, {
+        'settled': settled,
+        'access_km': dist[path[0]],
+        'egress_km': egress_of[best_exit],
+    })
+    result.total = best
+    return result
+
+# Atualizações dinâmicas: rotas abertas, fechadas ou com peso novo. Uma de
+# cada vez (o lock é reentrante porque sync_route_updates as chama com ele)
+_update_lock = threading.RLock()
+
+def _update_route(graph, source, target, weight):
+    """
+    Troca o peso da rota source-target (None remove) no grafo em uso. Para um
+    nx.Graph (como o G da aplicação) a alteração é feita no próprio objeto e
+    o CSR novo é trocado em graph.graph['csr'] (attach_csr); a MST e as
+    árvores de caminhos mínimos em cache são reparadas incrementalmente
+    (dynamic.apply_update), em cópias: quem ainda usa o CSR antigo não é
+    afetado.
+    A versão do grafo muda, então o cache de rotas e a figura base são
+    refeitos. Retorna o CSRGraph novo.
+    """
+    with _update_lock:
+        csr = as_csr(graph)
+        for node in (source, target):
+            if node not in csr:
+                raise KeyError(f"Aeroporto {node} não está no grafo")
+        if source == target:
+            raise ValueError("Origem e destino da rota devem ser diferentes")
+
+        u, v = csr.index[source], csr.index[target]
+        new_csr, old_w = apply_update(csr, u, v, weight)
+        if old_w is None and weight is None:
+            raise KeyError(f"Rota {source}-{target} não existe")
+        if isinstance(graph, nx.Graph):
+            # Os nós não mudam, então o carimbo de versão continua o mesmo e
+            # a troca do CSR é uma única atribuição
+            if weight is None:
+                graph.remove_edge(source, target)
+            else:
+                graph.add_edge(source, target, weight=weight)
+            attach_csr(graph, new_csr)
+    logger.debug("rota %s-%s: peso %s -> %s", source, target, old_w, weight)
+    return new_csr
+
+def _route_length(csr, source, target):
+    """Distância haversine da rota (arredondada em 2 casas, como no processamento)."""
+    s, t = csr.index[source], csr.index[target]
+    return round(float(haversine_km(csr.lat[s], csr.lon[s], csr.lat[t], csr.lon[t])), 2)
+
+def add_route(graph, source, target, weight=None):
+    """
+    Abre a rota source-target. Sem `weight`, o peso é a distância haversine
+    entre os aeroportos (arredondada em 2 casas, como no processamento).
+    """
+    csr = as_csr(graph)
+    if weight is None and source in csr and target in csr:
+        weight = _route_length(csr, source, target)
+    return _update_route(graph, source, target, None if weight is None else float(weight))
+
+def set_route_weight(graph, source, target, weight):
+    """Muda o peso de uma rota existente (ou a cria)."""
+    return _update_route(graph, source, target, float(weight))
+
+def remove_route(graph, source, target):
+    """Fecha a rota source-target (KeyError se ela não existir)."""
+    return _update_route(graph, source, target, None)
+
+ROUTE_UPDATES = {'add': add_route, 'set': set_route_weight, 'remove': remove_route}
+
+# Registro das alterações feitas pela API (/api/routes), uma linha JSON por
+# alteração e um arquivo por versão dos dados (snapshot.journal_file). Cada
+# processo da aplicação aplica ao seu G as linhas novas antes de atender uma
+# requisição (sync_route_updates): todos os processos aplicam as mesmas
+# alterações na mesma ordem, e um processo novo refaz as da versão atual ao
+# subir. Registros de outras versões são apagados (snapshot.prune_journals)
+_journal = {'offset': 0}
+
+def sync_route_updates():
+    """
+    Aplica ao G, na ordem do registro, as alterações que este processo ainda
+    não aplicou. Linhas de outra versão dos dados (impressão digital do grafo
+    carregado diferente) são ignoradas; alterações que falham (por exemplo,
+    fechar uma rota que outra alteração já fechou) são puladas, do mesmo
+    jeito em todos os processos. Retorna {id: None ou a exceção} das linhas
+    aplicadas nesta chamada.
+    """
+    try:
+        info = os.stat(route_updates_file)
+    except OSError:
+        return {}
+    # Arquivo apagado por um processo com outra versão dos dados e criado de
+    # novo: tem só linhas novas, lidas desde o início
+    if info.st_ino != _journal.get('inode', info.st_ino):
+        _journal['offset'] = 0
+    _journal['inode'] = info.st_ino
+    if info.st_size <= _journal['offset']:
+        return {}
+    outcomes = {}
+    with _update_lock:
+        with open(route_updates_file, 'rb') as f:
+            f.seek(_journal['offset'])
+            data = f.read()
+        # Uma linha ainda incompleta fica para a próxima chamada
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines(keepends=True):
+            _journal['offset'] += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or entry.get('base') != CSR.fingerprint():
+                continue
+            try:
+                update = ROUTE_UPDATES[entry['op']]
+                args = (entry['weight'],) if entry['op'] != 'remove' else ()
+                update(G, entry['source'], entry['target'], *args)
+                outcomes[entry.get('id')] = None
+            except (KeyError, ValueError, TypeError) as e:
+                outcomes[entry.get('id')] = e
+    return outcomes
+
+def publish_route_update(op, source, target, weight=None):
+    """
+    Alteração de rota no G da aplicação que vale para todos os processos:
+    grava a linha no registro e a aplica com sync_route_updates. `op` é
+    'add', 'set' ou 'remove'. Retorna o CSRGraph novo; KeyError ou
+    ValueError como add_route/set_route_weight/remove_route.
+    """
+    if op not in ROUTE_UPDATES:
+        raise ValueError(f"Operação desconhecida: {op}")
+    csr = as_csr(G)
+    for node in (source, target):
+        if node not in csr:
+            raise KeyError(f"Aeroporto {node} não está no grafo")
+    if source == target:
+        raise ValueError("Origem e destino da rota devem ser diferentes")
+    if op == 'add' and weight is None:
+        weight = _route_length(csr, source, target)
+
+    entry = {'id': uuid.uuid4().hex, 'base': CSR.fingerprint(), 'op': op,
+             'source': source, 'target': target, 'weight': weight}
+    with _update_lock:
+        # Uma única escrita em modo append: linhas de processos diferentes
+        # não se misturam
+        with open(route_updates_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        error = sync_route_updates().get(entry['id'])
+        if error is not None:
+            raise error
+        return as_csr(G)
+
+# Multigrafo dirigido das rotas (um trecho por companhia aérea)
+def get_route_multigraph(graph):
+    """
+    Retorna o RouteMultiGraph do grafo. Para o grafo principal (G) ele é
+    montado a partir de routes_min.csv na primeira consulta e guardado no
+    cache do CSR; depois de alterações dinâmicas (add_route etc.) os trechos
+    do grafo carregado recebem as mesmas alterações, na mesma ordem. Outros
+    grafos precisam receber o RouteMultiGraph pronto.
+    """
+    if isinstance(graph, RouteMultiGraph):
+        return graph
+    csr = as_csr(graph)
+    multigraph = csr.cache.get('multigraph')
+    if multigraph is None:
+        # Grafos alterados dinamicamente mantêm os nós do grafo carregado
+        base = csr.cache.get('base', csr)
+        if base is not CSR:
+            raise ValueError("grafo sem trechos por companhia; passe um RouteMultiGraph")
+        multigraph = base.cache.get('multigraph')
+        if multigraph is None:
+            multigraph = base.cache['multigraph'] = RouteMultiGraph.from_csv(base, routes_file)
+        for u, v, weight in csr.cache.get('route_updates', ()):
+            multigraph = multigraph.with_route(csr, u, v, weight)
+        csr.cache['multigraph'] = multigraph
+    return multigraph
+
+# Dijkstra no multigrafo dirigido, com filtro de companhias e de escalas
+def directed_shortest_path(graph, source, target, airlines=None, nonstop=False):
+    """
+    Caminho mínimo respeitando o sentido de cada trecho de routes.dat,
+    opcionalmente só com as companhias de `airlines` (ids) e/ou só com voos
+    sem escalas (`nonstop`). O filtro é uma máscara sobre os vetores de
+    arestas consultada no laço do Dijkstra, então a busca custa o mesmo com
+    ou sem restrição. Retorna um RouteResult; result.airlines traz a
+    companhia de cada trecho.
+    """
+    multigraph = get_route_multigraph(graph)
+    csr = multigraph.csr
+    if source not in csr or target not in csr:
+        return RouteResult('directed')
+
+    indptr, indices, weights = multigraph._indptr, multigraph._indices, multigraph._weights
+    mask = multigraph.edge_mask(airlines, nonstop)
+    inf = float('inf')
+    s, t = csr.index[source], csr.index[target]
+
+    dist = [inf] * len(csr)
+    dist[s] = 0
+    parent = [-1] * len(csr)
+    parent_edge = [-1] * len(csr)
+    heap = [(0, s)]
+    settled = 0
+
+    while heap:
+        current_dist, u = heapq.heappop(heap)
+        if current_dist > dist[u]:
+            continue
+        settled += 1
+        if u == t:
+            break
+        for e in range(indptr[u], indptr[u + 1]):
+            # Trecho fora do filtro (companhia ou escalas)
+            if not mask[e]:
+                continue
+            v = indices[e]
+            new_dist = current_dist + weights[e]
+            if new_dist < dist[v]:
+                dist[v] = new_dist
+                parent[v] = u
+                parent_edge[v] = e
+                heapq.heappush(heap, (new_dist, v))
+
+    stats = {'settled': settled}
+    if dist[t] == inf:
+        logger.debug("directed: nenhum caminho encontrado")
+        return RouteResult('directed', stats=stats)
+
+    path = _walk_parents(parent, t)
+    legs = [parent_edge[v] for v in path[1:]]
+    result = _route_result(csr, 'directed', path, [weights[e] for e in legs], stats)
+    result.airlines = multigraph.airline[legs].tolist()
+    return result
+
+# Matriz de distâncias de várias origens para vários destinos
+def distance_matrix(graph, sources, targets, processes=None):
+    """
+    Retorna uma matriz NumPy (len(sources) x len(targets)) com as distâncias
+    mínimas em km; np.inf quando não há caminho ou o aeroporto não existe.
+    Roda um único Dijkstra por origem, que para assim que todos os destinos
+    forem alcançados. Se houver tabela de todos os pares carregada, a matriz
+    sai direto dela. Com `processes` > 1, as origens são divididas entre os
+    processos de um pool de longa duração que leem o grafo de memória
+    compartilhada (ver batch.GraphPool).
+    """
+    csr = as_csr(graph)
+    matrix = np.full((len(sources), len(targets)), np.inf)
+    rows = [i for i, source in enumerate(sources) if source in csr]
+    cols = [j for j, target in enumerate(targets) if target in csr]
+    if not rows or not cols:
+        return matrix
+    source_idx = [csr.index[sources[i]] for i in rows]
+    target_idx = [csr.index[targets[j]] for j in cols]
+
+    table = csr.cache.get('apsp')
+    if table is not None:
+        matrix[np.ix_(rows, cols)] = table.distances(source_idx, target_idx)
+        return matrix
+
+    if processes and processes > 1 and len(source_idx) > 1:
+        matrix[np.ix_(rows, cols)] = parallel_distance_rows(csr, source_idx, target_idx, processes)
+    else:
+        matrix[np.ix_(rows, cols)] = _distance_rows(csr, source_idx, target_idx)
+    return matrix
+
+def _distance_rows(csr, source_idx, target_idx):
+    """Linhas da matriz de distâncias para as origens dadas (índices internos)."""
+    values = np.empty((len(source_idx), len(target_idx)))
+    targets = set(target_idx)
+    for row, s in enumerate(source_idx):
+        dist = _dijkstra_csr(csr, s, targets=targets)[0]
+        values[row] = [dist[t] for t in target_idx]
+    return values
+
+# Motor padrão da MST, configurável pela variável de ambiente MST_ENGINE
+MST_ENGINE = os.environ.get("MST_ENGINE", "kruskal")
+
+# MST calculada uma vez por versão do grafo
+def get_mst_index(graph, engine=None):
+    """
+    Retorna o MSTIndex (MST + índice de LCA) do grafo, calculado uma única
+    vez e guardado no cache do CSR. Como o CSR é recriado quando o grafo
+    muda, o cache acompanha a versão do grafo.
+
+    `engine` escolhe o algoritmo da MST ('kruskal', 'prim' ou 'boruvka', ver
+    mst.MST_ENGINES); sem ele vale a MST em cache ou, se não houver,
+    MST_ENGINE. Pedir outro motor explicitamente recalcula a MST.
+    """
+    csr = as_csr(graph)
+    index = csr.cache.get('mst')
+    if index is None or (engine is not None and index.engine != engine):
+        index = MSTIndex.build(csr, engine or MST_ENGINE)
+        csr.cache['mst'] = index
+    return index
 
 # Algoritmo de Kruskal - Árvore Geradora Mínima
+@cached_route('kruskal')
 def kruskal_mst_path(graph, source, target):
     """
-    Implementa o algoritmo de Kruskal para encontrar a Árvore Geradora Mínima (MST)
-    e depois encontra um caminho entre source e target na MST.
-    Retorna o caminho e o custo total.
+    Usa a Árvore Geradora Mínima (MST) de Kruskal, calculada uma vez por versão
+    do grafo, e encontra o caminho entre source e target na MST via LCA
+    (binary lifting), em O(log n) + tamanho do caminho.
+    Retorna um RouteResult; stats['mst_weight'] traz o peso total da MST.
     """
+    csr = as_csr(graph)
     
     # Verifica se os nós existem
-    if source not in graph or target not in graph:
-        return [], float('inf')
+    if source not in csr or target not in csr:
+        return RouteResult('kruskal')
     
     # Se source == target, retorna caminho trivial
     if source == target:
-        return [source], 0
-    
-    # Classe para Union-Find (Disjoint Set Union)
-    class UnionFind:
-        def __init__(self, nodes):
-            self.parent = {node: node for node in nodes}
-            self.rank = {node: 0 for node in nodes}
-        
-        def find(self, x):
-            if self.parent[x] != x:
-                self.parent[x] = self.find(self.parent[x])
-            return self.parent[x]
-        
-        def union(self, x, y):
-            px, py = self.find(x), self.find(y)
-            if px == py:
-                return False
-            if self.rank[px] < self.rank[py]:
-                px, py = py, px
-            self.parent[py] = px
-            if self.rank[px] == self.rank[py]:
-                self.rank[px] += 1
-            return True
+        return RouteResult('kruskal', [source], [], 0)
     
-    # Cria lista de todas as arestas com pesos
-    edges = []
-    for u, v, data in graph.edges(data=True):
-        weight = data.get('weight', 1)
-        edges.append((weight, u, v))
+    index = get_mst_index(csr)
+    path, path_weights = index.path(csr.index[source], csr.index[target])
+    stats = {'mst_weight': index.mst_weight}
     
-    # Ordena arestas por peso (menor para maior)
-    edges.sort()
+    if not path:
+        logger.debug("kruskal: nenhum caminho encontrado na MST")
+        return RouteResult('kruskal', stats=stats)
     
-    # Aplica Kruskal para construir MST
-    uf = UnionFind(graph.nodes())
-    mst_edges = []
-    mst_weight = 0
-    
-    for weight, u, v in edges:
-        if uf.union(u, v):
-            mst_edges.append((u, v, weight))
-            mst_weight += weight
-            if len(mst_edges) == len(graph.nodes()) - 1:
-                break
-    
-    # Constrói grafo da MST
-    mst_graph = nx.Graph()
-    mst_graph.add_nodes_from(graph.nodes(data=True))
-    for u, v, weight in mst_edges:
-        mst_graph.add_edge(u, v, weight=weight)
-    
-    # Encontra caminho na MST usando BFS
-    try:
-        path = nx.shortest_path(mst_graph, source, target)
-        
-        # Calcula custo total do caminho
-        total_cost = 0
-        for i in range(len(path) - 1):
-            u, v = path[i], path[i+1]
-            total_cost += mst_graph[u][v].get('weight', 1)
-        
-        # ---- Impressão das arestas percorridas e seus custos ----
-        print("\n=== Caminho Kruskal (MST) ===")
-        print(f"Peso total da MST: {mst_weight:.2f} km")
-        for i in range(len(path) - 1):
-            u, v = path[i], path[i+1]
-            w = mst_graph[u][v].get('weight', 1)
-            print(f"Aresta: {graph.nodes[u]['name']} -> {graph.nodes[v]['name']} | Custo: {w} km")
-        print(f"Custo total do caminho: {total_cost:.2f} km\n")
-        
-        return path, total_cost
-        
-    except nx.NetworkXNoPath:
-        print("Nenhum caminho encontrado na MST.")
-        return [], float('inf')
+    return _route_result(csr, 'kruskal', path, path_weights, stats)
 
 # Algoritmo de Kruskal - Árvore Geradora Mínima completa
-def kruskal_full_mst(graph):
+def kruskal_full_mst(graph, engine=None):
     """
-    Implementa o algoritmo de Kruskal para construir toda a Árvore Geradora Mínima (MST).
-    Retorna a MST como um grafo NetworkX e o peso total.
+    Retorna toda a Árvore Geradora Mínima (MST) de Kruskal como um MSTResult
+    (grafo NetworkX, peso total e número de arestas). A MST fica em cache por
+    versão do grafo, então chamadas repetidas não refazem o Kruskal.
+    `engine` troca o algoritmo da MST (ver get_mst_index).
     """
-    
-    # Classe para Union-Find (Disjoint Set Union)
-    class UnionFind:
-        def __init__(self, nodes):
-            self.parent = {node: node for node in nodes}
-            self.rank = {node: 0 for node in nodes}
-        
-        def find(self, x):
-            if self.parent[x] != x:
-                self.parent[x] = self.find(self.parent[x])
-            return self.parent[x]
-        
-        def union(self, x, y):
-            px, py = self.find(x), self.find(y)
-            if px == py:
-                return False
-            if self.rank[px] < self.rank[py]:
-                px, py = py, px
-            self.parent[py] = px
-            if self.rank[px] == self.rank[py]:
-                self.rank[px] += 1
-            return True
-    
-    # Cria lista de todas as arestas com pesos
-    edges = []
-    for u, v, data in graph.edges(data=True):
-        weight = data.get('weight', 1)
-        edges.append((weight, u, v))
-    
-    # Ordena arestas por peso (menor para maior)
-    edges.sort()
-    
-    # Aplica Kruskal para construir MST
-    uf = UnionFind(graph.nodes())
-    mst_edges = []
-    mst_weight = 0
-    
-    for weight, u, v in edges:
-        if uf.union(u, v):
-            mst_edges.append((u, v, weight))
-            mst_weight += weight
-            if len(mst_edges) == len(graph.nodes()) - 1:
-                break
-    
-    # Constrói grafo da MST
-    mst_graph = nx.Graph()
-    mst_graph.add_nodes_from(graph.nodes(data=True))
-    for u, v, weight in mst_edges:
-        mst_graph.add_edge(u, v, weight=weight)
-    
-    print(f"\n=== MST Completa (Kruskal) ===")
-    print(f"Número de arestas na MST: {len(mst_edges)}")
-    print(f"Peso total da MST: {mst_weight:.2f} km")
-    print(f"Número de nós conectados: {len(mst_graph.nodes())}\n")
-    
-    return mst_graph, mst_weight
+    index = get_mst_index(graph, engine)
+    logger.debug("%s: MST com %d arestas, peso total %.2f km",
+                 index.engine, len(index.mst_edges), index.mst_weight)
+    return MSTResult(index.mst_graph, index.mst_weight, len(index.mst_edges))
 
 # carregar dados e criar grafo
 # Determina o diretório do script atual e constrói o caminho correto
 script_dir = os.path.dirname(os.path.abspath(__file__))
-data_dir = os.path.join(os.path.dirname(script_dir), "data")
+# Diretório dos dados processados, configurável por AIRPORT_DATA_DIR (os
+# testes apontam para uma cópia temporária)
+data_dir = os.environ.get("AIRPORT_DATA_DIR") or os.path.join(os.path.dirname(script_dir), "data")
 airports_file = os.path.join(data_dir, "airports_min.csv")
 routes_file = os.path.join(data_dir, "routes_min.csv")
+ch_file = os.path.join(data_dir, "ch_hierarchy.npz")
+hub_file = os.path.join(data_dir, "hub_labels.bin")
+apsp_file = os.path.join(data_dir, "apsp_table.bin")
+snapshot_file = os.path.join(data_dir, "graph_snapshot.npz")
+# Modelo do nome do registro de alterações de rotas; o arquivo usado leva a
+# impressão digital do grafo carregado (ver abaixo)
+route_updates_template = os.environ.get("ROUTE_UPDATES_FILE") or os.path.join(data_dir, "route_updates.jsonl")
 
 if not os.path.exists(airports_file) or not os.path.exists(routes_file):
     raise FileNotFoundError("Certifique-se de que os arquivos CSV estão em ../data/")
 
-airports_df = pd.read_csv(airports_file)
-routes_df = pd.read_csv(routes_file)
+# cria grafo compacto (CSR) com pesos reais (distance_km), usado pelos algoritmos;
+# vem do snapshot binário se ele corresponder aos CSVs atuais
+CSR = load_graph(airports_file, routes_file, snapshot_file)
+
+# nx.Graph equivalente, usado na visualização; guarda o CSR para os algoritmos
+# (as rotas só mudam por add_route/set_route_weight/remove_route)
+G = attach_csr(CSR.to_networkx(), CSR)
+CSR.cache['base'] = CSR
 
-# cria grafo com pesos reais (distance_km)
-G = nx.Graph()
-for _, row in airports_df.iterrows():
-    G.add_node(row['id'], name=row['name'], lat=row['lat'], lon=row['lon'])
+# tabela de todos os pares (gerada no processamento de dados), mapeada em
+# memória; só é usada se corresponder à versão atual do grafo
+apsp_table = AllPairsTable.load(apsp_file, CSR.fingerprint())
+if apsp_table is not None:
+    CSR.cache['apsp'] = apsp_table
 
-for _, row in routes_df.iterrows():
-    if row['src_id'] in G.nodes and row['dst_id'] in G.nodes:
-        # Usar distance_km como peso das arestas
-        weight = row.get('distance_km', 1)  # Usa 1 como fallback se não houver distance_km
-        G.add_edge(row['src_id'], row['dst_id'], weight=weight)
\ No newline at end of file
+# alterações de rotas feitas pela API antes deste processo subir, para esta
+# versão dos dados; registros de versões anteriores são descartados
+route_updates_file = journal_file(route_updates_template, CSR.fingerprint())
+prune_journals(route_updates_template, CSR.fingerprint())
+sync_route_updates()
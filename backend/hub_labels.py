@@ -0,0 +1,172 @@
+import heapq
+import time
+import numpy as np
+from binary_file import header_dtype, section_offsets, write_sections, read_header
+
+# Cabeçalho do arquivo dos rótulos (ver binary_file): número de nós, total de
+# entradas dos rótulos e tempo de construção (s)
+HUB_MAGIC = b'HUBL'
+HUB_FORMAT_VERSION = 1
+HEADER_DTYPE = header_dtype(('num_nodes', '<u8'), ('num_entries', '<u8'), ('build_seconds', '<f8'))
+
+
+class HubLabels:
+    """
+    Oráculo de distâncias por rotulagem de hubs (2-hop labeling): cada nó v
+    guarda um rótulo L(v) com pares (hub, distância de v ao hub), e a
+    distância entre s e t é o menor d(s, h) + d(h, t) entre os hubs comuns
+    de L(s) e L(t). Os rótulos cobrem todos os caminhos mínimos, então a
+    resposta é a distância mínima e só custa a interseção de dois vetores
+    ordenados, sem busca no grafo. A soma d(s, h) + d(h, t) agrupa os pesos
+    em outra ordem que a do Dijkstra, então o valor pode diferir do dele no
+    último bit (erro relativo da ordem de 1e-15; os testes aceitam 1e-9).
+
+    Os rótulos ficam em formato CSR: `indptr` (início do rótulo de cada nó),
+    `hubs` (rank do hub, int32, em ordem crescente dentro de cada rótulo) e
+    `dists` (float64). `order[r]` é o nó com rank r.
+    """
+
+    def __init__(self, order, indptr, hubs, dists, build_seconds=0.0):
+        self.order = np.asarray(order, dtype=np.int32)
+        self.indptr = indptr
+        self.hubs = hubs
+        self.dists = dists
+        self.build_seconds = build_seconds
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_entries(self):
+        return len(self.hubs)
+
+    @classmethod
+    def build(cls, csr):
+        """
+        Pruned landmark labeling: os nós são processados em ordem de grau
+        decrescente (aeroportos centrais primeiro) e cada um roda um Dijkstra
+        podado. Ao tirar u do heap com distância d, se os rótulos já
+        construídos respondem dist(raiz, u) <= d o caminho já está coberto e
+        a busca não passa por u; senão a raiz entra no rótulo de u. Como as
+        raízes entram em ordem de rank, cada rótulo já sai ordenado.
+        """
+        start = time.perf_counter()
+        n = len(csr)
+        indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+        degree = np.diff(csr.indptr)
+        order = np.lexsort((np.arange(n), -degree)).tolist()
+
+        label_hubs = [[] for _ in range(n)]
+        label_dists = [[] for _ in range(n)]
+        inf = float('inf')
+        root_dist = [inf] * n  # rótulo da raiz atual, indexado pelo rank do hub
+        dist = [inf] * n
+
+        for rank, root in enumerate(order):
+            for h, d in zip(label_hubs[root], label_dists[root]):
+                root_dist[h] = d
+            dist[root] = 0
+            heap = [(0, root)]
+            visited = [root]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                # Poda: os hubs anteriores já dão um caminho tão curto quanto d
+                covered = inf
+                for h, dh in zip(label_hubs[u], label_dists[u]):
+                    total = root_dist[h] + dh
+                    if total < covered:
+                        covered = total
+                if covered <= d:
+                    continue
+                label_hubs[u].append(rank)
+                label_dists[u].append(d)
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = indices[e]
+                    new_dist = d + weights[e]
+                    if new_dist < dist[v]:
+                        if dist[v] == inf:
+                            visited.append(v)
+                        dist[v] = new_dist
+                        heapq.heappush(heap, (new_dist, v))
+            # Limpa só o que foi tocado nesta busca
+            for v in visited:
+                dist[v] = inf
+            for h in label_hubs[root]:
+                root_dist[h] = inf
+
+        sizes = np.fromiter((len(label) for label in label_hubs), dtype=np.int64, count=n)
+        label_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(sizes, out=label_indptr[1:])
+        hubs = np.fromiter((h for label in label_hubs for h in label), dtype=np.int32,
+                           count=int(label_indptr[-1]))
+        dists = np.fromiter((d for label in label_dists for d in label), dtype=np.float64,
+                            count=int(label_indptr[-1]))
+        return cls(order, label_indptr, hubs, dists, time.perf_counter() - start)
+
+    def distance(self, s, t):
+        """Distância mínima entre os índices s e t (inf se não houver caminho)."""
+        if s == t:
+            return 0.0
+        a0, a1 = self.indptr[s], self.indptr[s + 1]
+        b0, b1 = self.indptr[t], self.indptr[t + 1]
+        _, i, j = np.intersect1d(self.hubs[a0:a1], self.hubs[b0:b1],
+                                 assume_unique=True, return_indices=True)
+        if not len(i):
+            return float('inf')
+        return float((self.dists[a0:a1][i] + self.dists[b0:b1][j]).min())
+
+    def stats(self):
+        """Tamanho dos rótulos e tempo de construção."""
+        sizes = np.diff(self.indptr)
+        return {
+            'nodes': len(self),
+            'entries': self.num_entries,
+            'avg_label': float(sizes.mean()) if len(sizes) else 0.0,
+            'max_label': int(sizes.max()) if len(sizes) else 0,
+            'bytes': int(self.order.nbytes + self.indptr.nbytes + self.hubs.nbytes + self.dists.nbytes),
+            'build_seconds': self.build_seconds,
+        }
+
+    def save(self, path, fingerprint):
+        """
+        Grava cabeçalho, order, indptr, hubs e dists em um único arquivo
+        binário, com cada seção alinhada para poder ser mapeada em memória.
+        """
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = HUB_MAGIC
+        header['version'] = HUB_FORMAT_VERSION
+        header['num_nodes'] = len(self)
+        header['num_entries'] = self.num_entries
+        header['build_seconds'] = self.build_seconds
+        header['fingerprint'] = fingerprint.encode()
+
+        write_sections(path, header, _section_offsets(len(self), self.num_entries),
+                       (self.order, self.indptr, self.hubs, self.dists))
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """
+        Mapeia os rótulos de `path` em memória (somente leitura). Retorna None
+        se o arquivo não existir, for de outra versão ou de outro grafo.
+        """
+        header = read_header(path, HEADER_DTYPE, HUB_MAGIC, HUB_FORMAT_VERSION, fingerprint)
+        if header is None:
+            return None
+        n, entries = int(header['num_nodes']), int(header['num_entries'])
+        order_offset, indptr_offset, hubs_offset, dists_offset = _section_offsets(n, entries)
+        order = np.fromfile(path, dtype=np.int32, count=n, offset=order_offset)
+        indptr = np.memmap(path, dtype=np.int64, mode='r', offset=indptr_offset, shape=(n + 1,))
+        if entries:
+            hubs = np.memmap(path, dtype=np.int32, mode='r', offset=hubs_offset, shape=(entries,))
+            dists = np.memmap(path, dtype=np.float64, mode='r', offset=dists_offset, shape=(entries,))
+        else:
+            hubs, dists = np.zeros(0, dtype=np.int32), np.zeros(0)
+        return cls(order, indptr, hubs, dists, float(header['build_seconds']))
+
+
+def _section_offsets(num_nodes, num_entries):
+    """Offsets (em bytes) das seções order, indptr, hubs e dists no arquivo."""
+    return section_offsets(HEADER_DTYPE, (4 * num_nodes, 8 * (num_nodes + 1),
+                                          4 * num_entries, 8 * num_entries))
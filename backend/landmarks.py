@@ -0,0 +1,68 @@
+import numpy as np
+from dynamic import ShortestPathTree
+
+
+class Landmarks:
+    """
+    Pré-processamento ALT (A*, Landmarks, desigualdade Triangular): para
+    alguns aeroportos-marco L, `dist[i]` guarda a distância mínima de L_i a
+    todos os nós. Pela desigualdade triangular, |d(L, t) - d(L, v)| <= d(v, t)
+    para qualquer marco, e o maior desses valores é uma heurística
+    admissível e consistente para o A*, que (ao contrário da distância em
+    linha reta) enxerga desvios obrigatórios por hubs.
+
+    Os marcos são escolhidos pelo ponto mais distante dentro do componente
+    do aeroporto de maior grau: o primeiro é o nó mais longe dele e cada
+    novo marco é o nó mais longe de todos os já escolhidos. Em componentes
+    sem marco a heurística vale 0 (o A* vira Dijkstra, e eles são pequenos).
+    A seleção é gulosa e determinística, então os k primeiros marcos de uma
+    construção com mais marcos são os mesmos de uma construção com k.
+    """
+
+    def __init__(self, landmarks, dist, requested=None):
+        self.landmarks = list(landmarks)
+        self.dist = dist
+        # Quantos marcos foram pedidos (o grafo pode ter menos candidatos)
+        self.requested = len(self.landmarks) if requested is None else requested
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    @classmethod
+    def build(cls, csr, count):
+        n = len(csr)
+        candidates = np.diff(csr.indptr) > 0
+        if not candidates.any() or count <= 0:
+            return cls([], np.zeros((0, n)), count)
+
+        # Primeiro marco: o nó mais distante do nó de maior grau
+        start = int(np.argmax(np.diff(csr.indptr)))
+        nearest = np.asarray(ShortestPathTree.build(csr, start).dist)
+        landmarks, rows = [], []
+        while len(landmarks) < count:
+            score = np.where(candidates & np.isfinite(nearest), nearest, -1.0)
+            score[landmarks] = -1.0
+            chosen = int(np.argmax(score))
+            if score[chosen] < 0:
+                break
+            row = np.asarray(ShortestPathTree.build(csr, chosen).dist)
+            landmarks.append(chosen)
+            rows.append(row)
+            nearest = row if len(landmarks) == 1 else np.minimum(nearest, row)
+        return cls(landmarks, np.vstack(rows), count)
+
+    def lower_bounds_to(self, t, count=None):
+        """
+        Limite inferior da distância de cada nó até o índice t (lista Python)
+        usando os `count` primeiros marcos (todos, sem count). inf para nós
+        que um marco mostra estarem em outro componente que t.
+        """
+        dist = self.dist[:count] if count is not None else self.dist
+        if not len(dist):
+            return [0.0] * self.dist.shape[1]
+        to_t = dist[:, t:t + 1]
+        with np.errstate(invalid='ignore'):
+            bound = np.abs(to_t - dist)
+        # Marco que não alcança nem v nem t não diz nada (inf - inf)
+        bound[np.isnan(bound)] = 0.0
+        return bound.max(axis=0).tolist()
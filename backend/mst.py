@@ -0,0 +1,292 @@
+import heapq
+from collections import deque
+import numpy as np
+import networkx as nx
+
+
+# Union-Find (Disjoint Set Union) sobre índices inteiros 0..n-1
+class UnionFind:
+    """
+    Conjuntos disjuntos dos inteiros 0..n-1 em vetores (`parent` e `size`),
+    com união por tamanho e busca iterativa com path halving (cada nó
+    visitado passa a apontar para o avô), sem recursão.
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        px, py = self.find(x), self.find(y)
+        if px == py:
+            return False
+        if self.size[px] < self.size[py]:
+            px, py = py, px
+        self.parent[py] = px
+        self.size[px] += self.size[py]
+        return True
+
+
+def kruskal_edges(csr):
+    """
+    Algoritmo de Kruskal sobre os vetores de arestas do CSR.
+    Retorna a lista de arestas da MST (u, v, peso) em índices internos e o
+    peso total. Em grafos desconexos o resultado é a floresta geradora mínima.
+    """
+    # Ordena arestas por peso (menor para maior) direto nos vetores do grafo
+    order = np.argsort(csr.edge_w, kind='stable')
+    edges = zip(csr.edge_w[order].tolist(), csr.edge_u[order].tolist(), csr.edge_v[order].tolist())
+
+    # Aplica Kruskal para construir MST
+    n = len(csr)
+    uf = UnionFind(n)
+    mst_edges = []
+    mst_weight = 0
+
+    for weight, u, v in edges:
+        if uf.union(u, v):
+            mst_edges.append((u, v, weight))
+            mst_weight += weight
+            if len(mst_edges) == n - 1:
+                break
+
+    return mst_edges, mst_weight
+
+
+def prim_edges(csr):
+    """
+    Algoritmo de Prim com heap (versão preguiçosa: entradas velhas do heap
+    são descartadas ao sair) sobre as listas de adjacência do CSR. Recomeça
+    em cada nó ainda fora da árvore, então também gera a floresta em grafos
+    desconexos. Mesmo retorno de kruskal_edges.
+    """
+    indptr, indices, weights = csr._indptr, csr._indices, csr._weights
+    n = len(csr)
+    in_tree = [False] * n
+    mst_edges = []
+    mst_weight = 0
+
+    for root in range(n):
+        if in_tree[root]:
+            continue
+        in_tree[root] = True
+        heap = [(weights[e], root, indices[e]) for e in range(indptr[root], indptr[root + 1])]
+        heapq.heapify(heap)
+        while heap:
+            weight, u, v = heapq.heappop(heap)
+            if in_tree[v]:
+                continue
+            in_tree[v] = True
+            mst_edges.append((u, v, weight))
+            mst_weight += weight
+            for e in range(indptr[v], indptr[v + 1]):
+                if not in_tree[indices[e]]:
+                    heapq.heappush(heap, (weights[e], v, indices[e]))
+
+    return mst_edges, mst_weight
+
+
+def boruvka_edges(csr):
+    """
+    Algoritmo de Borůvka: a cada rodada, cada componente escolhe a aresta
+    mais leve que sai dele e todas as escolhidas entram na árvore; o número
+    de componentes cai pelo menos pela metade por rodada. A busca da aresta
+    mais leve de todos os componentes é uma única passada vetorizada
+    (np.minimum.at sobre o rank das arestas); só a união das arestas
+    escolhidas usa o UnionFind. Empates de peso são desfeitos pelo rank
+    (ordem estável por peso), o que evita ciclos. Mesmo retorno de
+    kruskal_edges.
+    """
+    n = len(csr)
+    order = np.argsort(csr.edge_w, kind='stable')
+    # Arestas em ordem de peso: o índice no vetor é o rank
+    edge_u, edge_v, edge_w = csr.edge_u[order], csr.edge_v[order], csr.edge_w[order]
+    rank = np.arange(len(order))
+    comp = np.arange(n)
+    uf = UnionFind(n)
+    mst_edges = []
+    mst_weight = 0
+
+    while True:
+        cu, cv = comp[edge_u], comp[edge_v]
+        crossing = cu != cv
+        # Arestas internas a um componente nunca mais servem
+        edge_u, edge_v, edge_w, rank = edge_u[crossing], edge_v[crossing], edge_w[crossing], rank[crossing]
+        cu, cv = cu[crossing], cv[crossing]
+        if not len(rank):
+            break
+
+        # Aresta mais leve (menor rank) saindo de cada componente
+        cheapest = np.full(n, len(order), dtype=np.int64)
+        np.minimum.at(cheapest, cu, rank)
+        np.minimum.at(cheapest, cv, rank)
+        chosen = np.unique(cheapest[cheapest < len(order)])
+        position = np.searchsorted(rank, chosen)
+
+        for u, v, weight in zip(edge_u[position].tolist(), edge_v[position].tolist(),
+                                edge_w[position].tolist()):
+            if uf.union(u, v):
+                mst_edges.append((u, v, weight))
+                mst_weight += weight
+
+        # Novo rótulo de componente de cada nó (a raiz no UnionFind)
+        labels = np.unique(comp)
+        roots = np.array([uf.find(c) for c in labels.tolist()], dtype=np.int64)
+        relabel = np.arange(n)
+        relabel[labels] = roots
+        comp = relabel[comp]
+
+    return mst_edges, mst_weight
+
+
+# Motores de MST disponíveis (mesmo resultado, custos diferentes por tamanho de grafo)
+MST_ENGINES = {
+    'kruskal': kruskal_edges,
+    'prim': prim_edges,
+    'boruvka': boruvka_edges,
+}
+
+
+class MSTIndex:
+    """
+    MST calculada uma vez por versão do grafo, com índice de LCA (binary
+    lifting) para responder caminhos na árvore.
+
+    Cada componente vira uma árvore enraizada: `parent`/`parent_weight` dão o
+    pai de cada nó e o peso da aresta até ele, `depth` a profundidade e
+    `root_dist` a soma dos pesos até a raiz (soma de prefixos). Com a tabela
+    `up[j][v]` (ancestral 2^j de v) o LCA sai em O(log n), o custo do caminho
+    em O(1) e o caminho em O(tamanho do caminho).
+    """
+
+    def __init__(self, csr, mst_edges, mst_weight, engine='kruskal'):
+        self.csr = csr
+        self.mst_edges = mst_edges
+        self.mst_weight = mst_weight
+        self.engine = engine
+        self._mst_graph = None
+
+        n = len(csr)
+        adj = [[] for _ in range(n)]
+        for u, v, weight in mst_edges:
+            adj[u].append((v, weight))
+            adj[v].append((u, weight))
+
+        # Enraiza cada componente com BFS
+        parent = [-1] * n
+        parent_weight = [0.0] * n
+        depth = [0] * n
+        root_dist = [0.0] * n
+        component = [-1] * n
+        for root in range(n):
+            if component[root] != -1:
+                continue
+            component[root] = root
+            parent[root] = root
+            queue = deque([root])
+            while queue:
+                u = queue.popleft()
+                for v, weight in adj[u]:
+                    if component[v] == -1:
+                        component[v] = root
+                        parent[v] = u
+                        parent_weight[v] = weight
+                        depth[v] = depth[u] + 1
+                        root_dist[v] = root_dist[u] + weight
+                        queue.append(v)
+
+        self.parent = parent
+        self.parent_weight = parent_weight
+        self.depth = depth
+        self.root_dist = root_dist
+        self.component = component
+
+        # Tabela de binary lifting montada em NumPy, nível a nível
+        levels = max(1, (max(depth) if depth else 0).bit_length())
+        up = np.empty((levels, n), dtype=np.int64)
+        up[0] = parent
+        for j in range(1, levels):
+            up[j] = up[j - 1][up[j - 1]]
+        self.up = up.tolist()
+
+    @classmethod
+    def build(cls, csr, engine='kruskal'):
+        """MSTIndex calculado com o motor `engine` (chave de MST_ENGINES)."""
+        if engine not in MST_ENGINES:
+            raise ValueError(f"Motor de MST desconhecido: {engine}")
+        mst_edges, mst_weight = MST_ENGINES[engine](csr)
+        return cls(csr, mst_edges, mst_weight, engine)
+
+    def lca(self, s, t):
+        """Menor ancestral comum de s e t (mesmo componente)."""
+        depth, up = self.depth, self.up
+        if depth[s] < depth[t]:
+            s, t = t, s
+        # Sobe s até a profundidade de t
+        diff = depth[s] - depth[t]
+        j = 0
+        while diff:
+            if diff & 1:
+                s = up[j][s]
+            diff >>= 1
+            j += 1
+        if s == t:
+            return s
+        for j in range(len(up) - 1, -1, -1):
+            if up[j][s] != up[j][t]:
+                s, t = up[j][s], up[j][t]
+        return up[0][s]
+
+    def distance(self, s, t):
+        """Custo do caminho entre s e t na MST (inf se em componentes diferentes)."""
+        if self.component[s] != self.component[t]:
+            return float('inf')
+        a = self.lca(s, t)
+        return self.root_dist[s] + self.root_dist[t] - 2 * self.root_dist[a]
+
+    def path(self, s, t):
+        """
+        Caminho na MST entre os índices s e t e os pesos de cada aresta.
+        Retorna ([], []) se estiverem em componentes diferentes.
+        """
+        if self.component[s] != self.component[t]:
+            return [], []
+        a = self.lca(s, t)
+        parent, parent_weight = self.parent, self.parent_weight
+
+        # s sobe até o LCA; t sobe até o LCA e é invertido no final
+        left, left_weights = [s], []
+        while left[-1] != a:
+            left_weights.append(parent_weight[left[-1]])
+            left.append(parent[left[-1]])
+        right, right_weights = [t], []
+        while right[-1] != a:
+            right_weights.append(parent_weight[right[-1]])
+            right.append(parent[right[-1]])
+
+        path = left + right[-2::-1]
+        weights = left_weights + right_weights[::-1]
+        return path, weights
+
+    @property
+    def mst_graph(self):
+        """MST como nx.Graph com os ids reais (usado na visualização)."""
+        if self._mst_graph is None:
+            csr = self.csr
+            ids = csr.path_ids(range(len(csr)))
+            mst_graph = nx.Graph()
+            mst_graph.add_nodes_from(
+                (ids[i], {'name': csr.names[i], 'lat': csr.lat[i], 'lon': csr.lon[i]})
+                for i in range(len(csr))
+            )
+            for u, v, weight in self.mst_edges:
+                mst_graph.add_edge(ids[u], ids[v], weight=weight)
+            self._mst_graph = mst_graph
+        return self._mst_graph
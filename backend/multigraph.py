@@ -0,0 +1,125 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Quantas máscaras de arestas (combinações de filtro) ficam guardadas
+MASK_CACHE_SIZE = 32
+
+
+class RouteMultiGraph:
+    """
+    Multigrafo dirigido das rotas: uma aresta por trecho de routes.dat
+    (origem -> destino, por companhia aérea), em formato CSR e com os mesmos
+    índices de nós do CSRGraph `csr` (ids, nomes e coordenadas vêm dele).
+
+    Os atributos de cada aresta ficam em vetores paralelos tipados, na mesma
+    ordem de `indices`: `weights` (km), `airline` (id da companhia, int32, -1
+    sem id) e `stops` (escalas, int8). Restringir uma consulta a algumas
+    companhias ou a voos sem escalas é só uma máscara booleana sobre esses
+    vetores (edge_mask), sem copiar o grafo.
+    """
+
+    def __init__(self, csr, leg_src, leg_dst, leg_w, leg_airline, leg_stops):
+        self.csr = csr
+        n = len(csr)
+        leg_src = np.asarray(leg_src, dtype=np.int64)
+        order = np.argsort(leg_src, kind='stable')
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(leg_src, minlength=n), out=self.indptr[1:])
+        self.indices = np.asarray(leg_dst, dtype=np.int32)[order]
+        self.weights = np.asarray(leg_w, dtype=np.float64)[order]
+        self.airline = np.asarray(leg_airline, dtype=np.int32)[order]
+        self.stops = np.clip(np.asarray(leg_stops), 0, 127).astype(np.int8)[order]
+
+        # Cópias em listas Python para o laço quente, como no CSRGraph
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+        self._masks = OrderedDict()
+
+    @classmethod
+    def from_dataframe(cls, csr, routes_df):
+        """
+        Constrói o multigrafo a partir do DataFrame de rotas (src_id, dst_id,
+        airline_id, stops, distance_km); trechos com aeroportos fora do `csr`
+        são descartados. Sem as colunas opcionais, airline_id vale -1, stops 0
+        e o peso 1.
+        """
+        position = pd.Index(csr.ids)
+        src = position.get_indexer(routes_df['src_id'])
+        dst = position.get_indexer(routes_df['dst_id'])
+        valid = (src >= 0) & (dst >= 0)
+
+        def column(name, default, dtype):
+            if name in routes_df.columns:
+                return routes_df[name].to_numpy(dtype=dtype)[valid]
+            return np.full(int(valid.sum()), default, dtype=dtype)
+
+        return cls(
+            csr, src[valid], dst[valid],
+            column('distance_km', 1.0, np.float64),
+            column('airline_id', -1, np.int64),
+            column('stops', 0, np.int64),
+        )
+
+    @classmethod
+    def from_csv(cls, csr, routes_file):
+        return cls.from_dataframe(csr, pd.read_csv(routes_file))
+
+    def with_route(self, csr, u, v, weight):
+        """
+        Novo multigrafo sobre `csr` (mesmos nós, grafo já alterado) com a rota
+        u-v (índices internos) trocada como em dynamic.with_edge: None fecha
+        todos os trechos entre u e v, nos dois sentidos; um peso passa a valer
+        para os trechos existentes (em qualquer sentido), e uma rota sem
+        trechos ganha um em cada sentido, sem companhia (-1) e sem escalas.
+        """
+        leg_src = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+        leg_dst = self.indices.astype(np.int64)
+        route = ((leg_src == u) & (leg_dst == v)) | ((leg_src == v) & (leg_dst == u))
+        leg_w, airline, stops = self.weights.copy(), self.airline, self.stops
+        if weight is None:
+            keep = ~route
+            leg_src, leg_dst, leg_w = leg_src[keep], leg_dst[keep], leg_w[keep]
+            airline, stops = airline[keep], stops[keep]
+        elif route.any():
+            leg_w[route] = weight
+        else:
+            leg_src, leg_dst = np.append(leg_src, (u, v)), np.append(leg_dst, (v, u))
+            leg_w = np.append(leg_w, (weight, weight))
+            airline, stops = np.append(airline, (-1, -1)), np.append(stops, (0, 0))
+        return RouteMultiGraph(csr, leg_src, leg_dst, leg_w, airline, stops)
+
+    def __len__(self):
+        return len(self.csr)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def airlines(self):
+        """Ids das companhias presentes no grafo."""
+        return np.unique(self.airline[self.airline >= 0]).tolist()
+
+    def edge_mask(self, airlines=None, nonstop=False):
+        """
+        Lista de booleanos (uma por aresta do CSR) com as arestas permitidas:
+        só das companhias em `airlines` (None = todas) e, com `nonstop`, só
+        trechos sem escalas. As últimas máscaras usadas ficam em cache.
+        """
+        key = (frozenset(airlines) if airlines is not None else None, bool(nonstop))
+        mask = self._masks.get(key)
+        if mask is None:
+            allowed = np.ones(self.num_edges, dtype=bool)
+            if airlines is not None:
+                allowed &= np.isin(self.airline, np.fromiter(key[0], dtype=np.int32, count=len(key[0])))
+            if nonstop:
+                allowed &= self.stops == 0
+            mask = allowed.tolist()
+            self._masks[key] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        else:
+            self._masks.move_to_end(key)
+        return mask
@@ -0,0 +1,65 @@
+class RouteResult:
+    """
+    Resultado de uma consulta de rota: caminho (ids dos aeroportos), peso de
+    cada aresta do caminho, custo total e estatísticas da busca (por exemplo
+    stats['settled'], o número de nós visitados). Sem caminho, `path` e
+    `weights` ficam vazios, `total` é infinito e o objeto é falso em contexto
+    booleano. No multigrafo dirigido, `airlines` traz o id da companhia de
+    cada trecho.
+
+    Os algoritmos não imprimem nada; a formatação fica com quem chama.
+    """
+
+    __slots__ = ('algorithm', 'path', 'weights', 'total', 'stats', 'airlines')
+
+    def __init__(self, algorithm, path=None, weights=None, total=float('inf'), stats=None,
+                 airlines=None):
+        self.algorithm = algorithm
+        self.path = path if path is not None else []
+        self.weights = weights if weights is not None else []
+        self.total = total
+        self.stats = stats if stats is not None else {}
+        self.airlines = airlines if airlines is not None else []
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    @property
+    def connections(self):
+        """Número de conexões (arestas) do caminho."""
+        return max(len(self.path) - 1, 0)
+
+    def copy(self):
+        """Cópia independente (listas e stats próprios)."""
+        return RouteResult(self.algorithm, list(self.path), list(self.weights),
+                           self.total, dict(self.stats), list(self.airlines))
+
+    def reversed(self):
+        """Mesma rota no sentido contrário (o grafo é não-direcionado)."""
+        return RouteResult(self.algorithm, self.path[::-1], self.weights[::-1],
+                           self.total, dict(self.stats), self.airlines[::-1])
+
+    def __bool__(self):
+        return self.found
+
+    def __repr__(self):
+        return (f"RouteResult(algorithm={self.algorithm!r}, path={self.path!r}, "
+                f"total={self.total!r}, stats={self.stats!r})")
+
+
+class MSTResult:
+    """
+    Resultado da MST completa: a árvore como nx.Graph (ids reais), o peso
+    total e o número de arestas.
+    """
+
+    __slots__ = ('graph', 'total', 'num_edges')
+
+    def __init__(self, graph, total, num_edges):
+        self.graph = graph
+        self.total = total
+        self.num_edges = num_edges
+
+    def __repr__(self):
+        return f"MSTResult(num_edges={self.num_edges!r}, total={self.total!r})"
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Cache LRU (com validade opcional) de resultados de rotas, com chave
+    (versão do grafo, algoritmo, origem, destino).
+
+    O grafo é não-direcionado, então a rota de t para s é a de s para t
+    invertida: as duas consultas usam a mesma entrada, guardada com os ids em
+    ordem crescente. A versão faz parte da chave, então consultas de versões
+    diferentes do grafo (por exemplo, um processo que ainda usa o grafo
+    anterior) convivem sem apagar as entradas umas das outras; as de versões
+    que deixaram de ser usadas saem pelo LRU.
+
+    O cache guarda a sua própria cópia de cada resultado e devolve sempre uma
+    cópia: quem chama pode alterar o RouteResult recebido sem afetar o cache.
+
+    `maxsize` limita o número de entradas (0 desliga o cache) e `ttl` é a
+    validade em segundos (None ou 0 = sem validade). Os contadores ficam em
+    `stats()`.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, version, algorithm, source, target, compute):
+        """
+        Retorna o resultado da rota em cache ou chama `compute()` (sem
+        argumentos, rota de source para target) e guarda o resultado.
+        `source` e `target` precisam ser ids comparáveis entre si (os dois do
+        grafo): quem chama filtra ids desconhecidos antes (graph.cached_route).
+        """
+        if self.maxsize <= 0:
+            return compute()
+
+        swap = target < source
+        key = (version, algorithm, target, source) if swap else (version, algorithm, source, target)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].reversed() if swap else entry[0].copy()
+            self.misses += 1
+
+        # A busca roda fora do lock para não segurar outras consultas
+        result = compute()
+        stored = result.reversed() if swap else result.copy()
+
+        with self._lock:
+            self._entries[key] = (stored, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def invalidate(self):
+        """Descarta todas as entradas (por exemplo, para liberar memória)."""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def stats(self):
+        """Contadores do cache, para inspeção em tempo de execução."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
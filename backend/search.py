@@ -0,0 +1,137 @@
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+import numpy as np
+
+# Quantos resultados a busca devolve por padrão
+SEARCH_LIMIT = 10
+# Fração mínima dos trigramas da consulta que um nome precisa ter na busca aproximada
+TRIGRAM_MIN_SHARE = 0.5
+
+
+def normalize(text):
+    """
+    Texto para comparação: sem acentos, em minúsculas e só com letras e
+    dígitos separados por espaço ("São Paulo/Congonhas" -> "sao paulo congonhas").
+    """
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return ' '.join(re.findall(r'[0-9a-z]+', text))
+
+
+def trigrams(text):
+    """Trigramas do texto normalizado, com espaço nas pontas de cada palavra."""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class AirportSearch:
+    """
+    Índice de busca incremental (typeahead) dos aeroportos por nome e pelos
+    códigos IATA/ICAO, insensível a acentos e maiúsculas.
+
+    - Prefixos: lista ordenada de (palavra, aeroporto) com todas as palavras
+      dos nomes e os códigos; as palavras que começam com um prefixo formam
+      um intervalo contíguo, achado com bisect. Cada palavra da consulta
+      precisa ser prefixo de alguma palavra do aeroporto.
+    - Trigramas: trigrama -> vetor de aeroportos, usado quando a busca por
+      prefixo não acha nada (erros de digitação, trechos do meio da
+      palavra); a contagem de trigramas em comum é um np.bincount.
+
+    Os resultados são ordenados por relevância (código exato, nome começando
+    pela consulta, prefixo de palavra, trigramas) e depois por `rank`
+    (maior primeiro; por exemplo o número de rotas do aeroporto) e nome.
+    Cada grupo sai de um intervalo ou vetor já pronto, então nem consultas
+    de uma letra percorrem os aeroportos em Python.
+    """
+
+    def __init__(self, names, iata=None, icao=None, rank=None):
+        n = len(names)
+        iata = list(iata) if iata is not None else [''] * n
+        icao = list(icao) if icao is not None else [''] * n
+        rank = list(rank) if rank is not None else [0] * n
+        self.names = [normalize(name) for name in names]
+
+        # Posição de cada aeroporto na ordem de desempate (rank, nome)
+        tiebreak = sorted(range(n), key=lambda i: (-rank[i], self.names[i]))
+        self.order = np.empty(n, dtype=np.int64)
+        self.order[tiebreak] = np.arange(n)
+
+        entries = set()
+        self.code_owners = defaultdict(list)
+        gram_index = defaultdict(list)
+        for i, (name, a, b) in enumerate(zip(self.names, iata, icao)):
+            codes = {normalize(code) for code in (a, b)} - {''}
+            for code in codes:
+                self.code_owners[code].append(i)
+            for word in set(name.split()) | codes:
+                entries.add((word, i))
+            for gram in trigrams(name) | set().union(*(trigrams(code) for code in codes)):
+                gram_index[gram].append(i)
+
+        entries = sorted(entries)
+        self.words = [word for word, _ in entries]
+        self.owners = np.array([i for _, i in entries], dtype=np.int64)
+        by_name = sorted(range(n), key=lambda i: self.names[i])
+        self.sorted_names = [self.names[i] for i in by_name]
+        self.name_owners = np.array(by_name, dtype=np.int64)
+        self.grams = {gram: np.array(owners, dtype=np.int64) for gram, owners in gram_index.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _range(keys, prefix):
+        # Intervalo [lo, hi) das chaves ordenadas que começam com `prefix`
+        return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + '\uffff')
+
+    def _best(self, ids, limit):
+        # Os `limit` primeiros de `ids` na ordem de desempate
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) > limit:
+            ids = ids[np.argpartition(self.order[ids], limit)[:limit]]
+        return ids[np.argsort(self.order[ids])].tolist()
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Posições (0..n-1) dos até `limit` aeroportos mais relevantes para `query`."""
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        matches = None
+        for word in query.split():
+            lo, hi = self._range(self.words, word)
+            found = np.unique(self.owners[lo:hi])
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+            if not len(matches):
+                break
+
+        if len(matches):
+            # Código exato, nome começando pela consulta, depois o resto
+            lo, hi = self._range(self.sorted_names, query)
+            groups = (self.code_owners.get(query, []), self.name_owners[lo:hi], matches)
+        else:
+            # Sem prefixo: aeroportos que compartilham mais trigramas
+            grams = trigrams(query)
+            owners = [self.grams[gram] for gram in grams if gram in self.grams]
+            if not owners:
+                return []
+            shared = np.bincount(np.concatenate(owners), minlength=len(self))
+            needed = max(1, int(len(grams) * TRIGRAM_MIN_SHARE))
+            candidates = np.flatnonzero(shared >= needed)
+            best = candidates[np.lexsort((self.order[candidates], -shared[candidates]))]
+            return best[:limit].tolist()
+
+        result, seen = [], set()
+        for group in groups:
+            for i in self._best(group, limit + len(result)):
+                if i not in seen:
+                    seen.add(i)
+                    result.append(i)
+            if len(result) >= limit:
+                break
+        return result[:limit]
@@ -0,0 +1,105 @@
+import glob
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from csr_graph import CSRGraph
+from binary_file import atomic_write
+
+# Versão do formato do snapshot; mudar quando os campos gravados mudarem
+SNAPSHOT_VERSION = 1
+
+
+def file_hash(path):
+    """
+    Hash sha256 (hex) do conteúdo de um arquivo, lido em blocos.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_snapshot(csr, path, source_files):
+    """
+    Grava o grafo em `path` (.npz sem compressão, para carregar rápido):
+    versão do formato, hashes dos CSVs de origem, vetores dos nós (ids,
+    nomes, lat, lon) e das arestas (u, v, peso). O arquivo é trocado de uma
+    vez (atomic_write): processos que sobem ao mesmo tempo e também regravam
+    o snapshot não leem um arquivo pela metade.
+    """
+    source_hashes = np.array([file_hash(f) for f in source_files])
+    with atomic_write(path) as f:
+        np.savez(
+            f,
+            version=np.array(SNAPSHOT_VERSION),
+            source_hashes=source_hashes,
+            ids=csr.ids,
+            names=np.array(csr.names, dtype=str),
+            lat=csr.lat,
+            lon=csr.lon,
+            edge_u=csr.edge_u,
+            edge_v=csr.edge_v,
+            edge_w=csr.edge_w,
+        )
+
+
+def load_snapshot(path, source_files):
+    """
+    Carrega o grafo de `path`. Retorna None se o snapshot não existir, for de
+    outra versão do formato ou tiver sido gerado a partir de CSVs diferentes
+    dos atuais.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if data['version'].item() != SNAPSHOT_VERSION:
+            return None
+        if data['source_hashes'].tolist() != [file_hash(f) for f in source_files]:
+            return None
+        return CSRGraph(
+            data['ids'], data['names'].tolist(), data['lat'], data['lon'],
+            data['edge_u'], data['edge_v'], data['edge_w'],
+        )
+
+
+def load_graph(airports_file, routes_file, snapshot_file):
+    """
+    Retorna o CSRGraph dos CSVs processados, lendo o snapshot binário quando
+    ele corresponde aos CSVs atuais. Caso contrário lê os CSVs, monta o grafo
+    e regrava o snapshot.
+    """
+    source_files = (airports_file, routes_file)
+    csr = load_snapshot(snapshot_file, source_files)
+    if csr is None:
+        csr = CSRGraph.from_dataframes(pd.read_csv(airports_file), pd.read_csv(routes_file))
+        write_snapshot(csr, snapshot_file, source_files)
+    return csr
+
+
+def journal_file(template, fingerprint):
+    """
+    Caminho do registro de alterações de rotas da versão `fingerprint` do
+    grafo: `template` com um sufixo da impressão digital
+    (route_updates.jsonl -> route_updates-<impressão>.jsonl). Quando os dados
+    mudam, o registro novo começa vazio.
+    """
+    root, ext = os.path.splitext(template)
+    return f"{root}-{fingerprint[:16]}{ext}"
+
+
+def prune_journals(template, fingerprint):
+    """
+    Apaga os registros de alterações de outras versões do grafo, que nenhum
+    processo com os dados atuais vai aplicar. Um arquivo que não pode ser
+    apagado agora (aberto em outro processo, no Windows) fica para a próxima.
+    """
+    current = journal_file(template, fingerprint)
+    root, ext = os.path.splitext(template)
+    for path in glob.glob(glob.escape(root) + '-*' + glob.escape(ext)):
+        if path != current:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,155 @@
+import heapq
+import numpy as np
+from geo import EARTH_RADIUS_KM
+
+# Máximo de pontos em uma folha da árvore (comparados de uma vez com NumPy)
+LEAF_SIZE = 16
+
+
+def unit_vectors(lat, lon):
+    """Vetores unitários 3D (x, y, z) das coordenadas em graus."""
+    phi, lam = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+
+def chord_to_km(chord):
+    """Corda entre vetores unitários -> distância em km sobre a esfera."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+def km_to_chord(km):
+    """Distância em km sobre a esfera -> corda entre vetores unitários."""
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=np.float64) / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class SpatialIndex:
+    """
+    KD-tree sobre os vetores unitários 3D dos aeroportos. Na esfera a
+    distância do grande círculo cresce com a corda (distância euclidiana em
+    3D), então os vizinhos mais próximos pela corda são os mais próximos em
+    km, sem os problemas de lat/lon perto dos polos e da linha de data.
+
+    A árvore fica em vetores NumPy: os pontos são reordenados para que cada
+    nó cubra um intervalo contíguo [start, end) e cada nó guarda sua caixa
+    envolvente (usada para podar a busca) e os filhos. `nodes` são os
+    índices (no CSR) que os pontos representam; as consultas devolvem esses
+    índices e as distâncias em km.
+    """
+
+    def __init__(self, lat, lon, nodes=None):
+        points = unit_vectors(lat, lon)
+        nodes = np.arange(len(points)) if nodes is None else np.asarray(nodes, dtype=np.int64)
+        order = np.arange(len(points))
+
+        starts, ends, left, right = [], [], [], []
+        box_lo, box_hi = [], []
+        # Construção iterativa: cada item é (nó, start, end) ainda por dividir
+        stack = []
+        def new_node(start, end):
+            starts.append(start)
+            ends.append(end)
+            left.append(-1)
+            right.append(-1)
+            block = points[order[start:end]]
+            box_lo.append(block.min(axis=0) if end > start else np.zeros(3))
+            box_hi.append(block.max(axis=0) if end > start else np.zeros(3))
+            stack.append((len(starts) - 1, start, end))
+            return len(starts) - 1
+
+        new_node(0, len(points))
+        while stack:
+            node, start, end = stack.pop()
+            if end - start <= LEAF_SIZE:
+                continue
+            # Divide pela mediana do eixo com maior extensão
+            axis = int(np.argmax(box_hi[node] - box_lo[node]))
+            mid = (start + end) // 2
+            block = order[start:end]
+            part = np.argpartition(points[block, axis], mid - start)
+            order[start:end] = block[part]
+            left[node] = new_node(start, mid)
+            right[node] = new_node(mid, end)
+
+        self.points = points[order]
+        self.nodes = nodes[order]
+        self.start = starts
+        self.end = ends
+        self.left = left
+        self.right = right
+        self.box_lo = np.array(box_lo)
+        self.box_hi = np.array(box_hi)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _box_dist2(self, node, q):
+        # Quadrado da distância de q até a caixa do nó (0 se estiver dentro)
+        gap = np.maximum(self.box_lo[node] - q, 0) + np.maximum(q - self.box_hi[node], 0)
+        return float(gap @ gap)
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Os k pontos mais próximos de (lat, lon): (índices, distâncias em km),
+        do mais próximo para o mais distante. Busca best-first: as folhas são
+        visitadas em ordem de distância da caixa e a busca para quando a
+        caixa mais próxima restante está além do k-ésimo melhor ponto.
+        Com k <= 0 ou o índice vazio, devolve vetores vazios.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        q = unit_vectors([lat], [lon])[0]
+        best = []  # heap de (-dist², posição) com os k melhores
+        frontier = [(0.0, 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            if self.left[node] < 0:
+                start, end = self.start[node], self.end[node]
+                diff = self.points[start:end] - q
+                dist2 = np.einsum('ij,ij->i', diff, diff)
+                for i, d in zip(range(start, end), dist2.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i))
+                continue
+            for child in (self.left[node], self.right[node]):
+                heapq.heappush(frontier, (self._box_dist2(child, q), child))
+
+        best.sort(reverse=True)
+        positions = np.array([i for _, i in best], dtype=np.int64)
+        chords = np.sqrt(np.maximum([-d for d, _ in best], 0))
+        return self.nodes[positions], chord_to_km(chords)
+
+    def within(self, lat, lon, radius_km):
+        """
+        Todos os pontos a até radius_km de (lat, lon): (índices, distâncias
+        em km), ordenados pela distância. Subárvores cuja caixa está fora do
+        raio são descartadas inteiras. Com radius_km < 0, devolve vetores vazios.
+        """
+        if radius_km < 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        q = unit_vectors([lat], [lon])[0]
+        r2 = float(km_to_chord(radius_km)) ** 2
+        found, found_d2 = [], []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_dist2(node, q) > r2:
+                continue
+            if self.left[node] < 0:
+                start, end = self.start[node], self.end[node]
+                diff = self.points[start:end] - q
+                dist2 = np.einsum('ij,ij->i', diff, diff)
+                inside = np.flatnonzero(dist2 <= r2)
+                found.append(inside + start)
+                found_d2.append(dist2[inside])
+                continue
+            stack.extend((self.left[node], self.right[node]))
+
+        positions = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        dist2 = np.concatenate(found_d2) if found_d2 else np.zeros(0)
+        order = np.argsort(dist2, kind='stable')
+        return self.nodes[positions[order]], chord_to_km(np.sqrt(dist2[order]))
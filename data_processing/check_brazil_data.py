@@ -1,8 +1,12 @@
+import os
 import pandas as pd
 
+# Diretório dos dados processados (AIRPORT_DATA_DIR, como no main.py e no backend)
+DATA_DIR = os.environ.get('AIRPORT_DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
 # Carrega e verifica os dados processados
-routes = pd.read_csv('data/routes_min.csv')
-airports = pd.read_csv('data/airports_min.csv')
+routes = pd.read_csv(os.path.join(DATA_DIR, 'routes_min.csv'))
+airports = pd.read_csv(os.path.join(DATA_DIR, 'airports_min.csv'))
 
 print("=== DADOS PROCESSADOS PARA O BRASIL ===")
 print(f"✓ Total de aeroportos brasileiros: {len(airports)}")
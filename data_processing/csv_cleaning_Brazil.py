@@ -1,160 +1,190 @@
 import csv
 import os
+import sys
+import pandas as pd
+from haversine_dist_calc import route_distances
 
-def process_airports_data():
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+
+# Filtro padrão: só aeroportos do Brasil
+DEFAULT_REGIONS = ('BRAZIL',)
+
+AIRPORT_COLUMNS = ['id', 'name', 'lat', 'lon', 'iata', 'icao']
+ROUTE_COLUMNS = ['src_id', 'dst_id', 'airline_id', 'stops', 'distance_km']
+
+
+def parse_regions(text):
+    """
+    Converte uma lista separada por vírgulas ("Brazil,Argentina", "Europe")
+    no filtro de regiões. Vazio usa o padrão (Brasil); "ALL" ou "*" desliga
+    o filtro (mundo todo) e retorna None.
     """
-    Processa o arquivo airports.dat e cria airports_min.csv com apenas aeroportos do Brasil
+    if text is None or not text.strip():
+        return DEFAULT_REGIONS
+    regions = tuple(r.strip().upper() for r in text.split(',') if r.strip())
+    if any(r in ('ALL', '*') for r in regions):
+        return None
+    return regions
+
+
+def _in_regions(regions, country, tz):
+    """
+    Um aeroporto entra no filtro se o país, o fuso do tz database
+    ("America/Sao_Paulo") ou o prefixo do fuso ("America", "Europe") estiver
+    na lista de regiões.
+    """
+    tz = tz.strip().upper()
+    return (country.strip().upper() in regions or tz in regions
+            or tz.split('/')[0] in regions)
+
+
+def iter_airports(input_file, regions=DEFAULT_REGIONS, counts=None):
+    """
+    Lê airports.dat uma única vez, linha a linha, e gera (id, name, lat, lon,
+    iata, icao) dos aeroportos dentro de `regions` (None = sem filtro); os
+    códigos ausentes (\\N) viram string vazia.
     Formato airports.dat: Airport ID,Name,City,Country,IATA,ICAO,Latitude,Longitude,Altitude,Timezone,DST,Tz database time zone,Type,Source
+    Se `counts` for um dicionário, acumula 'airports' e 'airports_skipped'.
     """
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    input_file = os.path.join(base_dir, '..', 'data', 'airports.dat')
-    output_file = os.path.join(base_dir, '..', 'data', 'airports_min.csv')
-    
-    airports_processed = 0
-    airports_skipped = 0
-    
-    try:
-        with open(input_file, 'r', encoding='utf-8') as infile, \
-             open(output_file, 'w', newline='', encoding='utf-8') as outfile:
-            
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
-            
-            # Escrever cabeçalho
-            writer.writerow(['id', 'name', 'lat', 'lon'])
-            
-            for row in reader:
-                if len(row) >= 8:
-                    airport_id = row[0]
-                    name = row[1]
-                    country = row[3]
-                    latitude = row[6]
-                    longitude = row[7]
-                    
-                    # Filtrar apenas aeroportos do Brasil
-                    if country.strip().upper() != 'BRAZIL':
-                        airports_skipped += 1
-                        continue
-                    
-                    # Verificar se lat/lon são válidos
-                    try:
-                        float(latitude)
-                        float(longitude)
-                        writer.writerow([airport_id, name, latitude, longitude])
-                        airports_processed += 1
-                    except ValueError:
-                        print(f"Coordenadas inválidas para aeroporto {airport_id}: lat={latitude}, lon={longitude}")
-                        airports_skipped += 1
-                        continue
-    
-    except FileNotFoundError:
-        print(f"Arquivo {input_file} não encontrado!")
-        return 0, set()
-    except Exception as e:
-        print(f"Erro ao processar airports.dat: {e}")
-        return 0, set()
-    
-    print(f"Processados {airports_processed} aeroportos do Brasil em airports_min.csv")
-    print(f"Ignorados {airports_skipped} aeroportos de outros países")
-    
-    # Retorna também os IDs dos aeroportos brasileiros para usar no filtro de rotas
-    brazilian_airport_ids = set()
-    try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            brazilian_airport_ids = {row['id'] for row in reader}
-    except Exception as e:
-        print(f"Erro ao ler IDs dos aeroportos brasileiros: {e}")
-    
-    return airports_processed, brazilian_airport_ids
-
-def process_routes_data(brazilian_airport_ids):
+    counts = counts if counts is not None else {}
+    with open(input_file, 'r', encoding='utf-8') as infile:
+        for row in csv.reader(infile):
+            if len(row) < 8:
+                continue
+            tz = row[11] if len(row) > 11 else ''
+            if regions is not None and not _in_regions(regions, row[3], tz):
+                counts['airports_skipped'] = counts.get('airports_skipped', 0) + 1
+                continue
+
+            # Verificar se lat/lon são válidos
+            try:
+                latitude, longitude = float(row[6]), float(row[7])
+            except ValueError:
+                print(f"Coordenadas inválidas para aeroporto {row[0]}: lat={row[6]}, lon={row[7]}")
+                counts['airports_skipped'] = counts.get('airports_skipped', 0) + 1
+                continue
+
+            iata, icao = (code.strip() if code.strip() != '\\N' else '' for code in row[4:6])
+            counts['airports'] = counts.get('airports', 0) + 1
+            yield int(row[0]), row[1], latitude, longitude, iata, icao
+
+
+def iter_routes(input_file, coords, counts=None):
     """
-    Processa o arquivo routes.dat e cria routes_min.csv com apenas rotas entre aeroportos brasileiros
+    Lê routes.dat uma única vez e gera (src_id, dst_id, airline_id, stops)
+    de cada trecho dirigido entre aeroportos de `coords` (id -> (lat, lon)):
+    uma linha por companhia aérea, sem repetições (airline_id -1 quando a
+    companhia não tem id). As distâncias são calculadas depois, todas de uma
+    vez (ver ingest).
     Formato routes.dat: Airline,Airline ID,Source airport,Source airport ID,Destination airport,Destination airport ID,Codeshare,Stops,Equipment
+    Se `counts` for um dicionário, acumula 'routes', 'routes_invalid' e
+    'routes_outside'.
     """
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    input_file = os.path.join(base_dir, '..', 'data', 'routes.dat')
-    output_file = os.path.join(base_dir, '..', 'data', 'routes_min.csv')
-    
-    routes_processed = 0
-    invalid_routes = 0
-    non_brazilian_routes = 0
-    
-    try:
-        with open(input_file, 'r', encoding='utf-8') as infile, \
-             open(output_file, 'w', newline='', encoding='utf-8') as outfile:
-            
-            reader = csv.reader(infile)
+    counts = counts if counts is not None else {}
+    unique_routes = set()
+    with open(input_file, 'r', encoding='utf-8') as infile:
+        for row in csv.reader(infile):
+            if len(row) < 6:  # Garantir que temos dados suficientes
+                continue
+            src_airport_id, dst_airport_id = row[3], row[5]
+
+            # Verificar se os IDs são válidos (não são \N e são numéricos)
+            if not (src_airport_id.isdigit() and dst_airport_id.isdigit()):
+                counts['routes_invalid'] = counts.get('routes_invalid', 0) + 1
+                continue
+            src, dst = int(src_airport_id), int(dst_airport_id)
+
+            # Verificar se os dois aeroportos estão no filtro
+            if src not in coords or dst not in coords:
+                counts['routes_outside'] = counts.get('routes_outside', 0) + 1
+                continue
+
+            airline = int(row[1]) if row[1].isdigit() else -1
+            stops = int(row[7]) if len(row) > 7 and row[7].isdigit() else 0
+            if (src, dst, airline) in unique_routes:
+                continue
+            unique_routes.add((src, dst, airline))
+            counts['routes'] = counts.get('routes', 0) + 1
+            yield src, dst, airline, stops
+
+
+def ingest(regions=DEFAULT_REGIONS, data_dir=DATA_DIR, write=True, counts=None):
+    """
+    Pipeline de ingestão em uma passada: airports.dat e routes.dat são lidos
+    uma vez cada e os ids e coordenadas ficam em memória. As distâncias de
+    todas as rotas são calculadas numa única chamada vetorizada
+    (route_distances) depois da leitura. Com `write`, airports_min.csv é
+    gravado enquanto os registros passam e routes_min.csv (já com
+    distance_km) ao final, sem reler nada.
+
+    Retorna os DataFrames de aeroportos (id, name, lat, lon, iata, icao) e rotas
+    (src_id, dst_id, airline_id, stops, distance_km), prontos para
+    CSRGraph.from_dataframes e RouteMultiGraph.from_dataframe.
+    """
+    airports_in = os.path.join(data_dir, 'airports.dat')
+    routes_in = os.path.join(data_dir, 'routes.dat')
+    airports_out = os.path.join(data_dir, 'airports_min.csv')
+    routes_out = os.path.join(data_dir, 'routes_min.csv')
+
+    def emit(records, output_file, header):
+        # Repassa os registros e, se pedido, grava cada um no CSV de saída
+        if not write:
+            yield from records
+            return
+        with open(output_file, 'w', newline='', encoding='utf-8') as outfile:
             writer = csv.writer(outfile)
-            
-            # Escrever cabeçalho
-            writer.writerow(['src_id', 'dst_id'])
-            
-            unique_routes = set()
-            for row in reader:
-                if len(row) >= 6:  # Garantir que temos dados suficientes
-                    src_airport_id = row[3]  # Source airport ID
-                    dst_airport_id = row[5]  # Destination airport ID
-                    
-                    # Verificar se os IDs são válidos (não são \N e são numéricos)
-                    if (src_airport_id != '\\N' and dst_airport_id != '\\N' and 
-                        src_airport_id.isdigit() and dst_airport_id.isdigit()):
-                        
-                        # Verificar se ambos os aeroportos são brasileiros
-                        if (src_airport_id in brazilian_airport_ids and 
-                            dst_airport_id in brazilian_airport_ids):
-                            
-                            route_key = (src_airport_id, dst_airport_id)
-                            if route_key not in unique_routes:
-                                writer.writerow([src_airport_id, dst_airport_id])
-                                unique_routes.add(route_key)
-                                routes_processed += 1
-                        else:
-                            non_brazilian_routes += 1
-                    else:
-                        invalid_routes += 1
-    
-    except FileNotFoundError:
-        print(f"Arquivo {input_file} não encontrado!")
-        return 0
-    except Exception as e:
-        print(f"Erro ao processar routes.dat: {e}")
-        return 0
-    
-    print(f"Processadas {routes_processed} rotas entre aeroportos brasileiros em routes_min.csv")
-    print(f"Ignoradas {invalid_routes} rotas com IDs inválidos")
-    print(f"Ignoradas {non_brazilian_routes} rotas que não são inteiramente brasileiras")
-    return routes_processed
-
-def main():
+            writer.writerow(header)
+            for record in records:
+                writer.writerow(record)
+                yield record
+
+    airports = list(emit(iter_airports(airports_in, regions, counts), airports_out, AIRPORT_COLUMNS))
+    coords = {airport_id: (lat, lon) for airport_id, _, lat, lon, _, _ in airports}
+    airports_df = pd.DataFrame(airports, columns=AIRPORT_COLUMNS)
+    routes_df = pd.DataFrame(list(iter_routes(routes_in, coords, counts)), columns=ROUTE_COLUMNS[:-1])
+    routes_df['distance_km'] = route_distances(airports_df, routes_df['src_id'], routes_df['dst_id'])
+    if write:
+        # Mesmo formato do csv.writer usado para airports_min.csv
+        routes_df.to_csv(routes_out, index=False, lineterminator='\r\n')
+
+    return airports_df, routes_df
+
+
+def main(regions=DEFAULT_REGIONS, data_dir=DATA_DIR):
     """
-    Função principal que executa o processamento dos dados filtrados para o Brasil
+    Função principal que executa o processamento dos dados de `data_dir`
+    filtrados por região (padrão: Brasil) e retorna os DataFrames do grafo.
     """
-    print("Iniciando processamento dos dados de aeroportos e rotas do Brasil...")
+    label = ', '.join(regions) if regions is not None else 'mundo todo'
+    print(f"Iniciando processamento dos dados de aeroportos e rotas ({label})...")
     print("=" * 70)
-    
-    # Processar aeroportos brasileiros
-    print("1. Processando dados de aeroportos brasileiros...")
-    airports_count, brazilian_airport_ids = process_airports_data()
-    
-    if airports_count == 0:
-        print("❌ Erro: Nenhum aeroporto brasileiro foi processado!")
-        return
-    
-    print(f"✓ {len(brazilian_airport_ids)} IDs de aeroportos brasileiros identificados")
-    
-    # Processar rotas entre aeroportos brasileiros
-    print("\n2. Processando rotas entre aeroportos brasileiros...")
-    routes_count = process_routes_data(brazilian_airport_ids)
-    
+
+    counts = {}
+    try:
+        airports_df, routes_df = ingest(regions, data_dir=data_dir, counts=counts)
+    except FileNotFoundError as e:
+        print(f"Arquivo {e.filename} não encontrado!")
+        return None, None
+
+    if airports_df.empty:
+        print("❌ Erro: Nenhum aeroporto foi processado!")
+        return None, None
+
     print("\n" + "=" * 70)
-    print("RESUMO DO PROCESSAMENTO (APENAS BRASIL):")
-    print(f"✓ Aeroportos brasileiros processados: {airports_count}")
-    print(f"✓ Rotas entre aeroportos brasileiros: {routes_count}")
+    print(f"RESUMO DO PROCESSAMENTO ({label}):")
+    print(f"✓ Aeroportos processados: {counts.get('airports', 0)}")
+    print(f"✓ Aeroportos ignorados (fora do filtro ou inválidos): {counts.get('airports_skipped', 0)}")
+    print(f"✓ Trechos processados (por companhia, com distância): {counts.get('routes', 0)}")
+    print(f"✓ Rotas ignoradas com IDs inválidos: {counts.get('routes_invalid', 0)}")
+    print(f"✓ Rotas ignoradas fora do filtro: {counts.get('routes_outside', 0)}")
     print("\nArquivos gerados:")
-    print("- ../data/airports_min.csv (aeroportos do Brasil: id, name, lat, lon)")
-    print("- ../data/routes_min.csv (rotas domésticas brasileiras: src_id, dst_id)")
+    print("- ../data/airports_min.csv (aeroportos: id, name, lat, lon, iata, icao)")
+    print("- ../data/routes_min.csv (rotas: src_id, dst_id, airline_id, stops, distance_km)")
+    return airports_df, routes_df
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Uso (a partir da raiz; backend/ no path por causa do geo.py):
+    # PYTHONPATH=backend python data_processing/csv_cleaning_Brazil.py [regiões],
+    # ex. "Brazil,Argentina", "Europe" ou "ALL"
+    main(parse_regions(sys.argv[1] if len(sys.argv) > 1 else None))
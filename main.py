@@ -1,61 +1,308 @@
 import os
 import sys
+import json
+import runpy
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
-def run_data_processing():
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Diretório dos dados (brutos e processados), configurável por
+# AIRPORT_DATA_DIR como no backend (os testes usam um diretório temporário)
+DATA_DIR = os.environ.get('AIRPORT_DATA_DIR') or os.path.join(BASE_DIR, 'data')
+
+# Adicionar data_processing e backend ao Python path (também vale para os
+# processos que executam os estágios do pipeline)
+sys.path.insert(0, os.path.join(BASE_DIR, 'data_processing'))
+sys.path.insert(0, os.path.join(BASE_DIR, 'backend'))
+
+# Versão do pipeline: mudar quando a lógica de algum estágio mudar, para
+# forçar o reprocessamento de tudo
+PIPELINE_VERSION = 3
+# Manifesto com, para cada estágio, os hashes das entradas e saídas, a versão
+# do pipeline e os parâmetros usados
+MANIFEST_FILE = os.path.join(DATA_DIR, 'pipeline_manifest.json')
+
+
+class Stage:
+    """
+    Estágio do pipeline: função executada, arquivos de entrada e de saída
+    (relativos a data/), parâmetros e estágios dos quais depende. A função
+    recebe um dicionário com o resultado dos estágios dos quais depende
+    (None para os que não precisaram rodar).
+    """
+
+    def __init__(self, name, func, inputs, outputs, params=None, deps=()):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        # Normaliza (tuplas viram listas) para comparar com o manifesto em JSON
+        self.params = json.loads(json.dumps(params or {}))
+        self.deps = tuple(deps)
+
+
+# Estágios: ingestão -> verificação / snapshot -> tabela APSP / hierarquia CH
+def stage_ingest(upstream, regions):
+    # 1. Processar dados brutos em uma passada: filtro de região, rotas e
+    # distâncias (AIRPORT_REGIONS="Brazil,Argentina", "Europe" ou "ALL")
+    from csv_cleaning_Brazil import main as clean_data
+    print("📊 Executando ingestão dos dados (csv_cleaning_Brazil.py)...")
+    airports_df, routes_df = clean_data(regions, data_dir=DATA_DIR)
+    if airports_df is None:
+        raise RuntimeError("nenhum aeroporto foi processado")
+    return airports_df, routes_df
+
+def stage_check(upstream):
+    # 2. Verificar dados processados (opcional)
+    print("\n✅ Verificando dados processados (check_brazil_data.py)...")
+    runpy.run_path(os.path.join(BASE_DIR, 'data_processing', 'check_brazil_data.py'))
+
+def stage_snapshot(upstream):
+    # 3. Gerar snapshot binário do grafo (carregado pelo backend na inicialização)
+    print("\n💾 Gerando snapshot binário do grafo (snapshot.py)...")
+    build_graph_snapshot(*(upstream.get('ingest') or (None, None)))
+
+def stage_all_pairs(upstream):
+    # 4. Pré-calcular tabela de distâncias entre todos os pares de aeroportos
+    print("\n🧮 Pré-calculando tabela de caminhos mínimos entre todos os pares (apsp.py)...")
+    build_all_pairs_table()
+
+def stage_contraction(upstream):
+    # 5. Pré-calcular a Contraction Hierarchy (independente da tabela APSP)
+    print("\n🔺 Pré-calculando a Contraction Hierarchy (contraction.py)...")
+    build_contraction_hierarchy()
+
+def stage_hub_labels(upstream):
+    # 6. Pré-calcular os rótulos de hubs (oráculo de distâncias)
+    print("\n🏷️  Pré-calculando os rótulos de hubs (hub_labels.py)...")
+    build_hub_labels()
+
+def pipeline_stages(regions):
+    """
+    Grafo de estágios do processamento de dados. As distâncias são
+    calculadas dentro da ingestão, então não há estágio separado para elas.
+    """
+    from functools import partial
+    from snapshot import SNAPSHOT_VERSION
+    from apsp import APSP_FORMAT_VERSION
+    from contraction import CH_FORMAT_VERSION, WITNESS_SETTLE_LIMIT
+    from hub_labels import HUB_FORMAT_VERSION
+
+    csvs = ['airports_min.csv', 'routes_min.csv']
+    return [
+        Stage('ingest', partial(stage_ingest, regions=regions), ['airports.dat', 'routes.dat'], csvs,
+              params={'regions': regions}),
+        Stage('check', stage_check, csvs, [], deps=['ingest']),
+        Stage('snapshot', stage_snapshot, csvs, ['graph_snapshot.npz'],
+              params={'format': SNAPSHOT_VERSION}, deps=['ingest']),
+        Stage('apsp', stage_all_pairs, ['graph_snapshot.npz'], ['apsp_table.bin'],
+              params={'format': APSP_FORMAT_VERSION}, deps=['snapshot']),
+        Stage('ch', stage_contraction, ['graph_snapshot.npz'], ['ch_hierarchy.npz'],
+              params={'format': CH_FORMAT_VERSION, 'witness_limit': WITNESS_SETTLE_LIMIT},
+              deps=['snapshot']),
+        Stage('hub', stage_hub_labels, ['graph_snapshot.npz'], ['hub_labels.bin'],
+              params={'format': HUB_FORMAT_VERSION}, deps=['snapshot']),
+    ]
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'stages': {}, 'files': {}}
+    manifest.setdefault('stages', {})
+    manifest.setdefault('files', {})
+    return manifest
+
+def save_manifest(manifest):
+    # Grava em um arquivo temporário e troca, para não deixar manifesto pela metade
+    tmp_file = MANIFEST_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+def content_hash(manifest, name):
+    """
+    sha256 do arquivo data/<name>, ou None se ele não existir. O hash fica no
+    manifesto junto com tamanho e mtime; enquanto eles não mudam o arquivo
+    não é relido.
+    """
+    from snapshot import file_hash
+    path = os.path.join(DATA_DIR, name)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    cached = manifest['files'].get(name)
+    if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+        return cached['sha256']
+    digest = file_hash(path)
+    manifest['files'][name] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    return digest
+
+def stage_record(manifest, stage):
+    """Registro do estágio no manifesto a partir dos arquivos atuais."""
+    return {
+        'pipeline_version': PIPELINE_VERSION,
+        'params': stage.params,
+        'inputs': {name: content_hash(manifest, name) for name in stage.inputs},
+        'outputs': {name: content_hash(manifest, name) for name in stage.outputs},
+    }
+
+def is_up_to_date(manifest, stage):
+    """
+    O estágio pode ser pulado se já rodou com a mesma versão do pipeline, os
+    mesmos parâmetros e as mesmas entradas, e as saídas continuam iguais ao
+    que ele gravou.
+    """
+    previous = manifest['stages'].get(stage.name)
+    if previous is None:
+        return False
+    current = stage_record(manifest, stage)
+    return current == previous and None not in current['outputs'].values()
+
+def run_data_processing(force=None):
     """
-    Executa os scripts de processamento de dados na ordem correta
+    Executa os estágios do processamento de dados na ordem das dependências,
+    rodando só os que têm entradas, parâmetros ou saídas diferentes do
+    manifesto (ou todos, com `force`; None lê PIPELINE_FORCE=1). Estágios
+    independentes entre si rodam ao mesmo tempo em processos separados.
+    Retorna os nomes dos estágios executados.
     """
+    from csv_cleaning_Brazil import parse_regions
+
+    if force is None:
+        force = os.environ.get("PIPELINE_FORCE") == "1"
+
     print("🔄 Iniciando processamento de dados...")
     print("=" * 70)
-    
-    # Adicionar data_processing directory ao Python path
-    data_processing_path = os.path.join(os.path.dirname(__file__), 'data_processing')
-    sys.path.insert(0, data_processing_path)
-    
+
+    regions = parse_regions(os.environ.get("AIRPORT_REGIONS"))
+    stages = {stage.name: stage for stage in pipeline_stages(regions)}
+    manifest = load_manifest()
+    pending = dict(stages)
+    done, results, executed = set(), {}, []
+
     try:
-        # 1. Processar dados brutos (aeroportos e rotas do Brasil)
-        print("📊 Executando limpeza de dados (csv_cleaning_Brazil.py)...")
-        from data_processing.csv_cleaning_Brazil import main as clean_data
-        clean_data()
-        
-        # 2. Calcular distâncias entre aeroportos
-        print("\n📏 Calculando distâncias entre aeroportos (haversine_dist_calc.py)...")
-        from data_processing.haversine_dist_calc import add_distances_to_routes
-        add_distances_to_routes()
-        
-        # 3. Verificar dados processados (opcional)
-        print("\n✅ Verificando dados processados (check_brazil_data.py)...")
-        import data_processing.check_brazil_data  # Este arquivo executa automaticamente ao ser importado
-        
-        print("\n🎉 Processamento de dados concluído com sucesso!")
+        with ProcessPoolExecutor(max_workers=max(1, min(len(stages), os.cpu_count() or 1))) as pool:
+            running = {}
+            while pending or running:
+                # Dispara (ou pula) todos os estágios com dependências prontas
+                ready = [s for s in pending.values() if set(s.deps) <= done]
+                for stage in ready:
+                    del pending[stage.name]
+                    if not force and is_up_to_date(manifest, stage):
+                        print(f"⏭️  Estágio '{stage.name}' sem mudanças, pulando")
+                        done.add(stage.name)
+                        continue
+                    upstream = {dep: results.get(dep) for dep in stage.deps}
+                    running[pool.submit(stage.func, upstream)] = stage
+                if ready and not running:
+                    continue
+                if not running:
+                    raise RuntimeError(f"dependências não resolvidas: {sorted(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+                    # Saídas regravadas: descarta os hashes antigos
+                    for name in stage.outputs:
+                        manifest['files'].pop(name, None)
+                    manifest['stages'][stage.name] = stage_record(manifest, stage)
+                    save_manifest(manifest)
+                    done.add(stage.name)
+                    executed.append(stage.name)
+
+        if executed:
+            print(f"\n🎉 Processamento de dados concluído! Estágios executados: {', '.join(executed)}")
+        else:
+            print("\n✅ Dados processados já estão atualizados. Nada a fazer.")
         print("=" * 70)
-        
+        return executed
+
     except Exception as e:
         print(f"❌ Erro durante o processamento de dados: {e}")
         raise
 
-def check_processed_data_exists():
+def build_graph_snapshot(airports_df=None, routes_df=None):
     """
-    Verifica se os arquivos de dados processados já existem
+    Gera data/graph_snapshot.npz a partir dos dados processados, com os hashes
+    dos CSVs de origem. O backend carrega esse arquivo em vez de reprocessar
+    os CSVs enquanto eles não mudarem. Recebe os DataFrames direto da
+    ingestão; sem eles, lê os CSVs. Registros de alterações de rotas feitos
+    sobre outra versão do grafo são apagados.
     """
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
-    airports_file = os.path.join(data_dir, 'airports_min.csv')
-    routes_file = os.path.join(data_dir, 'routes_min.csv')
+    import pandas as pd
+    from csr_graph import CSRGraph
+    from snapshot import write_snapshot, prune_journals
     
-    return os.path.exists(airports_file) and os.path.exists(routes_file)
+    airports_file = os.path.join(DATA_DIR, 'airports_min.csv')
+    routes_file = os.path.join(DATA_DIR, 'routes_min.csv')
+    if airports_df is None or routes_df is None:
+        airports_df, routes_df = pd.read_csv(airports_file), pd.read_csv(routes_file)
+    csr = CSRGraph.from_dataframes(airports_df, routes_df)
+    write_snapshot(csr, os.path.join(DATA_DIR, 'graph_snapshot.npz'), (airports_file, routes_file))
+    prune_journals(os.environ.get('ROUTE_UPDATES_FILE') or os.path.join(DATA_DIR, 'route_updates.jsonl'),
+                   csr.fingerprint())
+    print(f"✓ Snapshot com {len(csr)} aeroportos e {csr.num_edges} rotas gravado em data/graph_snapshot.npz")
+
+def load_processed_graph():
+    """CSRGraph do snapshot (ou dos CSVs processados, se ele estiver desatualizado)."""
+    from snapshot import load_graph
+    return load_graph(os.path.join(DATA_DIR, 'airports_min.csv'),
+                      os.path.join(DATA_DIR, 'routes_min.csv'),
+                      os.path.join(DATA_DIR, 'graph_snapshot.npz'))
+
+def build_all_pairs_table():
+    """
+    Gera data/apsp_table.bin (distâncias e próximo salto entre todos os pares)
+    a partir do grafo processado. O backend mapeia esse arquivo em memória e o
+    Dijkstra passa a responder por consulta na tabela.
+    """
+    from apsp import AllPairsTable
+    
+    csr = load_processed_graph()
+    table = AllPairsTable.build(csr)
+    table.save(os.path.join(DATA_DIR, 'apsp_table.bin'), csr.fingerprint())
+    print(f"✓ Tabela {len(table.nodes)} x {len(table.nodes)} gravada em data/apsp_table.bin")
+
+def build_contraction_hierarchy():
+    """
+    Gera data/ch_hierarchy.npz, lido pelo backend na primeira consulta com
+    Contraction Hierarchies em vez de contrair o grafo durante a requisição.
+    """
+    from contraction import ContractionHierarchy
+    
+    csr = load_processed_graph()
+    ch = ContractionHierarchy.build(csr)
+    ch.save(os.path.join(DATA_DIR, 'ch_hierarchy.npz'), csr.fingerprint())
+    print(f"✓ Hierarquia com {len(ch.up_indices)} arestas para cima gravada em data/ch_hierarchy.npz")
+
+def build_hub_labels():
+    """
+    Gera data/hub_labels.bin (rótulos de hubs em vetores ordenados), mapeado
+    em memória pelo backend para responder distâncias sem busca no grafo.
+    """
+    from hub_labels import HubLabels
+    
+    csr = load_processed_graph()
+    labels = HubLabels.build(csr)
+    labels.save(os.path.join(DATA_DIR, 'hub_labels.bin'), csr.fingerprint())
+    stats = labels.stats()
+    print(f"✓ Rótulos de hubs gravados em data/hub_labels.bin em {stats['build_seconds']:.2f} s: "
+          f"{stats['entries']} entradas (média {stats['avg_label']:.1f}, máximo {stats['max_label']} "
+          f"por aeroporto), {stats['bytes'] / 2**20:.2f} MB")
 
 def main():
+    # Rastreamento das rotas calculadas: LOG_LEVEL=DEBUG mostra cada aresta
+    # percorrida e os custos; por padrão os algoritmos não escrevem nada
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
     try:
-        # Verificar se os dados processados já existem
-        if not check_processed_data_exists():
-            print("📋 Dados processados não encontrados. Executando processamento...")
-            run_data_processing()
-        else:
-            print("✅ Dados processados já existem. Pulando processamento...")
-        
-        # Add backend directory to Python path
-        backend_path = os.path.join(os.path.dirname(__file__), 'backend')
-        sys.path.insert(0, backend_path)
+        # Reprocessa só os estágios cujas entradas mudaram desde a última
+        # execução (PIPELINE_FORCE=1 refaz tudo)
+        run_data_processing()
         
         # Import and run the graph application
         from backend.app import app
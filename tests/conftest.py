@@ -0,0 +1,90 @@
+import os
+import shutil
+import sys
+import tempfile
+import networkx as nx
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'data')
+sys.path.insert(0, os.path.join(ROOT, 'data_processing'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from csv_cleaning_Brazil import ingest
+from csr_graph import CSRGraph
+
+# Dados do Brasil extraídos de airports.dat/routes.dat (os arquivos brutos do
+# repositório), gravados em um diretório temporário que o backend usa no
+# lugar de data/: os testes não dependem do pipeline já ter rodado nem das
+# estruturas pré-calculadas em data/
+AIRPORTS_DF, ROUTES_DF = ingest(data_dir=DATA_DIR, write=False)
+TEST_DATA_DIR = tempfile.mkdtemp(prefix='airports-test-')
+AIRPORTS_DF.to_csv(os.path.join(TEST_DATA_DIR, 'airports_min.csv'), index=False)
+ROUTES_DF.to_csv(os.path.join(TEST_DATA_DIR, 'routes_min.csv'), index=False)
+os.environ['AIRPORT_DATA_DIR'] = TEST_DATA_DIR
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+def reference_graph(airports_df, routes_df):
+    """
+    nx.Graph montado direto dos DataFrames, como o graph.py original fazia
+    antes do CSR: é a referência com que os algoritmos são comparados.
+    """
+    graph = nx.Graph()
+    for row in airports_df.itertuples():
+        graph.add_node(row.id, name=row.name, lat=row.lat, lon=row.lon)
+    for row in routes_df.itertuples():
+        if row.src_id in graph and row.dst_id in graph:
+            graph.add_edge(row.src_id, row.dst_id, weight=row.distance_km)
+    return graph
+
+
+@pytest.fixture
+def brazil_csr():
+    """CSRGraph novo (cache vazio) com os aeroportos e rotas do Brasil."""
+    return CSRGraph.from_dataframes(AIRPORTS_DF, ROUTES_DF)
+
+
+@pytest.fixture(scope='session')
+def brazil_nx():
+    return reference_graph(AIRPORTS_DF, ROUTES_DF)
+
+
+@pytest.fixture(scope='session')
+def pairs(brazil_nx):
+    """Pares (origem, destino) sorteados entre os aeroportos com rotas."""
+    rng = np.random.default_rng(0)
+    nodes = np.array(sorted(n for n in brazil_nx if brazil_nx.degree(n) > 0))
+    return [tuple(rng.choice(nodes, 2, replace=False).tolist()) for _ in range(60)]
+
+
+def nx_distance(graph, source, target):
+    """Distância mínima pelo networkx (inf se não houver caminho)."""
+    try:
+        return nx.dijkstra_path_length(graph, source, target)
+    except nx.NetworkXNoPath:
+        return float('inf')
+
+
+def path_weight(graph, path):
+    """Soma dos pesos das arestas de `path` no grafo de referência."""
+    return sum(graph[u][v]['weight'] for u, v in zip(path, path[1:]))
+
+
+def shortcut_graph(n=60, m=240, seed=0):
+    """
+    Grafo aleatório cujo peso cresce mais que o número de trechos (atalhos
+    diretos longos), o que gera fronteiras com várias rotas.
+    """
+    rng = np.random.default_rng(seed)
+    u, v = rng.integers(0, n, m), rng.integers(0, n, m)
+    keep = u != v
+    u, v = u[keep], v[keep]
+    _, first = np.unique(np.minimum(u, v) * n + np.maximum(u, v), return_index=True)
+    u, v = u[first], v[first]
+    w = np.round(np.abs(u - v) ** 1.5 * rng.uniform(1, 2, len(u)), 2)
+    return CSRGraph(list(range(n)), [str(i) for i in range(n)], np.zeros(n), np.zeros(n), u, v, w)
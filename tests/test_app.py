@@ -0,0 +1,56 @@
+import sys
+import threading
+import app
+from app import (G, patch_geo_graph, EDGES_TRACE, MST_TRACE, NODES_TRACE, PATH_TRACE,
+                 CLICK_TRACE, ALTERNATIVE_TRACES)
+from graph import dijkstra_shortest_path, kruskal_full_mst, k_shortest_paths
+
+
+def patch_locations(patched):
+    """(trace, propriedade) de cada atribuição do Patch; ('layout', ...) para o layout."""
+    operations = patched.to_plotly_json()['operations']
+    assert all(op['operation'] == 'Assign' for op in operations)
+    return [tuple(op['location'][1:]) if op['location'][0] == 'data' else tuple(op['location'])
+            for op in operations]
+
+
+def test_patch_only_touches_overlays(pairs):
+    source, target = next((s, t) for s, t in pairs if dijkstra_shortest_path(G, s, t))
+    routes = k_shortest_paths(G, source, target, 3)
+    mst = kruskal_full_mst(G)
+    for args in ((routes[0].path, 'yen', None, [(r.path, 'alt') for r in routes[1:]]),
+                 ([], 'kruskal', mst.graph, ()),
+                 ([], 'dijkstra', None, ())):
+        locations = patch_locations(patch_geo_graph(G, *args))
+        traces = {location[0] for location in locations if location[0] != 'layout'}
+        assert traces == {EDGES_TRACE, MST_TRACE, PATH_TRACE, *ALTERNATIVE_TRACES}
+        # Das camadas fixas, só a visibilidade das arestas muda (a MST as substitui)
+        assert [loc for loc in locations if loc[0] == EDGES_TRACE] == [(EDGES_TRACE, 'visible')]
+        assert not {NODES_TRACE, CLICK_TRACE} & traces
+        assert [loc for loc in locations if loc[0] == 'layout'] == [('layout', 'showlegend')]
+
+
+def test_figure_cache_is_thread_safe(monkeypatch):
+    monkeypatch.setattr(app, '_figure_cache', {})
+    # Troca de thread a cada poucas instruções, para as corridas aparecerem
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    errors = []
+
+    def worker(version):
+        try:
+            for i in range(2000):
+                assert app._cached(i % 5, version, lambda: (version, i % 5)) == (version, i % 5)
+        except Exception as e:
+            errors.append(e)
+
+    # Threads com versões diferentes descartam as entradas umas das outras o tempo todo
+    threads = [threading.Thread(target=worker, args=(f"v{k % 2}",)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
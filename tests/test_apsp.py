@@ -0,0 +1,75 @@
+import networkx as nx
+import numpy as np
+import pytest
+import binary_file
+from apsp import AllPairsTable
+from graph import dijkstra_shortest_path
+from conftest import path_weight
+
+
+@pytest.fixture
+def table(brazil_csr):
+    return AllPairsTable.build(brazil_csr)
+
+
+def test_table_matches_networkx(brazil_csr, brazil_nx, table):
+    exact = dict(nx.all_pairs_dijkstra_path_length(brazil_nx))
+    nodes = brazil_csr.ids[table.nodes].tolist()
+    for i, source in enumerate(nodes):
+        for j, target in enumerate(nodes):
+            expected = exact[source].get(target, np.inf)
+            assert table.dist[i, j] == pytest.approx(expected)
+
+
+def test_table_paths(brazil_csr, brazil_nx, table, pairs):
+    for source, target in pairs:
+        s, t = brazil_csr.index[source], brazil_csr.index[target]
+        path = brazil_csr.path_ids(table.path(s, t))
+        if not nx.has_path(brazil_nx, source, target):
+            assert path == []
+            continue
+        assert path[0] == source and path[-1] == target
+        assert path_weight(brazil_nx, path) == pytest.approx(table.dist[table.slot[s], table.slot[t]])
+
+
+def test_table_save_and_load(brazil_csr, table, tmp_path):
+    path = str(tmp_path / 'apsp.bin')
+    table.save(path, brazil_csr.fingerprint())
+    loaded = AllPairsTable.load(path, brazil_csr.fingerprint())
+    assert isinstance(loaded.dist, np.memmap)
+    np.testing.assert_array_equal(loaded.dist, table.dist)
+    np.testing.assert_array_equal(loaded.next_hop, table.next_hop)
+    assert AllPairsTable.load(path, '0' * 40) is None
+
+
+def test_dijkstra_reports_precomputed_answers(brazil_csr, table, pairs):
+    source, target = pairs[0]
+    searched = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+    assert searched.stats['settled'] > 0
+
+    brazil_csr.cache['apsp'] = table
+    answered = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+    assert answered.total == pytest.approx(searched.total)
+    # Resposta da tabela não finge ter visitado 0 nós
+    assert answered.stats == {'precomputed': 'apsp'}
+
+    # A base de comparação das outras buscas continua sendo uma busca de verdade
+    baseline = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target, precomputed=False)
+    assert baseline.stats == searched.stats
+
+
+def test_failed_save_keeps_the_old_file(brazil_csr, table, tmp_path, monkeypatch):
+    path = str(tmp_path / 'apsp.bin')
+    table.save(path, brazil_csr.fingerprint())
+    before = open(path, 'rb').read()
+
+    # Falha antes da troca: o arquivo antigo fica inteiro e o temporário some
+    def broken(src, dst):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(binary_file.os, 'replace', broken)
+    with pytest.raises(OSError):
+        table.save(path, 'f' * 40)
+    monkeypatch.undo()
+    assert open(path, 'rb').read() == before
+    assert [p.name for p in tmp_path.iterdir()] == ['apsp.bin']
+    assert AllPairsTable.load(path, brazil_csr.fingerprint()) is not None
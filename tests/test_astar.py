@@ -0,0 +1,26 @@
+import networkx as nx
+import pytest
+from graph import astar_shortest_path, dijkstra_shortest_path
+from conftest import nx_distance, path_weight
+
+
+def test_astar_matches_networkx(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        result = astar_shortest_path.__wrapped__(brazil_csr, source, target)
+        expected = nx_distance(brazil_nx, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.total == pytest.approx(expected)
+        assert path_weight(brazil_nx, result.path) == pytest.approx(expected)
+        # A heurística só pode cortar nós visitados em relação ao Dijkstra
+        baseline = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+        assert result.stats['settled'] <= baseline.stats['settled']
+
+
+def test_haversine_heuristic_is_admissible(brazil_csr, brazil_nx, pairs):
+    for _, target in pairs[:10]:
+        bounds = brazil_csr.lower_bounds_to(brazil_csr.index[target])
+        exact = nx.single_source_dijkstra_path_length(brazil_nx, target)
+        for node, distance in exact.items():
+            assert bounds[brazil_csr.index[node]] <= distance + 1e-9
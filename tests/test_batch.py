@@ -0,0 +1,93 @@
+import networkx as nx
+import numpy as np
+import batch
+import graph
+from graph import distance_matrix
+from conftest import nx_distance
+
+
+def test_distance_matrix_matches_networkx(brazil_csr, brazil_nx, pairs):
+    sources = [s for s, _ in pairs[:10]] + [-1]
+    targets = [t for _, t in pairs[:10]] + [-1]
+    matrix = distance_matrix(brazil_csr, sources, targets)
+    for i, source in enumerate(sources):
+        for j, target in enumerate(targets):
+            if source == -1 or target == -1:
+                assert matrix[i, j] == np.inf
+            else:
+                assert np.isclose(matrix[i, j], nx_distance(brazil_nx, source, target))
+
+    # Com processos, o resultado é o mesmo e o pool fica de pé entre chamadas
+    parallel = distance_matrix(brazil_csr, sources, targets, processes=2)
+    assert np.array_equal(parallel, matrix)
+    pool = batch._pool._pool
+    assert pool is not None
+    distance_matrix(brazil_csr, sources[::-1], targets, processes=2)
+    assert batch._pool._pool is pool
+
+
+def test_pool_follows_graph_changes(brazil_csr):
+    sources = brazil_csr.ids[:4]
+    distance_matrix(brazil_csr, sources, sources, processes=2)
+    pool = batch._pool._pool
+
+    # Outro grafo (mesmos nós, uma aresta mais curta) recria o pool
+    u, v = brazil_csr.node_id(brazil_csr.edge_u[0]), brazil_csr.node_id(brazil_csr.edge_v[0])
+    changed = brazil_csr.to_networkx().copy()
+    changed[u][v]['weight'] = 0.5
+    matrix = distance_matrix(changed, [u, v], [v, u], processes=2)
+    assert batch._pool._pool is not pool
+    assert matrix[0, 0] == matrix[1, 1] == 0.5
+
+
+def test_shortest_path_trees_match_networkx(brazil_csr, brazil_nx, pairs):
+    sources = sorted({s for s, _ in pairs[:12]})
+    trees = {source: (dist, parent) for source, dist, parent in
+             batch.shortest_path_trees(brazil_csr, sources + [-1], processes=2, chunk_size=3)}
+    # Aeroporto desconhecido é ignorado
+    assert sorted(trees) == sources
+
+    for source, (dist, parent) in trees.items():
+        expected = nx.single_source_dijkstra_path_length(brazil_nx, source)
+        s = brazil_csr.index[source]
+        assert parent[s] == -1
+        for v, node in enumerate(brazil_csr.ids):
+            if node not in expected:
+                assert dist[v] == np.inf and parent[v] == -1
+                continue
+            assert np.isclose(dist[v], expected[node])
+            if v != s:
+                # O pai está no caminho mínimo: dist(pai) + peso(pai, v) = dist(v)
+                p = parent[v]
+                assert np.isclose(dist[p] + brazil_nx[brazil_csr.node_id(p)][node]['weight'], dist[v])
+
+
+def test_replaced_pool_finishes_its_tasks(brazil_csr):
+    # Tarefas enviadas ao pool antigo terminam mesmo com o pool trocado logo
+    # em seguida (os blocos só somem depois que ele termina)
+    sources = list(range(len(brazil_csr)))
+    chunks = batch._chunks(sources, 4)
+    old = batch._pool.submit(brazil_csr, 2, batch._rows_task, chunks, sources)
+    new = batch._pool.submit(brazil_csr, 3, batch._rows_task, chunks[:1], sources)
+    rows = {s: row for future in old for s, row in zip(*future.result())}
+    assert sorted(rows) == sources
+    assert np.array_equal(new[0].result()[1], np.array([rows[s] for s in chunks[0]]))
+
+
+def test_distance_matrix_endpoint_validates_input(monkeypatch):
+    import app
+    client = app.app.server.test_client()
+    u, v = (int(graph.CSR.node_id(i)) for i in range(2))
+
+    response = client.post('/api/distance-matrix', json={'sources': [u], 'targets': [u, v]})
+    assert response.status_code == 200 and response.get_json()['distances'][0][0] == 0
+    response = client.get(f'/api/distance-matrix?sources={u},{v}&targets={v}')
+    assert response.status_code == 200 and len(response.get_json()['distances']) == 2
+    # Só listas de ids: uma string não vira a lista dos seus dígitos
+    for body in ({'sources': str(u), 'targets': [v]}, {'sources': u, 'targets': [v]},
+                 {'sources': [u], 'targets': None}, {'sources': [True], 'targets': [v]}, [u, v]):
+        assert client.post('/api/distance-matrix', json=body).status_code == 400
+
+    monkeypatch.setattr(app, 'MATRIX_MAX_CELLS', 3)
+    response = client.post('/api/distance-matrix', json={'sources': [u, v], 'targets': [u, v]})
+    assert response.status_code == 413
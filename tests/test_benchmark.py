@@ -0,0 +1,33 @@
+import json
+import benchmark
+
+RESULT_KEYS = {"dataset", "nodes", "edges", "algorithm", "runs", "p50_ms", "p99_ms",
+               "mean_ms", "throughput_per_s", "peak_memory_mb"}
+
+
+def test_benchmark_smoke(tmp_path, capsys):
+    # Um grafo sintético pequeno e poucas execuções: só o formato do relatório
+    output = tmp_path / "benchmark.json"
+    args = ["--datasets", "synthetic", "--sizes", "300", "--queries", "5", "--repeat", "2",
+            "--updates", "3", "--max-seconds", "0.5", "--output", str(output)]
+    benchmark.main(args)
+    report = json.loads(output.read_text(encoding="utf-8"))
+
+    assert set(report) == {"metadata", "results"}
+    metadata = report["metadata"]
+    assert {"commit", "timestamp", "python", "numpy", "queries", "updates", "seed"} <= set(metadata)
+    assert (metadata["queries"], metadata["updates"]) == (5, 3)
+
+    results = report["results"]
+    algorithms = {r["algorithm"] for r in results}
+    assert {"kruskal_full", "update_incremental", "update_rebuild"} <= algorithms
+    assert set(benchmark.QUERY_ALGORITHMS) <= algorithms
+    assert {f"mst_{engine}" for engine in benchmark.MST_ENGINES} <= algorithms
+    for r in results:
+        assert set(r) == RESULT_KEYS
+        assert r["dataset"] == "synthetic-300" and r["nodes"] == 300
+        assert r["runs"] >= 1 and 0 <= r["p50_ms"] <= r["p99_ms"]
+
+    # Uma segunda execução comparada com a primeira
+    benchmark.main(args[:-1] + [str(tmp_path / "again.json"), "--compare", str(output)])
+    assert "p50 vs base" in capsys.readouterr().out
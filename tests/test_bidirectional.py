@@ -0,0 +1,22 @@
+import pytest
+from graph import bidirectional_dijkstra_shortest_path
+from conftest import nx_distance, path_weight
+
+
+def test_bidirectional_dijkstra_matches_networkx(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        result = bidirectional_dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+        expected = nx_distance(brazil_nx, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.path[0] == source and result.path[-1] == target
+        assert result.total == pytest.approx(expected)
+        assert result.weights == [brazil_nx[u][v]['weight'] for u, v in zip(result.path, result.path[1:])]
+        assert path_weight(brazil_nx, result.path) == pytest.approx(expected)
+
+
+def test_bidirectional_dijkstra_same_airport(brazil_csr):
+    airport = brazil_csr.node_id(0)
+    result = bidirectional_dijkstra_shortest_path.__wrapped__(brazil_csr, airport, airport)
+    assert result.path == [airport] and result.total == 0
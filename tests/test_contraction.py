@@ -0,0 +1,30 @@
+import pytest
+from contraction import ContractionHierarchy
+from graph import ch_shortest_path
+from conftest import nx_distance, path_weight
+
+
+def test_ch_matches_networkx(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        result = ch_shortest_path.__wrapped__(brazil_csr, source, target)
+        expected = nx_distance(brazil_nx, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.path[0] == source and result.path[-1] == target
+        assert result.total == pytest.approx(expected)
+        # Atalhos desempacotados em arestas reais, com o peso de cada uma
+        assert result.weights == [brazil_nx[u][v]['weight'] for u, v in zip(result.path, result.path[1:])]
+        assert path_weight(brazil_nx, result.path) == pytest.approx(expected)
+
+
+def test_ch_save_and_load(brazil_csr, tmp_path):
+    ch = ContractionHierarchy.build(brazil_csr)
+    path = tmp_path / 'ch.npz'
+    ch.save(str(path), brazil_csr.fingerprint())
+
+    loaded = ContractionHierarchy.load(str(path), brazil_csr.fingerprint())
+    assert loaded is not None
+    assert loaded.query(0, 1) == ch.query(0, 1)
+    # Hierarquia de outro grafo não é usada
+    assert ContractionHierarchy.load(str(path), '0' * 40) is None
@@ -0,0 +1,93 @@
+import networkx as nx
+import pytest
+from csr_graph import CSRGraph, as_csr
+from graph import bfs_shortest_path, dijkstra_shortest_path, kruskal_full_mst, kruskal_mst_path
+from conftest import nx_distance, path_weight
+
+
+def test_csr_matches_reference_graph(brazil_csr, brazil_nx):
+    assert len(brazil_csr) == brazil_nx.number_of_nodes()
+    assert brazil_csr.num_edges == brazil_nx.number_of_edges()
+    for u, v, w in zip(brazil_csr.edge_u.tolist(), brazil_csr.edge_v.tolist(), brazil_csr.edge_w.tolist()):
+        assert brazil_nx[brazil_csr.node_id(u)][brazil_csr.node_id(v)]['weight'] == w
+    # Cada aresta aparece nos dois sentidos do CSR
+    assert len(brazil_csr.indices) == 2 * brazil_csr.num_edges
+
+
+def test_networkx_round_trip(brazil_csr, brazil_nx):
+    graph = brazil_csr.to_networkx()
+    assert set(graph.nodes) == set(brazil_nx.nodes)
+    assert {frozenset(e) for e in graph.edges} == {frozenset(e) for e in brazil_nx.edges}
+    assert all(graph.edges[e]['weight'] == brazil_nx.edges[e]['weight'] for e in graph.edges)
+    again = CSRGraph.from_networkx(graph)
+    assert len(again) == len(brazil_csr) and again.num_edges == brazil_csr.num_edges
+
+
+def test_as_csr_rebuilds_when_the_version_changes(brazil_nx):
+    graph = brazil_nx.copy()
+    u, v = next(iter(graph.edges))
+    csr = as_csr(graph)
+    assert as_csr(graph) is csr
+
+    # O grafo continua alterável; a alteração vale depois de mudar a versão
+    graph[u][v]['weight'] = 1.0
+    graph.graph['version'] = 1
+    changed = as_csr(graph)
+    assert changed is not csr and changed.fingerprint() != csr.fingerprint()
+    assert dijkstra_shortest_path(graph, u, v).total == 1.0
+
+    # Nós novos também trocam o carimbo
+    graph.add_edge(u, -1, weight=2.0)
+    assert -1 in as_csr(graph)
+
+    # Uma cópia leva graph.graph junto, mas ganha o seu próprio CSR
+    copy = graph.copy()
+    copy[u][v]['weight'] = 3.0
+    assert as_csr(copy) is not as_csr(graph)
+    assert dijkstra_shortest_path(copy, u, v).total == 3.0
+
+
+def test_bfs_uses_fewest_connections(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        result = bfs_shortest_path.__wrapped__(brazil_csr, source, target)
+        try:
+            expected = nx.shortest_path_length(brazil_nx, source, target)
+        except nx.NetworkXNoPath:
+            assert not result
+            continue
+        assert result.connections == expected
+        assert result.total == pytest.approx(path_weight(brazil_nx, result.path))
+
+
+def test_dijkstra_matches_networkx(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        result = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+        expected = nx_distance(brazil_nx, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.total == pytest.approx(expected)
+        assert path_weight(brazil_nx, result.path) == pytest.approx(expected)
+        assert result.stats['settled'] > 0
+
+
+def test_unknown_airport_has_no_route(brazil_csr):
+    source = brazil_csr.node_id(0)
+    assert not dijkstra_shortest_path.__wrapped__(brazil_csr, source, -1)
+    assert not bfs_shortest_path.__wrapped__(brazil_csr, -1, source)
+
+
+def test_kruskal_matches_networkx_mst(brazil_csr, brazil_nx):
+    expected = nx.minimum_spanning_tree(brazil_nx)
+    mst = kruskal_full_mst(brazil_csr)
+    assert mst.num_edges == expected.number_of_edges()
+    assert mst.total == pytest.approx(expected.size(weight='weight'))
+
+    # O caminho na MST entre dois nós é o único caminho da árvore
+    source, target = next(iter(expected.edges))
+    for component in nx.connected_components(expected):
+        if len(component) > 2:
+            source, target = sorted(component)[:2]
+            break
+    result = kruskal_mst_path.__wrapped__(brazil_csr, source, target)
+    assert result.path == nx.shortest_path(mst.graph, source, target)
@@ -0,0 +1,187 @@
+import json
+import threading
+import networkx as nx
+import numpy as np
+import pytest
+import graph
+from csr_graph import as_csr, attach_csr
+from graph import (add_route, set_route_weight, remove_route, get_mst_index, shortest_path_tree,
+                   dijkstra_shortest_path, directed_shortest_path, get_route_multigraph,
+                   publish_route_update, sync_route_updates)
+from snapshot import journal_file, prune_journals
+from conftest import ROUTES_DF, nx_distance
+
+
+def random_updates(csr, count, seed=0):
+    """Sequência de (operação, origem, destino, peso) sobre o grafo."""
+    rng = np.random.default_rng(seed)
+    updates = []
+    for _ in range(count):
+        kind = rng.integers(3)
+        if kind == 0:
+            e = int(rng.integers(csr.num_edges))
+            u, v = csr.node_id(csr.edge_u[e]), csr.node_id(csr.edge_v[e])
+            updates.append(('remove', u, v, None))
+        else:
+            u, v = (csr.node_id(int(i)) for i in rng.choice(len(csr), 2, replace=False))
+            updates.append(('set', u, v, round(float(rng.uniform(50, 3000)), 2)))
+    return updates
+
+
+def test_repaired_structures_match_networkx(brazil_csr, brazil_nx, pairs):
+    g = attach_csr(brazil_csr.to_networkx(), brazil_csr)
+    reference = brazil_nx.copy()
+    sources = sorted({s for s, _ in pairs[:6]})
+    get_mst_index(g)
+    for source in sources:
+        shortest_path_tree(g, source)
+
+    for op, u, v, weight in random_updates(brazil_csr, 25):
+        if op == 'remove':
+            if not reference.has_edge(u, v):
+                continue
+            remove_route(g, u, v)
+            reference.remove_edge(u, v)
+        else:
+            set_route_weight(g, u, v, weight)
+            reference.add_edge(u, v, weight=weight)
+
+        csr = as_csr(g)
+        # MST e árvores reparadas (não recalculadas) batem com o networkx
+        assert csr.cache['mst'].mst_weight == pytest.approx(
+            nx.minimum_spanning_tree(reference).size(weight='weight'))
+        for source in sources:
+            expected = nx.single_source_dijkstra_path_length(reference, source)
+            dist = csr.cache['spt'][csr.index[source]].dist
+            for node, d in zip(csr.ids, dist):
+                assert d == pytest.approx(expected.get(node, float('inf')))
+
+    for source, target in pairs:
+        result = dijkstra_shortest_path(g, source, target, precomputed=False)
+        assert result.total == pytest.approx(nx_distance(reference, source, target))
+
+
+def test_update_leaves_old_graph_untouched(brazil_csr, pairs):
+    g = attach_csr(brazil_csr.to_networkx(), brazil_csr)
+    source = pairs[0][0]
+    tree = shortest_path_tree(g, source)
+    before = list(tree.dist)
+    reachable = np.flatnonzero(np.isfinite(before))
+    v = brazil_csr.node_id(int(reachable[reachable != brazil_csr.index[source]][0]))
+    set_route_weight(g, source, v, 0.5)
+
+    # O CSR antigo continua com as suas árvores, sem reparos
+    assert brazil_csr.cache['spt'][brazil_csr.index[source]] is tree
+    assert tree.dist == before
+    assert shortest_path_tree(g, source).dist[brazil_csr.index[v]] == 0.5
+
+
+def test_concurrent_updates_are_serialized(brazil_csr):
+    g = attach_csr(brazil_csr.to_networkx(), brazil_csr)
+    ids = brazil_csr.ids
+    edges = [(ids[i], ids[i + 1], 10.0 + i) for i in range(0, 64, 2)]
+    threads = [threading.Thread(target=set_route_weight, args=(g, *edge)) for edge in edges]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    csr = as_csr(g)
+    for u, v, weight in edges:
+        assert g[u][v]['weight'] == weight
+        assert dijkstra_shortest_path(g, u, v, precomputed=False).total <= weight
+    assert csr.num_edges == g.number_of_edges()
+
+
+@pytest.fixture
+def app_graph(monkeypatch, tmp_path):
+    """G novo da aplicação, com o registro de alterações em tmp_path."""
+    monkeypatch.setattr(graph, 'G', attach_csr(graph.CSR.to_networkx(), graph.CSR))
+    monkeypatch.setattr(graph, 'route_updates_file', str(tmp_path / 'route_updates.jsonl'))
+    monkeypatch.setattr(graph, '_journal', {'offset': 0})
+    return graph.G
+
+
+def test_journal_reaches_every_process(app_graph, monkeypatch):
+    u, v, w = (graph.CSR.node_id(i) for i in range(3))
+    publish_route_update('set', u, v, 12.5)
+    publish_route_update('add', v, w)
+    assert app_graph[u][v]['weight'] == 12.5 and app_graph.has_edge(v, w)
+    with pytest.raises(KeyError):
+        publish_route_update('remove', u, w)
+
+    # Linha gravada por outro processo: aplicada só quando estiver completa
+    line = json.dumps({'id': 'x', 'base': graph.CSR.fingerprint(), 'op': 'remove',
+                       'source': u, 'target': v, 'weight': None})
+    other = json.dumps({'id': 'y', 'base': '0' * 40, 'op': 'remove', 'source': v, 'target': w,
+                        'weight': None})
+    with open(graph.route_updates_file, 'a') as f:
+        f.write(other + '\n' + line[:10])
+    assert sync_route_updates() == {}
+    with open(graph.route_updates_file, 'a') as f:
+        f.write(line[10:] + '\n')
+    assert sync_route_updates() == {'x': None}
+    assert not app_graph.has_edge(u, v) and app_graph.has_edge(v, w)
+    version = graph.graph_version(app_graph)
+
+    # Um processo que sobe depois refaz as mesmas alterações
+    monkeypatch.setattr(graph, 'G', attach_csr(graph.CSR.to_networkx(), graph.CSR))
+    monkeypatch.setattr(graph, '_journal', {'offset': 0})
+    sync_route_updates()
+    assert graph.graph_version(graph.G) == version
+
+
+@pytest.mark.parametrize('eager', [True, False])
+def test_directed_routes_follow_updates(app_graph, monkeypatch, eager):
+    if eager:
+        get_route_multigraph(app_graph)
+    else:
+        monkeypatch.delitem(graph.CSR.cache, 'multigraph', raising=False)
+    legs = ROUTES_DF.groupby(['src_id', 'dst_id']).size()
+    (u, v), (a, b) = legs.index[0], legs.index[1]
+    c, d = next((x, y) for x, y in zip(graph.CSR.ids[:-1], graph.CSR.ids[1:])
+                if not app_graph.has_edge(x, y))
+    assert directed_shortest_path(app_graph, u, v).path == [u, v]
+
+    remove_route(app_graph, u, v)
+    set_route_weight(app_graph, a, b, 0.5)
+    add_route(app_graph, c, d, 7.0)
+    # Os trechos fechados somem, os novos aparecem nos dois sentidos e o peso
+    # novo vale para todas as companhias da rota
+    assert directed_shortest_path(app_graph, u, v).path != [u, v]
+    result = directed_shortest_path(app_graph, a, b)
+    assert result.path == [a, b] and result.total == 0.5
+    for x, y in ((c, d), (d, c)):
+        result = directed_shortest_path(app_graph, x, y)
+        assert result.path == [x, y] and result.total == 7.0 and result.airlines == [-1]
+    multigraph = get_route_multigraph(app_graph)
+    assert multigraph.csr is as_csr(app_graph)
+
+
+def test_journals_of_other_data_versions_are_pruned(tmp_path):
+    template = str(tmp_path / 'route_updates.jsonl')
+    old, current = journal_file(template, 'a' * 40), journal_file(template, 'b' * 40)
+    for path in (old, current):
+        with open(path, 'w') as f:
+            f.write('{}\n')
+    prune_journals(template, 'b' * 40)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"route_updates-{'b' * 16}.jsonl"]
+
+
+def test_routes_endpoint_requires_token(app_graph, monkeypatch):
+    import app
+    client = app.app.server.test_client()
+    u, v = graph.CSR.node_id(0), graph.CSR.node_id(1)
+    body = {'source': u, 'target': v, 'weight': 42.0}
+
+    monkeypatch.setattr(app, 'ROUTE_UPDATE_TOKEN', None)
+    assert client.post('/api/routes', json=body).status_code == 403
+    monkeypatch.setattr(app, 'ROUTE_UPDATE_TOKEN', 'secret')
+    assert client.post('/api/routes', json=body).status_code == 401
+    assert client.post('/api/routes', json=body, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert not app_graph.has_edge(u, v) or app_graph[u][v]['weight'] != 42.0
+
+    response = client.post('/api/routes', json=body, headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == graph.graph_version(app_graph)
+    assert app_graph[u][v]['weight'] == 42.0
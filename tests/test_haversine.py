@@ -0,0 +1,43 @@
+import math
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from haversine_dist_calc import haversine_distance, route_distances
+from conftest import AIRPORTS_DF, ROUTES_DF
+
+
+def reference_haversine(lat1, lon1, lat2, lon2):
+    """Fórmula escalar com o módulo math, como no script original."""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+
+def test_route_distances_match_scalar_formula():
+    coords = AIRPORTS_DF.set_index('id')[['lat', 'lon']]
+    distances = route_distances(AIRPORTS_DF, ROUTES_DF['src_id'], ROUTES_DF['dst_id'])
+    for src, dst, distance in zip(ROUTES_DF['src_id'], ROUTES_DF['dst_id'], distances):
+        expected = reference_haversine(*coords.loc[src], *coords.loc[dst])
+        assert distance == round(expected, 2)
+        assert haversine_distance(*coords.loc[src], *coords.loc[dst]) == pytest.approx(expected)
+    assert np.array_equal(distances, ROUTES_DF['distance_km'].to_numpy())
+
+
+def test_unknown_airport_gives_nan():
+    airports = pd.DataFrame({'id': [1, 2], 'lat': [0.0, 0.0], 'lon': [0.0, 1.0]})
+    distances = route_distances(airports, [1, 1], [2, 3])
+    assert distances[0] == round(reference_haversine(0, 0, 0, 1), 2)
+    assert np.isnan(distances[1])
+
+
+def test_pipeline_does_not_load_the_backend():
+    # O pipeline usa só o geo.py do backend: nada de networkx nem csr_graph
+    from conftest import ROOT
+    code = ("import sys; import csv_cleaning_Brazil; "
+            "assert not {'networkx', 'csr_graph', 'graph'} & set(sys.modules), sys.modules.keys()")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.path.join(ROOT, 'data_processing'), os.path.join(ROOT, 'backend')]))
+    subprocess.run([sys.executable, '-c', code], env=env, check=True)
@@ -0,0 +1,46 @@
+import networkx as nx
+import numpy as np
+import pytest
+from hub_labels import HubLabels
+from graph import hub_label_distance
+
+# Erro relativo aceito em relação ao Dijkstra: a soma pelos hubs agrupa os
+# pesos em outra ordem (ver HubLabels)
+TOLERANCE = 1e-9
+
+
+@pytest.fixture
+def labels(brazil_csr):
+    return HubLabels.build(brazil_csr)
+
+
+def test_labels_match_dijkstra(brazil_csr, brazil_nx, labels):
+    exact = dict(nx.all_pairs_dijkstra_path_length(brazil_nx))
+    ids = brazil_csr.ids.tolist()
+    for s, source in enumerate(ids):
+        for t, target in enumerate(ids):
+            expected = exact[source].get(target, np.inf)
+            assert labels.distance(s, t) == pytest.approx(expected, rel=TOLERANCE, abs=TOLERANCE)
+
+
+def test_graph_wrapper(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs:
+        try:
+            expected = nx.dijkstra_path_length(brazil_nx, source, target)
+        except nx.NetworkXNoPath:
+            expected = np.inf
+        assert hub_label_distance(brazil_csr, source, target) == pytest.approx(expected, rel=TOLERANCE)
+    assert hub_label_distance(brazil_csr, pairs[0][0], -1) == np.inf
+
+
+def test_save_and_load(brazil_csr, labels, tmp_path):
+    path = str(tmp_path / 'hub.bin')
+    labels.save(path, brazil_csr.fingerprint())
+    loaded = HubLabels.load(path, brazil_csr.fingerprint())
+    assert isinstance(loaded.dists, np.memmap)
+    np.testing.assert_array_equal(loaded.order, labels.order)
+    np.testing.assert_array_equal(loaded.hubs, labels.hubs)
+    np.testing.assert_array_equal(loaded.dists, labels.dists)
+    assert loaded.build_seconds == labels.build_seconds
+    assert HubLabels.load(path, '0' * 40) is None
+    assert HubLabels.load(str(tmp_path / 'missing.bin'), brazil_csr.fingerprint()) is None
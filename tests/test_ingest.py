@@ -0,0 +1,19 @@
+import os
+import shutil
+import pandas as pd
+from csv_cleaning_Brazil import ingest
+from conftest import DATA_DIR, AIRPORTS_DF, ROUTES_DF
+
+
+def test_ingest_writes_what_it_returns(tmp_path):
+    for name in ('airports.dat', 'routes.dat'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    counts = {}
+    airports_df, routes_df = ingest(data_dir=str(tmp_path), counts=counts)
+
+    pd.testing.assert_frame_equal(airports_df, AIRPORTS_DF)
+    pd.testing.assert_frame_equal(routes_df, ROUTES_DF)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'routes_min.csv'), routes_df)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'airports_min.csv', keep_default_na=False), airports_df)
+    assert counts['routes'] == len(routes_df)
+    assert not routes_df['distance_km'].isna().any()
@@ -0,0 +1,71 @@
+import networkx as nx
+import pytest
+from graph import alt_shortest_path, astar_shortest_path, dijkstra_shortest_path
+from landmarks import Landmarks
+from conftest import nx_distance, path_weight
+
+
+@pytest.mark.parametrize('count', [1, 4, 8])
+def test_alt_matches_networkx(brazil_csr, brazil_nx, pairs, count):
+    for source, target in pairs:
+        result = alt_shortest_path.__wrapped__(brazil_csr, source, target, landmarks=count)
+        expected = nx_distance(brazil_nx, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.total == pytest.approx(expected)
+        assert path_weight(brazil_nx, result.path) == pytest.approx(expected)
+        # Base de comparação é uma busca de verdade, nunca a tabela pré-calculada
+        baseline = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target, precomputed=False)
+        assert 0 < result.stats['settled'] <= baseline.stats['settled']
+        assert result.stats['landmarks'] == count
+
+
+def test_landmark_bounds_are_admissible(brazil_csr, brazil_nx, pairs):
+    landmarks = Landmarks.build(brazil_csr, 8)
+    for _, target in pairs[:10]:
+        bounds = landmarks.lower_bounds_to(brazil_csr.index[target])
+        exact = nx.single_source_dijkstra_path_length(brazil_nx, target)
+        for node, distance in exact.items():
+            assert bounds[brazil_csr.index[node]] <= distance + 1e-6
+    # Os primeiros marcos de um conjunto maior são os de um conjunto menor
+    assert Landmarks.build(brazil_csr, 4).landmarks == landmarks.landmarks[:4]
+
+
+def test_speedup_text_uses_real_searches(brazil_csr, pairs):
+    import app
+    source, target = next((s, t) for s, t in pairs if nx_distance(app.G, s, t) < float('inf'))
+    result = alt_shortest_path.__wrapped__(brazil_csr, source, target)
+    baseline = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target, precomputed=False)
+    straight = astar_shortest_path.__wrapped__(brazil_csr, source, target)
+    text = app.format_speedup(result, [("Dijkstra", baseline), ("A* haversine", straight)])
+    ratio = baseline.stats['settled'] / result.stats['settled']
+    assert f"{ratio:.1f}x vs Dijkstra" in text and ratio >= 1
+
+
+def run_callback(app, *args, **kwargs):
+    """Chama o callback principal como o Dash chamaria (com dash.ctx)."""
+    import contextvars
+    from dash._utils import AttributeDict
+    from dash._callback_context import context_value
+
+    def call():
+        context_value.set(AttributeDict(triggered_inputs=[{'prop_id': 'algorithm.value'}]))
+        return app.update_graph(*args, **kwargs)
+    return contextvars.copy_context().run(call)
+
+
+def test_comparison_runs_only_when_asked(pairs, monkeypatch):
+    import app
+    source, target = next((s, t) for s, t in pairs if nx_distance(app.G, s, t) < float('inf'))
+    baselines = []
+
+    def counted(*args, **options):
+        baselines.append(args)
+        return dijkstra_shortest_path(*args, **options)
+    monkeypatch.setattr(app, 'dijkstra_shortest_path', counted)
+
+    _, text, _ = run_callback(app, source, target, 'alt')
+    assert baselines == [] and 'vs Dijkstra' not in text
+    _, text, _ = run_callback(app, source, target, 'alt', compare=['compare'])
+    assert len(baselines) == 1 and 'vs Dijkstra' in text and 'A* haversine' in text
@@ -0,0 +1,82 @@
+import networkx as nx
+import numpy as np
+import pytest
+from csr_graph import CSRGraph
+from mst import MST_ENGINES, MSTIndex, UnionFind
+
+
+def test_mst_weight_matches_networkx(brazil_csr, brazil_nx):
+    index = MSTIndex.build(brazil_csr)
+    expected = nx.minimum_spanning_tree(brazil_nx)
+    assert len(index.mst_edges) == expected.number_of_edges()
+    assert index.mst_weight == pytest.approx(expected.size(weight='weight'))
+
+
+def test_lca_paths_follow_the_tree(brazil_csr, pairs):
+    index = MSTIndex.build(brazil_csr)
+    tree = index.mst_graph
+    for source, target in pairs:
+        s, t = brazil_csr.index[source], brazil_csr.index[target]
+        path, weights = index.path(s, t)
+        if not nx.has_path(tree, source, target):
+            assert path == [] and index.distance(s, t) == float('inf')
+            continue
+        # Na árvore só existe um caminho entre dois nós
+        assert brazil_csr.path_ids(path) == nx.shortest_path(tree, source, target)
+        assert weights == [tree[u][v]['weight'] for u, v in zip(brazil_csr.path_ids(path), brazil_csr.path_ids(path[1:]))]
+        assert index.distance(s, t) == pytest.approx(sum(weights))
+
+
+def random_csr(n=300, m=900, seed=0):
+    """Grafo aleatório com pesos inteiros (muitos empates) e nós isolados."""
+    rng = np.random.default_rng(seed)
+    u, v = rng.integers(0, n - 20, m), rng.integers(0, n - 20, m)
+    keep = u != v
+    u, v = u[keep], v[keep]
+    # Uma aresta por par
+    _, first = np.unique(np.minimum(u, v) * n + np.maximum(u, v), return_index=True)
+    u, v = u[first], v[first]
+    return CSRGraph(list(range(n)), [str(i) for i in range(n)], np.zeros(n), np.zeros(n),
+                    u, v, rng.integers(1, 8, len(u)).astype(np.float64))
+
+
+@pytest.mark.parametrize('engine', sorted(MST_ENGINES))
+def test_engines_match_networkx(engine, brazil_csr, brazil_nx):
+    for csr, reference in ((brazil_csr, brazil_nx), (random_csr(), None)):
+        if reference is None:
+            reference = csr.to_networkx()
+        edges, weight = MST_ENGINES[engine](csr)
+        expected = nx.minimum_spanning_tree(reference)
+        forest = nx.Graph()
+        forest.add_nodes_from(range(len(csr)))
+        forest.add_weighted_edges_from(edges)
+
+        # Floresta geradora (mesmos componentes do grafo) com o peso mínimo
+        assert nx.is_forest(forest)
+        assert len(edges) == expected.number_of_edges()
+        assert nx.number_connected_components(forest) == nx.number_connected_components(reference)
+        assert weight == pytest.approx(expected.size(weight='weight'))
+        for u, v, w in edges:
+            assert reference[csr.node_id(u)][csr.node_id(v)]['weight'] == w
+
+
+def test_union_find_matches_components():
+    csr = random_csr(seed=1)
+    uf = UnionFind(len(csr))
+    for u, v in zip(csr.edge_u.tolist(), csr.edge_v.tolist()):
+        uf.union(u, v)
+    for component in nx.connected_components(csr.to_networkx()):
+        roots = {uf.find(csr.index[node]) for node in component}
+        assert len(roots) == 1
+        assert uf.size[roots.pop()] == len(component)
+
+
+@pytest.mark.parametrize('engine', sorted(MST_ENGINES))
+def test_index_paths_with_each_engine(engine, brazil_csr, pairs):
+    index = MSTIndex.build(brazil_csr, engine)
+    assert index.engine == engine
+    tree = index.mst_graph
+    for source, target in pairs[:20]:
+        path, _ = index.path(brazil_csr.index[source], brazil_csr.index[target])
+        if nx.has_path(tree, source, target):
+            assert brazil_csr.path_ids(path) == nx.shortest_path(tree, source, target)
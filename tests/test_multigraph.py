@@ -0,0 +1,39 @@
+import networkx as nx
+import pytest
+from graph import directed_shortest_path
+from multigraph import RouteMultiGraph
+from conftest import AIRPORTS_DF, ROUTES_DF, nx_distance
+
+
+def reference_digraph(routes_df):
+    """nx.DiGraph com o trecho mais curto de cada par (origem, destino)."""
+    graph = nx.DiGraph()
+    graph.add_nodes_from(AIRPORTS_DF['id'])
+    for row in routes_df.itertuples():
+        if not graph.has_edge(row.src_id, row.dst_id) or row.distance_km < graph[row.src_id][row.dst_id]['weight']:
+            graph.add_edge(row.src_id, row.dst_id, weight=row.distance_km)
+    return graph
+
+
+@pytest.mark.parametrize('airlines, nonstop', [(None, False), ('top', False), (None, True)])
+def test_directed_matches_networkx(brazil_csr, pairs, airlines, nonstop):
+    multigraph = RouteMultiGraph.from_dataframe(brazil_csr, ROUTES_DF)
+    routes = ROUTES_DF
+    if airlines == 'top':
+        airlines = routes['airline_id'].value_counts().index[:2].tolist()
+        routes = routes[routes['airline_id'].isin(airlines)]
+    if nonstop:
+        routes = routes[routes['stops'] == 0]
+    reference = reference_digraph(routes)
+    legs = {(row.src_id, row.dst_id, row.airline_id): row.distance_km for row in routes.itertuples()}
+
+    for source, target in pairs + [(t, s) for s, t in pairs]:
+        result = directed_shortest_path(multigraph, source, target, airlines=airlines, nonstop=nonstop)
+        expected = nx_distance(reference, source, target)
+        if expected == float('inf'):
+            assert not result
+            continue
+        assert result.total == pytest.approx(expected)
+        # Cada trecho existe, no sentido certo, com a companhia informada
+        for u, v, airline, weight in zip(result.path, result.path[1:], result.airlines, result.weights):
+            assert legs[(u, v, airline)] == weight
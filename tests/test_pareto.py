@@ -0,0 +1,65 @@
+import pytest
+from graph import pareto_routes, hop_constrained_shortest_path
+from conftest import nx_distance, path_weight, shortcut_graph
+
+
+def brute_force_front(graph, source, target):
+    """
+    Fronteira (conexões, km) por programação dinâmica direta no nx.Graph:
+    best[v] é a menor distância até v com no máximo h trechos.
+    """
+    inf = float('inf')
+    best = {v: inf for v in graph}
+    best[source] = 0
+    front = []
+    for hops in range(1, len(graph)):
+        layer = dict(best)
+        for u, v, w in graph.edges(data='weight'):
+            for a, b in ((u, v), (v, u)):
+                if best[a] + w < layer[b]:
+                    layer[b] = best[a] + w
+        if layer == best:
+            break
+        best = layer
+        if best[target] < inf and (not front or best[target] < front[-1][1] - 1e-9):
+            front.append((hops, best[target]))
+    return front
+
+
+@pytest.mark.parametrize('dataset', ['brazil', 'random'])
+def test_pareto_front_matches_brute_force(brazil_csr, brazil_nx, pairs, dataset):
+    csr, reference = brazil_csr, brazil_nx
+    if dataset == 'random':
+        csr = shortcut_graph()
+        reference = csr.to_networkx()
+        pairs = [(0, 59), (3, 50), (10, 40), (59, 1), (20, 21)]
+    for source, target in pairs:
+        routes = pareto_routes(csr, source, target)
+        front = brute_force_front(reference, source, target)
+        assert [route.connections for route in routes] == [hops for hops, _ in front]
+        for route, (_, distance) in zip(routes, front):
+            assert route.total == pytest.approx(distance)
+            assert route.path[0] == source and route.path[-1] == target
+            assert path_weight(reference, route.path) == pytest.approx(route.total)
+        if routes:
+            assert routes[-1].total == pytest.approx(nx_distance(reference, source, target))
+
+
+def test_hop_limit(brazil_csr, brazil_nx, pairs):
+    for source, target in pairs[:25]:
+        front = brute_force_front(brazil_nx, source, target)
+        for limit in (1, 2, 3):
+            result = hop_constrained_shortest_path(brazil_csr, source, target, limit)
+            allowed = [distance for hops, distance in front if hops <= limit]
+            if not allowed:
+                assert not result
+                continue
+            assert result.connections <= limit
+            assert result.total == pytest.approx(allowed[-1])
+
+
+def test_same_airport_and_unknown(brazil_csr, pairs):
+    source = pairs[0][0]
+    routes = pareto_routes(brazil_csr, source, source)
+    assert len(routes) == 1 and routes[0].path == [source] and routes[0].total == 0
+    assert pareto_routes(brazil_csr, source, -1) == []
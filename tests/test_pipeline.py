@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from conftest import ROOT, DATA_DIR
+
+ALL_STAGES = {'ingest', 'check', 'snapshot', 'apsp', 'ch', 'hub'}
+OUTPUTS = ['airports_min.csv', 'routes_min.csv', 'graph_snapshot.npz', 'apsp_table.bin',
+           'ch_hierarchy.npz', 'hub_labels.bin']
+
+
+@pytest.fixture
+def pipeline_dir(tmp_path):
+    """AIRPORT_DATA_DIR temporário só com os dados brutos."""
+    for name in ('airports.dat', 'routes.dat'):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    return tmp_path
+
+
+def run_pipeline(data_dir, **env):
+    """Roda main.run_data_processing em outro processo e devolve os estágios executados."""
+    code = "import json, main; print('EXECUTED', json.dumps(main.run_data_processing()))"
+    env = {**os.environ, 'AIRPORT_DATA_DIR': str(data_dir), 'PIPELINE_FORCE': '', 'AIRPORT_REGIONS': '',
+           **env}
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('EXECUTED '))
+    return set(json.loads(line.split(' ', 1)[1]))
+
+
+def mtimes(data_dir):
+    return {name: os.stat(data_dir / name).st_mtime_ns for name in OUTPUTS}
+
+
+def test_pipeline_skips_unchanged_stages(pipeline_dir):
+    assert run_pipeline(pipeline_dir) == ALL_STAGES
+    manifest = json.loads((pipeline_dir / 'pipeline_manifest.json').read_text())
+    assert set(manifest['stages']) == ALL_STAGES
+    before = mtimes(pipeline_dir)
+
+    # Nada mudou: nenhum estágio roda e nenhuma saída é regravada
+    assert run_pipeline(pipeline_dir) == set()
+    assert mtimes(pipeline_dir) == before
+
+    # Entrada bruta alterada sem mudar o resultado da ingestão: só ela roda
+    with open(pipeline_dir / 'routes.dat', 'a') as f:
+        f.write('\n')
+    assert run_pipeline(pipeline_dir) == {'ingest'}
+
+    # Parâmetro novo (outras regiões) muda os CSVs e tudo depois deles
+    assert run_pipeline(pipeline_dir, AIRPORT_REGIONS='Brazil,Argentina') == ALL_STAGES
+    assert run_pipeline(pipeline_dir, AIRPORT_REGIONS='Brazil,Argentina') == set()
+
+    # Saída apagada é refeita, e PIPELINE_FORCE=1 refaz tudo
+    os.remove(pipeline_dir / 'hub_labels.bin')
+    assert run_pipeline(pipeline_dir, AIRPORT_REGIONS='Brazil,Argentina') == {'hub'}
+    assert run_pipeline(pipeline_dir, AIRPORT_REGIONS='Brazil,Argentina', PIPELINE_FORCE='1') == ALL_STAGES
@@ -0,0 +1,79 @@
+import logging
+import math
+import networkx as nx
+import pytest
+from graph import bfs_shortest_path, dijkstra_shortest_path, kruskal_full_mst
+from results import RouteResult, MSTResult
+
+
+def sample():
+    return RouteResult('dijkstra', [1, 2, 3], [10.0, 5.0], 15.0, {'settled': 3}, [7, 8])
+
+
+def test_copy_is_independent():
+    result = sample()
+    copy = result.copy()
+    copy.path.append(4)
+    copy.weights.append(1.0)
+    copy.stats['settled'] = 0
+    copy.airlines.append(9)
+    assert result.path == [1, 2, 3] and result.weights == [10.0, 5.0]
+    assert result.stats == {'settled': 3} and result.airlines == [7, 8]
+    assert (copy.algorithm, copy.total) == (result.algorithm, result.total)
+
+
+def test_reversed_is_independent():
+    result = sample()
+    back = result.reversed()
+    assert back.path == [3, 2, 1] and back.weights == [5.0, 10.0] and back.airlines == [8, 7]
+    assert back.total == result.total and back.connections == result.connections == 2
+    back.stats['settled'] = 0
+    back.path.append(0)
+    assert result.stats == {'settled': 3} and result.path == [1, 2, 3]
+    again = result.reversed().reversed()
+    assert (again.path, again.weights, again.airlines) == (result.path, result.weights, result.airlines)
+
+
+def test_missing_route_is_falsy():
+    empty = RouteResult('bfs', stats={'settled': 5})
+    assert not empty and not empty.found
+    assert empty.path == [] and empty.weights == [] and empty.airlines == []
+    assert math.isinf(empty.total) and empty.connections == 0
+    assert not empty.reversed() and empty.reversed().stats == {'settled': 5}
+    # As listas padrão não são compartilhadas entre resultados
+    RouteResult('bfs').path.append(1)
+    assert RouteResult('bfs').path == []
+
+
+def test_searches_without_a_path(brazil_csr, brazil_nx):
+    components = sorted(nx.connected_components(brazil_nx), key=len, reverse=True)
+    source, target = min(components[0]), min(components[1])
+    for search in (bfs_shortest_path, dijkstra_shortest_path):
+        result = search.__wrapped__(brazil_csr, source, target)
+        assert not result and result.path == [] and math.isinf(result.total)
+        assert result.stats['settled'] > 0
+
+
+def test_mst_result(brazil_csr):
+    mst = kruskal_full_mst(brazil_csr)
+    assert isinstance(mst, MSTResult)
+    assert mst.num_edges == mst.graph.number_of_edges()
+    assert mst.total == pytest.approx(mst.graph.size(weight='weight'))
+
+
+def test_route_tracing_is_debug_logging(brazil_csr, pairs, caplog, capsys):
+    source, target = next((s, t) for s, t in pairs
+                          if dijkstra_shortest_path.__wrapped__(brazil_csr, s, t, precomputed=False))
+    # Sem DEBUG, nada é escrito (nem no console, nem no log)
+    with caplog.at_level(logging.INFO, logger='graph'):
+        dijkstra_shortest_path.__wrapped__(brazil_csr, source, target, precomputed=False)
+    assert caplog.records == []
+    assert capsys.readouterr() == ('', '')
+
+    with caplog.at_level(logging.DEBUG, logger='graph'):
+        result = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target, precomputed=False)
+    messages = [record.getMessage() for record in caplog.records if record.name == 'graph']
+    # Uma linha por aresta e o resumo com conexões e custo total
+    assert len(messages) == result.connections + 1
+    assert f"{result.connections} conexões" in messages[-1] and f"{result.total:.2f} km" in messages[-1]
+    assert capsys.readouterr() == ('', '')
@@ -0,0 +1,77 @@
+import pytest
+from graph import (route_cache, graph_version, bfs_shortest_path, dijkstra_shortest_path, astar_shortest_path,
+                   bidirectional_dijkstra_shortest_path, alt_shortest_path, ch_shortest_path, kruskal_mst_path)
+from results import RouteResult
+from route_cache import RouteCache
+
+
+def test_results_are_copies():
+    cache = RouteCache(maxsize=8)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return RouteResult('dijkstra', [1, 2, 3], [10.0, 5.0], 15.0, {'settled': 3})
+
+    first = cache.lookup('v1', 'dijkstra', 1, 3, compute)
+    first.path.append(99)
+    first.stats['settled'] = 0
+    second = cache.lookup('v1', 'dijkstra', 1, 3, compute)
+    assert second.path == [1, 2, 3] and second.stats == {'settled': 3}
+    second.weights.clear()
+
+    # O sentido contrário usa a mesma entrada, invertida
+    back = cache.lookup('v1', 'dijkstra', 3, 1, compute)
+    assert back.path == [3, 2, 1] and back.weights == [5.0, 10.0]
+    assert len(calls) == 1
+
+
+def test_versions_live_side_by_side():
+    cache = RouteCache(maxsize=8)
+    old = cache.lookup('v1', 'dijkstra', 1, 2, lambda: RouteResult('dijkstra', [1, 2], [7.0], 7.0))
+    new = cache.lookup('v2', 'dijkstra', 1, 2, lambda: RouteResult('dijkstra', [1, 2], [3.0], 3.0))
+    # Uma consulta da versão nova não apaga as da antiga
+    assert cache.lookup('v1', 'dijkstra', 1, 2, lambda: None).total == old.total == 7.0
+    assert cache.lookup('v2', 'dijkstra', 1, 2, lambda: None).total == new.total == 3.0
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 2 and stats['invalidations'] == 0
+
+
+def test_lru_eviction():
+    cache = RouteCache(maxsize=2)
+    for target in (2, 3, 4):
+        cache.lookup('v1', 'bfs', 1, target, lambda: RouteResult('bfs', [1, target], [1.0], 1.0))
+    assert len(cache) == 2 and cache.stats()['evictions'] == 1
+
+
+def test_cached_dijkstra_matches_uncached(brazil_csr, pairs):
+    version = graph_version(brazil_csr)
+    for source, target in pairs[:10]:
+        cached = dijkstra_shortest_path(brazil_csr, source, target)
+        direct = dijkstra_shortest_path.__wrapped__(brazil_csr, source, target)
+        assert cached.path == direct.path and cached.total == direct.total
+        back = dijkstra_shortest_path(brazil_csr, target, source)
+        assert back.path == direct.path[::-1]
+    assert version == graph_version(brazil_csr)
+
+
+@pytest.mark.parametrize('search', [bfs_shortest_path, dijkstra_shortest_path, astar_shortest_path,
+                                    bidirectional_dijkstra_shortest_path, alt_shortest_path,
+                                    ch_shortest_path, kruskal_mst_path])
+def test_unknown_ids_skip_the_cache(brazil_csr, search):
+    source = brazil_csr.node_id(0)
+    # None (dropdown vazio) ou ids de outro tipo: sem caminho, sem TypeError
+    size = len(route_cache)
+    for a, b in ((source, None), (None, source), (source, 'GRU'), ('GRU', source)):
+        assert not search(brazil_csr, a, b)
+    assert len(route_cache) == size
+
+
+def test_options_are_keyword_only(brazil_csr, pairs):
+    source, target = pairs[0]
+    with pytest.raises(TypeError):
+        dijkstra_shortest_path(brazil_csr, source, target, False)
+    with pytest.raises(TypeError):
+        alt_shortest_path(brazil_csr, source, target, 4)
+    plain = dijkstra_shortest_path(brazil_csr, source, target, precomputed=False)
+    assert plain.total == dijkstra_shortest_path(brazil_csr, source, target).total
@@ -0,0 +1,55 @@
+import numpy as np
+from search import AirportSearch, normalize
+from conftest import AIRPORTS_DF
+
+
+def build():
+    rank = np.random.default_rng(0).integers(0, 20, len(AIRPORTS_DF)).tolist()
+    return AirportSearch(AIRPORTS_DF['name'], AIRPORTS_DF['iata'], AIRPORTS_DF['icao'], rank), rank
+
+
+def brute_force(query, rank, limit=10):
+    """Mesma ordem de relevância da busca, varrendo todos os aeroportos."""
+    query = normalize(query)
+    names = [normalize(name) for name in AIRPORTS_DF['name']]
+    codes = [{normalize(c) for c in pair} - {''} for pair in zip(AIRPORTS_DF['iata'], AIRPORTS_DF['icao'])]
+    tiebreak = lambda i: (-rank[i], names[i])
+    words = [set(name.split()) | code for name, code in zip(names, codes)]
+    matches = [i for i in range(len(names))
+               if all(any(w.startswith(q) for w in words[i]) for q in query.split())]
+    groups = ([i for i in matches if query in codes[i]],
+              [i for i in matches if names[i].startswith(query)],
+              matches)
+    result = []
+    for group in groups:
+        result += [i for i in sorted(group, key=tiebreak) if i not in result]
+    return result[:limit]
+
+
+def test_prefix_search_matches_brute_force():
+    index, rank = build()
+    queries = {'a', 'sa', 'São', 'sao pe', 'interna', 'rio gal', 'campo', 'GRU', 'sbgr', 'int a', 'Galeão', 'BSB'}
+    for name in AIRPORTS_DF['name'].tolist()[::7]:
+        words = normalize(name).split()
+        queries.update([words[0][:2], words[-1][:4], ' '.join(w[:3] for w in words[:2])])
+    for query in sorted(queries):
+        expected = brute_force(query, rank)
+        assert expected, query
+        assert index.search(query) == expected, query
+
+
+def test_typo_falls_back_to_trigrams():
+    index, _ = build()
+    position = AIRPORTS_DF.index[AIRPORTS_DF['iata'] == 'GRU'][0]
+    name = normalize(AIRPORTS_DF['name'][position])
+    # "guarulhos" sem o "r": nenhuma palavra começa assim
+    typo = name[:3] + name[4:]
+    assert brute_force(typo, [0] * len(AIRPORTS_DF)) == []
+    assert index.search(typo)[0] == position
+
+
+def test_empty_queries():
+    index, _ = build()
+    assert index.search('') == [] and index.search('  /-') == []
+    assert index.search('sao', limit=0) == []
+    assert index.search('zzzzqqqq') == []
@@ -0,0 +1,61 @@
+import numpy as np
+from geo import haversine_km
+from spatial import SpatialIndex
+
+
+def brute_force(csr, lat, lon):
+    """Distância em km de (lat, lon) até cada aeroporto, sem índice."""
+    return haversine_km(csr.lat, csr.lon, lat, lon)
+
+
+def queries(count=100, seed=0):
+    rng = np.random.default_rng(seed)
+    # Inclui pontos perto dos polos e da linha de data
+    lat = np.concatenate([rng.uniform(-35, 6, count), [89.9, -89.9, 0.0]])
+    lon = np.concatenate([rng.uniform(-75, -30, count), [0.0, 179.9, -179.9]])
+    return zip(lat.tolist(), lon.tolist())
+
+
+def test_nearest_matches_brute_force(brazil_csr):
+    index = SpatialIndex(brazil_csr.lat, brazil_csr.lon)
+    for lat, lon in queries():
+        expected = brute_force(brazil_csr, lat, lon)
+        for k in (1, 5, 17):
+            nodes, dist = index.nearest(lat, lon, k)
+            assert np.allclose(dist, np.sort(expected)[:k])
+            assert np.allclose(expected[nodes], dist)
+            assert np.all(np.diff(dist) >= 0)
+
+
+def test_within_matches_brute_force(brazil_csr):
+    index = SpatialIndex(brazil_csr.lat, brazil_csr.lon)
+    for lat, lon in queries(30):
+        expected = brute_force(brazil_csr, lat, lon)
+        for radius in (50, 400, 2000):
+            nodes, dist = index.within(lat, lon, radius)
+            inside = np.flatnonzero(expected <= radius)
+            # Tolerância na borda do raio (corda x arco)
+            border = np.abs(expected - radius) < 1e-6
+            assert set(nodes.tolist()) ^ set(inside.tolist()) <= set(np.flatnonzero(border).tolist())
+            assert np.allclose(expected[nodes], dist)
+
+
+def test_subset_index_returns_csr_indices(brazil_csr):
+    nodes = np.arange(0, len(brazil_csr), 3)
+    index = SpatialIndex(brazil_csr.lat[nodes], brazil_csr.lon[nodes], nodes)
+    found, dist = index.nearest(-23.5, -46.6, 3)
+    expected = brute_force(brazil_csr, -23.5, -46.6)[nodes]
+    assert np.array_equal(found, nodes[np.argsort(expected)[:3]])
+
+
+def test_empty_results():
+    index = SpatialIndex([-23.5, -22.9], [-46.6, -43.2])
+    # Raio negativo não encontra nada, nem o ponto exato da consulta
+    for nodes, dist in (index.nearest(0, 0, 0), index.nearest(0, 0, -1),
+                        SpatialIndex([], []).nearest(0, 0, 3),
+                        index.within(-23.5, -46.6, -1), index.within(-23.5, -46.6, -20000)):
+        assert nodes.dtype == np.int64 and len(nodes) == len(dist) == 0
+    nodes, dist = index.nearest(0, 0, 10)
+    assert len(nodes) == 2
+    assert index.within(-23.5, -46.6, 0)[0].tolist() == [0]
+    assert len(SpatialIndex([], []).within(0, 0, 20000)[0]) == 0
@@ -0,0 +1,42 @@
+from itertools import islice
+import networkx as nx
+import pytest
+from graph import k_shortest_paths
+from conftest import path_weight, shortcut_graph
+
+
+def expected_costs(graph, source, target, k):
+    try:
+        paths = list(islice(nx.shortest_simple_paths(graph, source, target, weight='weight'), k))
+    except nx.NetworkXNoPath:
+        return []
+    return [path_weight(graph, path) for path in paths]
+
+
+@pytest.mark.parametrize('dataset', ['brazil', 'random'])
+def test_yen_matches_networkx(brazil_csr, brazil_nx, pairs, dataset):
+    csr, reference = brazil_csr, brazil_nx
+    if dataset == 'random':
+        csr = shortcut_graph()
+        reference = csr.to_networkx()
+        pairs = [(0, 59), (3, 50), (10, 40), (59, 1), (20, 21)]
+    k = 6
+    for source, target in pairs[:20]:
+        routes = k_shortest_paths(csr, source, target, k)
+        expected = expected_costs(reference, source, target, k)
+        # Custos iguais aos do networkx (caminhos empatados podem vir em outra ordem)
+        assert [route.total for route in routes] == pytest.approx(expected)
+        seen = set()
+        for route in routes:
+            assert route.path[0] == source and route.path[-1] == target
+            assert len(set(route.path)) == len(route.path)
+            assert path_weight(reference, route.path) == pytest.approx(route.total)
+            seen.add(tuple(route.path))
+        assert len(seen) == len(routes)
+
+
+def test_yen_edge_cases(brazil_csr, pairs):
+    source, target = pairs[0]
+    assert k_shortest_paths(brazil_csr, source, target, 0) == []
+    assert k_shortest_paths(brazil_csr, source, -1, 3) == []
+    assert len(k_shortest_paths(brazil_csr, source, target, 1)) <= 1